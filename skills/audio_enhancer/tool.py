@@ -16,6 +16,13 @@ from dotenv import load_dotenv
 load_dotenv() # Load environment variables from .env
 SKILL_ROOT = Path(__file__).parent.absolute()
 
+# Shared in-process media I/O (PyAV, ffmpeg CLI fallback) from the Video Sync Master backend
+sys.path.append(str(SKILL_ROOT.parent / "video_sync_master" / "backend"))
+try:
+    import media_io
+except ImportError:
+    media_io = None
+
 # DSP Chain Parameters (The "Secret Sauce")
 EQ_OPTS = "highpass=f=90,equalizer=f=250:t=q:w=1.0:g=-3,equalizer=f=500:t=q:w=1.2:g=-1.5,equalizer=f=3000:t=q:w=1.0:g=2,equalizer=f=10000:t=q:w=1.0:g=1.5"
 COMP_OPTS = "acompressor=threshold=-18dB:ratio=2.5:attack=15:release=120"
@@ -56,13 +63,16 @@ def run_processing(input_path: str, preset: str):
     try:
         # Step 1: Extract Audio (to 48k wav)
         raw_wav = work_dir / "voice_raw.wav"
-        subprocess.run([
-            FFMPEG_BIN, "-v", "error", "-y",
-            "-i", str(input_file),
-            "-vn", "-ac", "1", "-ar", "48000",
-            "-c:a", "pcm_s16le",
-            str(raw_wav)
-        ], check=True)
+        if media_io:
+            media_io.extract_audio(str(input_file), str(raw_wav), sr=48000, mono=True)
+        else:
+            subprocess.run([
+                FFMPEG_BIN, "-v", "error", "-y",
+                "-i", str(input_file),
+                "-vn", "-ac", "1", "-ar", "48000",
+                "-c:a", "pcm_s16le",
+                str(raw_wav)
+            ], check=True)
 
         # Step 2: DeepFilterNet (AI Denoise)
         # DeepFilterNet creates a file with a specific suffix
@@ -93,19 +103,24 @@ def run_processing(input_path: str, preset: str):
 
         # Step 4: Remux (Combine original video + new audio)
         # We use -map 0:v? to handle audio-only sources gracefully
-        subprocess.run([
-            FFMPEG_BIN, "-v", "error", "-y",
-            "-i", str(input_file),
-            "-i", str(final_wav),
-            "-map", "0:v?", # Map original video if exists
-            "-map", "1:a:0", # Map processed audio
-            "-map_metadata", "0", # Copy global metadata
-            "-c:v", "copy",  # Fast copy video stream
-            "-c:a", "aac", "-b:a", "192k",
-            "-movflags", "+faststart", # Better for web streaming
-            "-shortest",
-            str(output_file)
-        ], check=True)
+        if media_io:
+            media_io.mux(str(input_file), str(final_wav), str(output_file),
+                         video_codec="copy", audio_codec="aac", audio_bitrate="192k",
+                         faststart=True, copy_metadata=True)
+        else:
+            subprocess.run([
+                FFMPEG_BIN, "-v", "error", "-y",
+                "-i", str(input_file),
+                "-i", str(final_wav),
+                "-map", "0:v?", # Map original video if exists
+                "-map", "1:a:0", # Map processed audio
+                "-map_metadata", "0", # Copy global metadata
+                "-c:v", "copy",  # Fast copy video stream
+                "-c:a", "aac", "-b:a", "192k",
+                "-movflags", "+faststart", # Better for web streaming
+                "-shortest",
+                str(output_file)
+            ], check=True)
 
         return {
             "status": "success",
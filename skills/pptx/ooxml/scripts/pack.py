@@ -7,14 +7,36 @@ Example usage:
 """
 
 import argparse
-import shutil
+import io
 import subprocess
 import sys
 import tempfile
-import defusedxml.minidom
 import zipfile
 from pathlib import Path
 
+import lxml.etree
+from soffice import convert_document
+
+# Parts that are already compressed; deflating them again only costs CPU
+STORED_EXTENSIONS = {
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".mp3",
+    ".m4a",
+    ".mp4",
+    ".m4v",
+    ".mov",
+    ".wma",
+    ".wmv",
+    ".docx",
+    ".pptx",
+    ".xlsx",
+    ".zip",
+}
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
@@ -61,34 +83,47 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
+    # Condense XML in memory and stream every part straight into the archive;
+    # the input directory itself is never modified
+    files = [f for f in input_dir.rglob("*") if f.is_file()]
+    # Keep [Content_Types].xml as the first entry, as Office itself does
+    files.sort(key=lambda f: f.relative_to(input_dir) != Path("[Content_Types].xml"))
 
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    try:
         with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+            for f in files:
+                arcname = f.relative_to(input_dir)
+                suffix = f.suffix.lower()
+                # Match on the name: the package-level "_rels/.rels" has no suffix
+                if f.name.endswith((".xml", ".rels")):
+                    info = zipfile.ZipInfo.from_file(f, arcname)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    zf.writestr(info, condense_xml_bytes(f.read_bytes()))
+                elif suffix in STORED_EXTENSIONS:
+                    zf.write(f, arcname, compress_type=zipfile.ZIP_STORED)
+                else:
+                    zf.write(f, arcname)
+    except BaseException:
+        output_file.unlink(missing_ok=True)  # Don't leave a half-written file
+        raise
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
 
 def validate_document(doc_path):
-    """Validate document by converting to HTML with soffice."""
+    """Validate document by converting to HTML with soffice.
+
+    Conversions go through the shared soffice worker pool (see soffice.py)
+    when the UNO bridge is available, so repeated validations don't each pay
+    for a LibreOffice start-up.
+    """
     # Determine the correct filter based on file extension
     match doc_path.suffix.lower():
         case ".docx":
@@ -100,24 +135,7 @@ def validate_document(doc_path):
 
     with tempfile.TemporaryDirectory() as temp_dir:
         try:
-            result = subprocess.run(
-                [
-                    "soffice",
-                    "--headless",
-                    "--convert-to",
-                    filter_name,
-                    "--outdir",
-                    temp_dir,
-                    str(doc_path),
-                ],
-                capture_output=True,
-                timeout=10,
-                text=True,
-            )
-            if not (Path(temp_dir) / f"{doc_path.stem}.html").exists():
-                error_msg = result.stderr.strip() or "Document validation failed"
-                print(f"Validation error: {error_msg}", file=sys.stderr)
-                return False
+            convert_document(doc_path, temp_dir, filter_name, timeout=10)
             return True
         except FileNotFoundError:
             print("Warning: soffice not found. Skipping validation.", file=sys.stderr)
@@ -125,6 +143,10 @@ def validate_document(doc_path):
         except subprocess.TimeoutExpired:
             print("Validation error: Timeout during conversion", file=sys.stderr)
             return False
+        except RuntimeError as e:
+            error_msg = str(e) or "Document validation failed"
+            print(f"Validation error: {error_msg}", file=sys.stderr)
+            return False
         except Exception as e:
             print(f"Validation error: {e}", file=sys.stderr)
             return False
@@ -132,27 +154,49 @@ def validate_document(doc_path):
 
 def condense_xml(xml_file):
     """Strip unnecessary whitespace and remove comments."""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
+    xml_file = Path(xml_file)
+    xml_file.write_bytes(condense_xml_bytes(xml_file.read_bytes()))
+
+
+def condense_xml_bytes(data):
+    """Return data with pretty-printing whitespace and comments removed.
+
+    Whitespace-only text and comments are dropped everywhere except inside
+    prefixed text elements (w:t, a:t, ...), whose content is kept verbatim.
+    """
+    parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+    tree = lxml.etree.parse(io.BytesIO(data), parser)
 
-    # Process each element to remove whitespace and comments
-    for element in dom.getElementsByTagName("*"):
+    for element in tree.getroot().iter(lxml.etree.Element):
         # Skip w:t elements and their processing
-        if element.tagName.endswith(":t"):
+        if element.prefix and lxml.etree.QName(element).localname == "t":
             continue
 
-        # Remove whitespace-only text nodes and comment nodes
-        for child in list(element.childNodes):
-            if (
-                child.nodeType == child.TEXT_NODE
-                and child.nodeValue
-                and child.nodeValue.strip() == ""
-            ) or child.nodeType == child.COMMENT_NODE:
-                element.removeChild(child)
-
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+        # Remove whitespace-only text nodes
+        if element.text is not None and element.text.strip() == "":
+            element.text = None
+        for child in element:
+            if child.tail is not None and child.tail.strip() == "":
+                child.tail = None
+
+        # Remove comment nodes, keeping any text that follows them
+        for child in list(element):
+            if isinstance(child, lxml.etree._Comment):
+                _remove_keeping_tail(child)
+
+    return lxml.etree.tostring(tree, xml_declaration=True, encoding="UTF-8")
+
+
+def _remove_keeping_tail(node):
+    """Remove node from its parent, moving its tail text onto the previous node."""
+    parent = node.getparent()
+    if node.tail:
+        previous = node.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + node.tail
+        else:
+            parent.text = (parent.text or "") + node.tail
+    parent.remove(node)
 
 
 if __name__ == "__main__":
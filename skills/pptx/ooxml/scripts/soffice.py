@@ -0,0 +1,394 @@
+"""
+Shared LibreOffice (soffice) conversion service.
+
+Starting soffice costs seconds per call, which dominates document
+validation and thumbnail rendering. When the LibreOffice Python bridge
+(``uno``) is importable, conversions are sent to a small pool of headless
+soffice processes listening on a local UNO socket. Each worker has its own
+user profile and port, so workers (also those of other runs) never share a
+profile or stop each other's processes. Requests queue
+for the next free worker, and a worker that crashes or times out is
+restarted on its next use. Without ``uno`` every call falls back to a
+one-shot ``soffice --headless --convert-to`` subprocess.
+
+Environment:
+    SOFFICE_BIN         soffice executable (default: soffice)
+    SOFFICE_UNO         set to 0 to always use one-shot subprocesses
+    SOFFICE_WORKERS     number of pooled soffice processes (default: 1)
+    SOFFICE_BASE_PORT   UNO port of the first kept-alive worker (default: 2202)
+    SOFFICE_PROFILE_DIR root of the per-worker profiles
+    SOFFICE_KEEP_ALIVE  set to 1 to leave workers running after exit on fixed
+                        ports, so later runs re-attach to them instead of
+                        starting soffice. Otherwise every run starts private
+                        workers on free ports and stops them at exit.
+
+Usage:
+    from soffice import convert_document
+
+    pdf_path = convert_document("deck.pptx", out_dir, "pdf", timeout=120)
+"""
+
+import atexit
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SOFFICE_BIN = os.environ.get("SOFFICE_BIN", "soffice")
+USE_UNO = os.environ.get("SOFFICE_UNO", "1") != "0"
+POOL_SIZE = max(1, int(os.environ.get("SOFFICE_WORKERS", "1")))
+BASE_PORT = int(os.environ.get("SOFFICE_BASE_PORT", "2202"))
+PROFILE_ROOT = Path(
+    os.environ.get(
+        "SOFFICE_PROFILE_DIR", Path(tempfile.gettempdir()) / "soffice-workers"
+    )
+)
+KEEP_ALIVE = os.environ.get("SOFFICE_KEEP_ALIVE", "0") == "1"
+STARTUP_TIMEOUT = 60  # Seconds to wait for a new worker to accept connections
+
+# Export filters used when --convert-to names only an extension
+PDF_FILTERS = {
+    ".pptx": "impress_pdf_Export",
+    ".ppt": "impress_pdf_Export",
+    ".odp": "impress_pdf_Export",
+    ".docx": "writer_pdf_Export",
+    ".doc": "writer_pdf_Export",
+    ".odt": "writer_pdf_Export",
+    ".xlsx": "calc_pdf_Export",
+    ".xls": "calc_pdf_Export",
+    ".ods": "calc_pdf_Export",
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def convert_document(input_path, output_dir, convert_to, timeout=None):
+    """Convert a document with soffice, like `soffice --convert-to`.
+
+    Args:
+        input_path: Document to convert
+        output_dir: Directory for the converted file
+        convert_to: Target in --convert-to syntax, e.g. "pdf" or
+            "html:impress_html_Export"
+        timeout: Seconds before the conversion is abandoned (None = no limit)
+
+    Returns:
+        Path: The converted file, output_dir / "<input stem>.<extension>"
+
+    Raises:
+        FileNotFoundError: soffice is not installed
+        subprocess.TimeoutExpired: The conversion exceeded timeout
+        RuntimeError: The conversion failed; the message carries soffice's
+            error output when there is any
+    """
+    input_path = Path(input_path)
+    output_dir = Path(output_dir)
+    extension = convert_to.split(":", 1)[0]
+    output_path = output_dir / f"{input_path.stem}.{extension}"
+
+    pool = _get_pool()
+    if pool is not None:
+        filter_name = _resolve_filter(input_path, convert_to)
+        if filter_name:
+            pool.convert(input_path, output_path, filter_name, timeout)
+            return output_path
+
+    result = subprocess.run(
+        [
+            SOFFICE_BIN,
+            "--headless",
+            "--convert-to",
+            convert_to,
+            "--outdir",
+            str(output_dir),
+            str(input_path),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    if result.returncode != 0 or not output_path.exists():
+        raise RuntimeError(result.stderr.strip())
+    return output_path
+
+
+def shutdown():
+    """Stop the pooled workers (unless SOFFICE_KEEP_ALIVE is set)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not KEEP_ALIVE:
+            _pool.close()
+        _pool = None
+
+
+def _resolve_filter(input_path, convert_to):
+    """Return the export filter name for a --convert-to target, or None."""
+    extension, _, filter_name = convert_to.partition(":")
+    if filter_name:
+        return filter_name
+    if extension == "pdf":
+        return PDF_FILTERS.get(input_path.suffix.lower())
+    return None
+
+
+def _get_pool():
+    """Return the process-wide worker pool, or None when UNO is unavailable."""
+    global _pool, USE_UNO
+    if not USE_UNO:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            try:
+                import uno  # noqa: F401  (LibreOffice's Python bridge)
+            except ImportError:
+                USE_UNO = False
+                return None
+            _pool = SofficePool(POOL_SIZE)
+            atexit.register(shutdown)
+        return _pool
+
+
+def _free_port():
+    """A localhost port nothing is listening on, chosen by the OS."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class SofficeTimeout(Exception):
+    """Raised by a worker when a conversion exceeded its timeout."""
+
+
+class SofficeWorker:
+    """One headless soffice process with its own profile and UNO socket."""
+
+    def __init__(self, index):
+        self.index = index
+        self.port = None
+        self.profile_dir = None
+        self.private_profile = False
+        self.process = None  # Set only for a soffice this process started
+        self.desktop = None
+        # Kept-alive workers sit on fixed ports; re-attach to one an earlier run left
+        self.attach = KEEP_ALIVE
+
+    def ensure_running(self):
+        """Connect to this worker's soffice, starting it if necessary."""
+        if self.desktop is not None and self.alive():
+            return
+        self.stop()
+
+        if self.attach:
+            self.port = BASE_PORT + self.index
+            self.profile_dir = PROFILE_ROOT / f"worker-{self.index}"
+            self.private_profile = False
+            if self._connect(deadline=time.monotonic()):
+                return
+        else:
+            # Private port and profile: another run's soffice is never reused or stopped
+            self.port = _free_port()
+            self.profile_dir = PROFILE_ROOT / f"worker-{self.index}-{os.getpid()}"
+            self.private_profile = True
+
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        self.process = subprocess.Popen(
+            [
+                SOFFICE_BIN,
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}",
+                f"--accept=socket,host=127.0.0.1,port={self.port};"
+                "urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=self.attach,
+        )
+        if not self._connect(deadline=time.monotonic() + STARTUP_TIMEOUT):
+            self.stop()
+            raise RuntimeError(f"soffice worker {self.index} failed to start")
+
+    def _connect(self, deadline):
+        """Try to attach to the UNO socket until deadline. Returns True on success."""
+        import uno
+        from com.sun.star.connection import NoConnectException
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context
+        )
+        url = (
+            f"uno:socket,host=127.0.0.1,port={self.port};"
+            "urp;StarOffice.ComponentContext"
+        )
+        while True:
+            try:
+                context = resolver.resolve(url)
+                self.desktop = context.ServiceManager.createInstanceWithContext(
+                    "com.sun.star.frame.Desktop", context
+                )
+                return True
+            except NoConnectException:
+                if self.process is not None and self.process.poll() is not None:
+                    return False  # soffice exited during startup
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.25)
+
+    def alive(self):
+        """Check that the process (if we own it) is up and the bridge answers."""
+        if self.process is not None and self.process.poll() is not None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def convert(self, input_path, output_path, filter_name, timeout=None):
+        """Load input_path hidden and store it to output_path with filter_name."""
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def properties(**values):
+            result = []
+            for name, value in values.items():
+                prop = PropertyValue()
+                prop.Name = name
+                prop.Value = value
+                result.append(prop)
+            return tuple(result)
+
+        self.ensure_running()
+        desktop = self.desktop
+        outcome = {}
+
+        def run():
+            try:
+                document = desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(str(Path(input_path).resolve())),
+                    "_blank",
+                    0,
+                    properties(Hidden=True, ReadOnly=True),
+                )
+                if document is None:
+                    raise RuntimeError(f"soffice could not load {input_path}")
+                try:
+                    document.storeToURL(
+                        uno.systemPathToFileUrl(str(Path(output_path).resolve())),
+                        properties(FilterName=filter_name, Overwrite=True),
+                    )
+                finally:
+                    document.close(True)
+            except Exception as e:
+                outcome["error"] = e
+
+        # The UNO calls run on a helper thread so the timeout holds even when
+        # soffice hangs and cannot be killed (a worker we only attached to)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            self.kill()
+            raise SofficeTimeout()
+        if "error" in outcome:
+            raise outcome["error"]
+
+    def kill(self):
+        """Hard-stop the worker; it is restarted on next use.
+
+        A soffice this process only attached to is left alone (it belongs to
+        another run); the worker starts a private one next time instead.
+        """
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+        else:
+            self.attach = False
+        self.desktop = None
+
+    def stop(self):
+        """Ask our soffice to quit, killing it if it does not; detach from others."""
+        if self.desktop is not None:
+            if self.process is not None:
+                try:
+                    self.desktop.terminate()
+                except Exception:
+                    pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+            if self.private_profile:
+                shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class SofficePool:
+    """A fixed number of soffice workers shared through a queue."""
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = SofficeWorker(len(self._workers))
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()  # Wait for a busy worker to free up
+
+    def convert(self, input_path, output_path, filter_name, timeout=None):
+        """Run one conversion on the next free worker.
+
+        A worker that died mid-conversion is restarted and the conversion is
+        retried once; a timed-out conversion is not retried.
+        """
+        worker = self._acquire()
+        try:
+            for attempt in range(2):
+                try:
+                    worker.convert(input_path, output_path, filter_name, timeout)
+                    break
+                except SofficeTimeout:
+                    raise subprocess.TimeoutExpired(SOFFICE_BIN, timeout)
+                except FileNotFoundError:
+                    raise  # soffice is not installed
+                except Exception as e:
+                    if attempt == 0 and not worker.alive():
+                        print(f"soffice worker {worker.index} crashed, restarting")
+                        worker.kill()
+                        continue
+                    raise RuntimeError(str(e)) from e
+        finally:
+            self._idle.put(worker)
+
+        if not Path(output_path).exists():
+            raise RuntimeError(f"soffice produced no {Path(output_path).name}")
+
+    def close(self):
+        """Stop every worker."""
+        with self._lock:
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
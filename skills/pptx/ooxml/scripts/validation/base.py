@@ -2,11 +2,33 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import io
 import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import lxml.etree
 
+# Compiled XSD schemas keyed by resolved schema path. Module level so the
+# compiled schemas stay warm across validator instances in the same process.
+_compiled_schemas = {}
+
+# Validator owned by an XSD worker process (see BaseSchemaValidator.jobs)
+_xsd_worker_validator = None
+
+
+def _xsd_worker_init(validator_cls, unpacked_dir, original_file):
+    """Build the worker's own validator, with its own part and schema caches."""
+    global _xsd_worker_validator
+    _xsd_worker_validator = validator_cls(unpacked_dir, original_file)
+
+
+def _xsd_worker(xml_file):
+    """Validate one part against its schema inside a worker process."""
+    return _xsd_worker_validator.validate_file_against_xsd(xml_file)
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -103,10 +125,12 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
+    def __init__(self, unpacked_dir, original_file, verbose=False, jobs=1):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file)
         self.verbose = verbose
+        # Worker processes used for XSD validation (1 = validate in-process)
+        self.jobs = max(1, int(jobs or 1))
 
         # Set schemas directory
         self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
@@ -120,6 +144,34 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+        # Parsed parts, keyed by resolved path: ElementTree or the parse exception
+        self._documents = {}
+        # Result of the combined namespace/ID/relationship walk (see _scan_parts)
+        self._part_scan = None
+        # XML parts of the original package read into memory (see _get_original_parts)
+        self._original_parts = None
+        # XSD error sets of original parts, keyed by part name
+        self._original_errors = {}
+
+    def _get_document(self, xml_file):
+        """Return the parsed ElementTree for a part, parsing it at most once.
+
+        The returned tree is shared between all checks and must be treated as
+        read-only; passes that need to modify it work on a deep copy.
+        A part that failed to parse re-raises the same exception on every call.
+        """
+        key = Path(xml_file).resolve()
+        doc = self._documents.get(key)
+        if doc is None:
+            try:
+                doc = lxml.etree.parse(str(key))
+            except Exception as e:
+                doc = e
+            self._documents[key] = doc
+        if isinstance(doc, Exception):
+            raise doc
+        return doc
+
     def validate(self):
         """Run all validation checks and return True if all pass."""
         raise NotImplementedError("Subclasses must implement the validate method")
@@ -131,7 +183,7 @@ class BaseSchemaValidator:
         for xml_file in self.xml_files:
             try:
                 # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
+                self._get_document(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -155,24 +207,7 @@ class BaseSchemaValidator:
 
     def validate_namespaces(self):
         """Validate that namespace prefixes in Ignorable attributes are declared."""
-        errors = []
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
-
-                for attr_val in [
-                    v for k, v in root.attrib.items() if k.endswith("Ignorable")
-                ]:
-                    undeclared = set(attr_val.split()) - declared
-                    errors.extend(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Namespace '{ns}' in Ignorable but not declared"
-                        for ns in undeclared
-                    )
-            except lxml.etree.XMLSyntaxError:
-                continue
+        errors = self._scan_parts()["namespaces"]
 
         if errors:
             print(f"FAILED - {len(errors)} namespace issues:")
@@ -185,84 +220,7 @@ class BaseSchemaValidator:
 
     def validate_unique_ids(self):
         """Validate that specific IDs are unique according to OOXML requirements."""
-        errors = []
-        global_ids = {}  # Track globally unique IDs across all files
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  # Track IDs that must be unique within this file
-
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                # Now check IDs in the cleaned tree
-                for elem in root.iter():
-                    # Get the element name without namespace
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
-                    )
-
-                    # Check if this element type has ID uniqueness requirements
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # Look for the specified attribute
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # Check global uniqueness
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # Check file-level uniqueness
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._scan_parts()["unique_ids"]
 
         if errors:
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
@@ -274,6 +232,137 @@ class BaseSchemaValidator:
                 print("PASSED - All required IDs are unique")
             return True
 
+    def _scan_parts(self):
+        """Walk every part once and collect namespace, ID and r:id errors.
+
+        validate_namespaces, validate_unique_ids and validate_all_relationship_ids
+        all report from this result, so each tree is traversed a single time
+        no matter how many of those checks a validator runs.
+
+        Returns:
+            dict: error lists keyed by "namespaces", "unique_ids" and
+            "relationship_ids"
+        """
+        if self._part_scan is not None:
+            return self._part_scan
+
+        namespace_errors = []
+        id_errors = []
+        rid_errors = []
+        global_ids = {}  # Track globally unique IDs across all files
+        alternate_content_tag = f"{{{self.MC_NAMESPACE}}}AlternateContent"
+        rid_attr_name = f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id"
+
+        for xml_file in self.xml_files:
+            rel_path = xml_file.relative_to(self.unpacked_dir)
+
+            # Relationship IDs declared for this part (None = no r:id check)
+            rid_to_type = None
+            if xml_file.suffix != ".rels":
+                # For dir/file.xml, the .rels file is dir/_rels/file.xml.rels
+                rels_file = xml_file.parent / "_rels" / f"{xml_file.name}.rels"
+                if rels_file.exists():
+                    try:
+                        rid_to_type = self._read_relationship_ids(
+                            rels_file, rid_errors
+                        )
+                    except Exception as e:
+                        rid_errors.append(f"  Error processing {rel_path}: {e}")
+
+            try:
+                root = self._get_document(xml_file).getroot()
+            except Exception as e:
+                id_errors.append(f"  {rel_path}: Error: {e}")
+                if rid_to_type is not None:
+                    rid_errors.append(f"  Error processing {rel_path}: {e}")
+                continue
+
+            # Namespace prefixes in Ignorable attributes must be declared
+            declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
+            for attr_val in [
+                v for k, v in root.attrib.items() if k.endswith("Ignorable")
+            ]:
+                undeclared = set(attr_val.split()) - declared
+                namespace_errors.extend(
+                    f"  {rel_path}: Namespace '{ns}' in Ignorable but not declared"
+                    for ns in undeclared
+                )
+
+            # IDs inside mc:AlternateContent are ignored for uniqueness, but
+            # still have to resolve as relationship references
+            alternate_content = set()
+            for mc_elem in root.iter(alternate_content_tag):
+                alternate_content.update(mc_elem.iter())
+
+            file_ids = {}  # Track IDs that must be unique within this file
+
+            for elem in root.iter():
+                # Skip comments and processing instructions
+                if callable(elem.tag):
+                    continue
+
+                if elem not in alternate_content:
+                    self._check_unique_id(
+                        elem, rel_path, file_ids, global_ids, id_errors
+                    )
+
+                if rid_to_type is None:
+                    continue
+                rid_attr = elem.get(rid_attr_name)
+                if rid_attr:
+                    self._check_relationship_id(
+                        elem, rid_attr, rid_to_type, rel_path, rid_errors
+                    )
+
+        self._part_scan = {
+            "namespaces": namespace_errors,
+            "unique_ids": id_errors,
+            "relationship_ids": rid_errors,
+        }
+        return self._part_scan
+
+    def _check_unique_id(self, elem, rel_path, file_ids, global_ids, errors):
+        """Record elem's ID and report it if it breaks a uniqueness requirement."""
+        # Get the element name without namespace
+        tag = elem.tag.split("}")[-1].lower()
+
+        # Check if this element type has ID uniqueness requirements
+        if tag not in self.UNIQUE_ID_REQUIREMENTS:
+            return
+        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
+
+        # Look for the specified attribute
+        id_value = None
+        for attr, value in elem.attrib.items():
+            if attr.split("}")[-1].lower() == attr_name:
+                id_value = value
+                break
+        if id_value is None:
+            return
+
+        if scope == "global":
+            # Check global uniqueness
+            if id_value in global_ids:
+                prev_file, prev_line, prev_tag = global_ids[id_value]
+                errors.append(
+                    f"  {rel_path}: "
+                    f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
+                    f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
+                )
+            else:
+                global_ids[id_value] = (rel_path, elem.sourceline, tag)
+        elif scope == "file":
+            # Check file-level uniqueness
+            seen = file_ids.setdefault((tag, attr_name), {})
+            if id_value in seen:
+                errors.append(
+                    f"  {rel_path}: "
+                    f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                    f"(first occurrence at line {seen[id_value]})"
+                )
+            else:
+                seen[id_value] = elem.sourceline
+
     def validate_file_references(self):
         """
         Validate that all .rels files properly reference files and that all files are referenced.
@@ -310,7 +399,7 @@ class BaseSchemaValidator:
         for rels_file in rels_files:
             try:
                 # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._get_document(rels_file).getroot()
 
                 # Get the directory where this .rels file is located
                 rels_dir = rels_file.parent
@@ -390,87 +479,7 @@ class BaseSchemaValidator:
         Validate that all r:id attributes in XML files reference existing IDs
         in their corresponding .rels files, and optionally validate relationship types.
         """
-        import lxml.etree
-
-        errors = []
-
-        # Process each XML file that might contain r:id references
-        for xml_file in self.xml_files:
-            # Skip .rels files themselves
-            if xml_file.suffix == ".rels":
-                continue
-
-            # Determine the corresponding .rels file
-            # For dir/file.xml, it's dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
-
-            # Skip if there's no corresponding .rels file (that's okay)
-            if not rels_file.exists():
-                continue
-
-            try:
-                # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
-
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        # Check for duplicate rIds
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
-                                f"Duplicate relationship ID '{rid}' (IDs must be unique)"
-                            )
-                        # Extract just the type name from the full URL
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all elements with r:id attributes
-                for elem in xml_root.iter():
-                    # Check for r:id attribute (relationship ID)
-                    rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
-                    if rid_attr:
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-                        )
-
-                        # Check if the ID exists
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
-                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        # Check if we have type expectations for this element
-                        elif self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
-                            )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                # Check if the actual type matches or contains the expected type
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
-                                        f"but should point to a '{expected_type}' relationship"
-                                    )
-
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error processing {xml_rel_path}: {e}")
+        errors = self._scan_parts()["relationship_ids"]
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
@@ -483,6 +492,57 @@ class BaseSchemaValidator:
                 print("PASSED - All relationship ID references are valid")
             return True
 
+    def _read_relationship_ids(self, rels_file, errors):
+        """Map each relationship Id in a .rels file to its short type name.
+
+        Duplicate Ids are reported into errors.
+        """
+        rels_root = self._get_document(rels_file).getroot()
+        rid_to_type = {}
+
+        for rel in rels_root.findall(
+            f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+        ):
+            rid = rel.get("Id")
+            rel_type = rel.get("Type", "")
+            if rid:
+                # Check for duplicate rIds
+                if rid in rid_to_type:
+                    rels_rel_path = rels_file.relative_to(self.unpacked_dir)
+                    errors.append(
+                        f"  {rels_rel_path}: Line {rel.sourceline}: "
+                        f"Duplicate relationship ID '{rid}' (IDs must be unique)"
+                    )
+                # Extract just the type name from the full URL
+                type_name = rel_type.split("/")[-1] if "/" in rel_type else rel_type
+                rid_to_type[rid] = type_name
+
+        return rid_to_type
+
+    def _check_relationship_id(self, elem, rid_attr, rid_to_type, rel_path, errors):
+        """Report an r:id that is missing from the .rels file or has the wrong type."""
+        elem_name = elem.tag.split("}")[-1]
+
+        # Check if the ID exists
+        if rid_attr not in rid_to_type:
+            errors.append(
+                f"  {rel_path}: Line {elem.sourceline}: "
+                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
+                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
+            )
+        # Check if we have type expectations for this element
+        elif self.ELEMENT_RELATIONSHIP_TYPES:
+            expected_type = self._get_expected_relationship_type(elem_name)
+            if expected_type:
+                actual_type = rid_to_type[rid_attr]
+                # Check if the actual type matches or contains the expected type
+                if expected_type not in actual_type.lower():
+                    errors.append(
+                        f"  {rel_path}: Line {elem.sourceline}: "
+                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
+                        f"but should point to a '{expected_type}' relationship"
+                    )
+
     def _get_expected_relationship_type(self, element_name):
         """
         Get the expected relationship type for an element.
@@ -531,7 +591,7 @@ class BaseSchemaValidator:
 
         try:
             # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self._get_document(content_types_file).getroot()
             declared_parts = set()
             declared_extensions = set()
 
@@ -593,7 +653,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._get_document(xml_file).getroot().tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -673,7 +733,7 @@ class BaseSchemaValidator:
             if verbose:
                 relative_path = xml_file.relative_to(unpacked_dir)
                 print(f"FAILED - {relative_path}: {len(new_errors)} new error(s)")
-                for error in list(new_errors)[:3]:
+                for error in sorted(new_errors)[:3]:
                     truncated = error[:250] + "..." if len(error) > 250 else error
                     print(f"  - {truncated}")
             return False, new_errors
@@ -692,11 +752,10 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        for xml_file, (is_valid, new_file_errors) in zip(
+            self.xml_files, self._run_xsd_checks()
+        ):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -712,7 +771,7 @@ class BaseSchemaValidator:
 
             # Has new errors
             new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  # Show first 3 errors
+            for error in sorted(new_file_errors)[:3]:  # Show first 3 errors
                 new_errors.append(
                     f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
                 )
@@ -738,6 +797,45 @@ class BaseSchemaValidator:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _run_xsd_checks(self):
+        """Run validate_file_against_xsd for every part, in self.xml_files order.
+
+        With jobs > 1 the parts that have a schema are spread over a process
+        pool. Each worker keeps its own parsed-part and compiled-schema caches,
+        and results come back in submission order, so the report is identical
+        to a serial run.
+        """
+        if self.jobs <= 1:
+            return [
+                self.validate_file_against_xsd(xml_file, verbose=False)
+                for xml_file in self.xml_files
+            ]
+
+        results = [(None, set())] * len(self.xml_files)
+        pending = [
+            i
+            for i, xml_file in enumerate(self.xml_files)
+            if self._get_schema_path(xml_file)
+        ]
+        if not pending:
+            return results
+
+        workers = min(self.jobs, len(pending))
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_xsd_worker_init,
+            initargs=(type(self), self.unpacked_dir, self.original_file),
+        ) as pool:
+            checked = pool.map(
+                _xsd_worker,
+                [self.xml_files[i] for i in pending],
+                chunksize=chunksize,
+            )
+            for i, result in zip(pending, checked):
+                results[i] = result
+        return results
+
     def _get_schema_path(self, xml_file):
         """Determine the appropriate schema path for an XML file."""
         # Check exact filename match
@@ -823,6 +921,25 @@ class BaseSchemaValidator:
 
         return xml_doc
 
+    def _get_schema(self, schema_path):
+        """Return the compiled XMLSchema for schema_path, compiling it only once.
+
+        The main schemas pull in dozens of imported XSDs, so compiling is far
+        more expensive than validating a part; the result is reused for every
+        part (and every original part) mapped to the same schema.
+        """
+        key = Path(schema_path).resolve()
+        schema = _compiled_schemas.get(key)
+        if schema is None:
+            with open(key, "rb") as xsd_file:
+                parser = lxml.etree.XMLParser()
+                xsd_doc = lxml.etree.parse(
+                    xsd_file, parser=parser, base_url=str(schema_path)
+                )
+                schema = lxml.etree.XMLSchema(xsd_doc)
+            _compiled_schemas[key] = schema
+        return schema
+
     def _validate_single_file_xsd(self, xml_file, base_path):
         """Validate a single XML file against XSD schema. Returns (is_valid, errors_set)."""
         schema_path = self._get_schema_path(xml_file)
@@ -830,23 +947,32 @@ class BaseSchemaValidator:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            # Parts of the package under validation come from the shared cache
+            if Path(xml_file).resolve().is_relative_to(self.unpacked_dir):
+                xml_doc = self._get_document(xml_file)
+            else:
+                xml_doc = lxml.etree.parse(str(xml_file))
+        except Exception as e:
+            return False, {str(e)}
+
+        return self._validate_xsd_document(
+            xml_doc, schema_path, xml_file.relative_to(base_path)
+        )
+
+    def _validate_xsd_document(self, xml_doc, schema_path, relative_path):
+        """Validate a parsed part against its schema. Returns (is_valid, errors_set).
 
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+        xml_doc is not modified; the template-tag pass works on a copy.
+        """
+        try:
+            # Load schema
+            schema = self._get_schema(schema_path)
 
+            # Preprocess XML
             xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
             xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
 
             # Clean ignorable namespaces if needed
-            relative_path = xml_file.relative_to(base_path)
             if (
                 relative_path.parts
                 and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
@@ -866,6 +992,23 @@ class BaseSchemaValidator:
         except Exception as e:
             return False, {str(e)}
 
+    def _get_original_parts(self):
+        """Read the XML and .rels parts of the original file into memory.
+
+        The archive is opened once per validator; nothing is extracted to disk.
+
+        Returns:
+            dict: part name (e.g. 'ppt/slides/slide1.xml') -> raw bytes
+        """
+        if self._original_parts is None:
+            parts = {}
+            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
+                for info in zip_ref.infolist():
+                    if not info.is_dir() and info.filename.endswith((".xml", ".rels")):
+                        parts[info.filename] = zip_ref.read(info)
+            self._original_parts = parts
+        return self._original_parts
+
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
@@ -875,33 +1018,31 @@ class BaseSchemaValidator:
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
         # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
+        part_name = relative_path.as_posix()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
-
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
+        if part_name in self._original_errors:
+            return self._original_errors[part_name]
 
-            if not original_xml_file.exists():
-                # File didn't exist in original, so no original errors
-                return set()
+        errors = set()
+        data = self._get_original_parts().get(part_name)
+        schema_path = self._get_schema_path(relative_path)
+        # A part that didn't exist in the original has no original errors
+        if data is not None and schema_path:
+            try:
+                xml_doc = lxml.etree.parse(io.BytesIO(data))
+            except Exception as e:
+                errors = {str(e)}
+            else:
+                _, errors = self._validate_xsd_document(
+                    xml_doc, schema_path, relative_path
+                )
 
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        self._original_errors[part_name] = errors
+        return errors
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         """Remove template tags from XML text nodes and collect warnings.
@@ -917,8 +1058,7 @@ class BaseSchemaValidator:
         template_pattern = re.compile(r"\{\{[^}]*\}\}")
 
         # Create a copy of the document to avoid modifying the original
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+        xml_copy = copy.deepcopy(xml_doc.getroot())
 
         def process_text_content(text, content_type):
             if not text:
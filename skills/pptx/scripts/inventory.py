@@ -23,9 +23,12 @@ Usage:
 """
 
 import argparse
+import functools
 import json
 import platform
 import sys
+import unicodedata
+import weakref
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -46,6 +49,15 @@ InventoryData = Dict[
 ]  # Dict of slide_id -> {shape_id -> ShapeData}
 InventoryDict = Dict[str, Dict[str, ShapeDict]]  # JSON-serializable inventory
 
+# Number of loaded (font file, size) pairs kept for text measurement
+FONT_CACHE_SIZE = 64
+
+# Per-font measurement caches used by ShapeData._wrap_text_line:
+# font -> {"words": {word: width}, "pairs": {(last, first): kerning correction}}
+_text_width_cache: "weakref.WeakKeyDictionary[Any, Dict[str, Dict]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def main():
     """Main entry point for command-line usage."""
@@ -263,6 +275,45 @@ class ParagraphData:
         return result
 
 
+@functools.lru_cache(maxsize=None)
+def _list_font_dir(font_dir: str) -> Tuple[Tuple[str, str], ...]:
+    """List the files of a font directory once, as (lowercase name, path) pairs."""
+    try:
+        return tuple(
+            (file_path.name.lower(), str(file_path))
+            for file_path in Path(font_dir).iterdir()
+            if file_path.is_file()
+        )
+    except (OSError, PermissionError):
+        return ()
+
+
+def load_font(font_name: str, font_size: int) -> Any:
+    """Load a font for text measurement, falling back to PIL's default font."""
+    return _load_font_file(ShapeData.get_font_path(font_name), font_size)
+
+
+@functools.lru_cache(maxsize=FONT_CACHE_SIZE)
+def _load_font_file(font_path: Optional[str], font_size: int) -> Any:
+    """Open a font face once per (font file, size) and keep it in an LRU cache."""
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size=font_size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+def _needs_shaping(text: str) -> bool:
+    """Check whether text contains characters whose width depends on context."""
+    return any(
+        0x0590 <= ord(char) <= 0x1CFF  # Hebrew, Arabic ... Indic, Thai, Myanmar
+        or 0xA800 <= ord(char) <= 0xABFF  # Further Indic/SE Asian blocks
+        or unicodedata.combining(char)
+        for char in text
+    )
+
+
 class ShapeData:
     """Data structure for shape properties extracted from a PowerPoint shape."""
 
@@ -277,9 +328,12 @@ class ShapeData:
         return int(inches * dpi)
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_font_path(font_name: str) -> Optional[str]:
         """Get the font file path for a given font name.
 
+        Lookups are cached per font name for the life of the process.
+
         Args:
             font_name: Name of the font (e.g., 'Arial', 'Calibri')
 
@@ -313,8 +367,6 @@ class ShapeData:
             extensions = [".ttf", ".otf"]
 
         # Try to find the font file
-        from pathlib import Path
-
         for font_dir in font_dirs:
             font_dir_path = Path(font_dir).expanduser()
             if not font_dir_path.exists():
@@ -328,17 +380,12 @@ class ShapeData:
                         return str(font_path)
 
             # Then try fuzzy matching - find files containing the font name
-            try:
-                for file_path in font_dir_path.iterdir():
-                    if file_path.is_file():
-                        file_name_lower = file_path.name.lower()
-                        font_name_lower = font_name.lower().replace(" ", "")
-                        if font_name_lower in file_name_lower and any(
-                            file_name_lower.endswith(ext) for ext in extensions
-                        ):
-                            return str(file_path)
-            except (OSError, PermissionError):
-                continue
+            font_name_lower = font_name.lower().replace(" ", "")
+            for file_name_lower, file_path in _list_font_dir(str(font_dir_path)):
+                if font_name_lower in file_name_lower and any(
+                    file_name_lower.endswith(ext) for ext in extensions
+                ):
+                    return file_path
 
         return None
 
@@ -532,7 +579,15 @@ class ShapeData:
         )
 
     def _wrap_text_line(self, line: str, max_width_px: int, draw, font) -> List[str]:
-        """Wrap a single line of text to fit within max_width_px."""
+        """Wrap a single line of text to fit within max_width_px.
+
+        Word widths are measured once per font and reused, and each candidate
+        line's width is built up incrementally instead of re-measuring the
+        whole line for every word. The kerning across each joining space is
+        measured once per character pair, so the result matches measuring
+        every candidate line with PIL. Lines in scripts that need shaping
+        (Arabic, Indic, combining marks, ...) are always measured by PIL.
+        """
         if not line:
             return [""]
 
@@ -541,6 +596,64 @@ class ShapeData:
             return [line]
 
         # Need to wrap - split into words
+        if _needs_shaping(line):
+            return self._wrap_text_line_exact(line, max_width_px, draw, font)
+
+        cache = _text_width_cache.setdefault(font, {"words": {}, "pairs": {}})
+        word_widths = cache["words"]
+        pair_widths = cache["pairs"]
+
+        def width_of(text):
+            width = word_widths.get(text)
+            if width is None:
+                width = word_widths[text] = draw.textlength(text, font=font)
+            return width
+
+        def joint_width(last, first):
+            # Width of "<last> <first>" minus the widths of its parts: the
+            # space itself plus any kerning against its neighbours
+            key = (last, first)
+            width = pair_widths.get(key)
+            if width is None:
+                width = pair_widths[key] = (
+                    draw.textlength(f"{last} {first}", font=font)
+                    - width_of(last)
+                    - width_of(first)
+                )
+            return width
+
+        wrapped = []
+        words = line.split(" ")
+        current_line = ""
+        current_width = 0.0
+
+        for word in words:
+            if current_line:
+                test_width = (
+                    current_width
+                    + joint_width(current_line[-1], word[:1])
+                    + width_of(word)
+                )
+            else:
+                test_width = width_of(word)
+            if test_width <= max_width_px:
+                current_line = current_line + (" " if current_line else "") + word
+                current_width = test_width
+            else:
+                if current_line:
+                    wrapped.append(current_line)
+                current_line = word
+                current_width = width_of(word)
+
+        if current_line:
+            wrapped.append(current_line)
+
+        return wrapped
+
+    def _wrap_text_line_exact(
+        self, line: str, max_width_px: int, draw, font
+    ) -> List[str]:
+        """Wrap a line by measuring every candidate line with PIL."""
         wrapped = []
         words = line.split(" ")
         current_line = ""
@@ -593,15 +706,7 @@ class ShapeData:
             font_name = para_data.font_name or "Arial"
             font_size = int(para_data.font_size or default_font_size)
 
-            font = None
-            font_path = self.get_font_path(font_name)
-            if font_path:
-                try:
-                    font = ImageFont.truetype(font_path, size=font_size)
-                except Exception:
-                    font = ImageFont.load_default()
-            else:
-                font = ImageFont.load_default()
+            font = load_font(font_name, font_size)
 
             # Wrap all lines in this paragraph
             all_wrapped_lines = []
@@ -20,6 +20,7 @@ Grid limits by column count:
 
 Usage:
     python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders]
+                        [--no-cache]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -38,18 +39,32 @@ Examples:
 
     python thumbnail.py template.pptx analysis --outline-placeholders
     # Creates thumbnail grids with red outlines around text placeholders
+
+Rendered slides are cached (default ~/.cache/pptx-thumbnails, override with
+PPTX_THUMBNAIL_CACHE) under a hash of each slide's XML and every part it
+pulls in (layout, master, theme, media). Re-running on an edited deck only
+renders the slides whose content changed. The cache is capped at
+PPTX_THUMBNAIL_CACHE_MB (default 200) by evicting the least recently used
+renders.
 """
 
 import argparse
+import hashlib
+import os
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from inventory import extract_text_inventory
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
 
+# The soffice worker pool is shared with ooxml/scripts/pack.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ooxml" / "scripts"))
+from soffice import convert_document  # noqa: E402
+
 # Constants
 THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
 CONVERSION_DPI = 100  # DPI for PDF to image conversion
@@ -62,6 +77,20 @@ GRID_PADDING = 20  # Padding between thumbnails
 BORDER_WIDTH = 2  # Border width around thumbnails
 FONT_SIZE_RATIO = 0.12  # Font size as fraction of thumbnail width
 LABEL_PADDING_RATIO = 0.4  # Label padding as fraction of font size
+TILE_WORKERS = min(8, os.cpu_count() or 1)  # Threads decoding/scaling slide images
+
+# Rendered slide cache
+CACHE_DIR = Path(
+    os.environ.get(
+        "PPTX_THUMBNAIL_CACHE", Path.home() / ".cache" / "pptx-thumbnails"
+    )
+)
+CACHE_VERSION = "1"  # Bump to invalidate cached renders
+# Least recently used renders are pruned once the cache grows past this
+CACHE_MAX_MB = float(os.environ.get("PPTX_THUMBNAIL_CACHE_MB", "200"))
+NOTES_SLIDE_RELTYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide"
+)
 
 
 def main():
@@ -86,6 +115,11 @@ def main():
         action="store_true",
         help="Outline text placeholders with a colored border",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Render every slide instead of reusing cached renders",
+    )
 
     args = parser.parse_args()
 
@@ -119,7 +153,12 @@ def main():
                     print(f"Found placeholders on {len(placeholder_regions)} slides")
 
             # Convert slides to images
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
+            slide_images = convert_to_images(
+                input_path,
+                Path(temp_dir),
+                CONVERSION_DPI,
+                cache_dir=None if args.no_cache else CACHE_DIR,
+            )
             if not slide_images:
                 print("Error: No slides found")
                 sys.exit(1)
@@ -194,8 +233,61 @@ def get_placeholder_regions(pptx_path):
     return placeholder_regions, (slide_width_inches, slide_height_inches)
 
 
-def convert_to_images(pptx_path, temp_dir, dpi):
-    """Convert PowerPoint to images via PDF, handling hidden slides."""
+def get_slide_cache_keys(prs, dpi):
+    """Compute a render cache key for every slide.
+
+    The key hashes the slide part and every part reachable from it through
+    relationships (layout, master, theme, images, charts, ...), so a slide is
+    only considered unchanged if everything that affects its rendering is.
+    Notes are skipped since they are not rendered.
+    """
+    part_digests = {}  # Shared parts (masters, themes) are hashed once
+
+    def part_digest(part):
+        digest = part_digests.get(part.partname)
+        if digest is None:
+            digest = hashlib.sha256(part.blob).hexdigest()
+            part_digests[part.partname] = digest
+        return digest
+
+    slide_size = f"{prs.slide_width}x{prs.slide_height}"
+    keys = []
+    for idx, slide in enumerate(prs.slides):
+        seen = {}
+        external = []
+        stack = [slide.part]
+        while stack:
+            part = stack.pop()
+            if part.partname in seen:
+                continue
+            seen[part.partname] = part_digest(part)
+            for rel in part.rels.values():
+                if rel.reltype == NOTES_SLIDE_RELTYPE:
+                    continue
+                if rel.is_external:
+                    external.append(rel.target_ref)
+                else:
+                    stack.append(rel.target_part)
+
+        h = hashlib.sha256()
+        h.update(f"{CACHE_VERSION}|{dpi}|{slide_size}".encode())
+        # Slide number fields render the slide's position
+        if b'type="slidenum"' in slide.part.blob:
+            h.update(f"|slide {idx}".encode())
+        for partname in sorted(seen):
+            h.update(f"|{partname}={seen[partname]}".encode())
+        for target in sorted(external):
+            h.update(f"|{target}".encode())
+        keys.append(h.hexdigest())
+    return keys
+
+
+def convert_to_images(pptx_path, temp_dir, dpi, cache_dir=None):
+    """Convert PowerPoint to images via PDF, handling hidden slides.
+
+    With cache_dir set, slides whose cache key already has a rendered image
+    are reused and only the remaining slides are sent through soffice.
+    """
     # Detect hidden slides
     print("Analyzing presentation...")
     prs = Presentation(str(pptx_path))
@@ -212,45 +304,41 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if hidden_slides:
         print(f"Hidden slides: {sorted(hidden_slides)}")
 
-    pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
-
-    # Convert to PDF
-    print("Converting to PDF...")
-    result = subprocess.run(
-        [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
-        ],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0 or not pdf_path.exists():
-        raise RuntimeError("PDF conversion failed")
-
-    # Convert PDF to images
-    print(f"Converting to images at {dpi} DPI...")
-    result = subprocess.run(
-        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
-        capture_output=True,
-        text=True,
-    )
-    if result.returncode != 0:
-        raise RuntimeError("Image conversion failed")
-
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
+    visible_slides = [n for n in range(1, total_slides + 1) if n not in hidden_slides]
+
+    # Look up cached renders
+    slide_images = {}  # slide_num -> image path
+    cache_keys = {}
+    if cache_dir:
+        cache_dir = Path(cache_dir)
+        keys = get_slide_cache_keys(prs, dpi)
+        for slide_num in visible_slides:
+            cache_keys[slide_num] = keys[slide_num - 1]
+            cached = cache_dir / f"{cache_keys[slide_num]}.jpg"
+            if cached.exists():
+                slide_images[slide_num] = cached
+                touch_cached_image(cached)
+        if slide_images:
+            print(f"Reusing {len(slide_images)} cached slide image(s)")
+
+    to_render = [n for n in visible_slides if n not in slide_images]
+    if to_render:
+        rendered = render_slides(pptx_path, prs, temp_dir, dpi, to_render)
+        for slide_num, image_path in zip(to_render, rendered):
+            slide_images[slide_num] = image_path
+            if cache_dir:
+                store_cached_image(image_path, cache_dir, cache_keys[slide_num])
+        if cache_dir:
+            # Never evict renders this run still reads
+            in_use = {f"{key}.jpg" for key in cache_keys.values()}
+            prune_cache(cache_dir, int(CACHE_MAX_MB * 1024 * 1024), keep=in_use)
 
     # Create full list with placeholders for hidden slides
     all_images = []
-    visible_idx = 0
 
     # Get placeholder dimensions from first visible slide
-    if visible_images:
-        with Image.open(visible_images[0]) as img:
+    if slide_images:
+        with Image.open(slide_images[min(slide_images)]) as img:
             placeholder_size = img.size
     else:
         placeholder_size = (1920, 1080)
@@ -262,15 +350,90 @@ def convert_to_images(pptx_path, temp_dir, dpi):
             placeholder_img = create_hidden_slide_placeholder(placeholder_size)
             placeholder_img.save(placeholder_path, "JPEG")
             all_images.append(placeholder_path)
-        else:
+        elif slide_num in slide_images:
             # Use the actual visible slide image
-            if visible_idx < len(visible_images):
-                all_images.append(visible_images[visible_idx])
-                visible_idx += 1
+            all_images.append(slide_images[slide_num])
 
     return all_images
 
 
+def render_slides(pptx_path, prs, temp_dir, dpi, slide_nums):
+    """Render the given visible slides (1-based) to JPEGs, in slide order."""
+    source_path = pptx_path
+    if len(slide_nums) < len(prs.slides):
+        # Hide every slide that doesn't need rendering in a temporary copy;
+        # soffice skips hidden slides and slide numbers stay correct
+        wanted = set(slide_nums)
+        for idx, slide in enumerate(prs.slides):
+            if idx + 1 not in wanted:
+                slide.element.set("show", "0")
+        source_path = temp_dir / f"{pptx_path.stem}.pptx"
+        prs.save(str(source_path))
+
+    # Convert to PDF
+    print(f"Converting {len(slide_nums)} slide(s) to PDF...")
+    try:
+        pdf_path = convert_document(source_path, temp_dir, "pdf")
+    except RuntimeError:
+        raise RuntimeError("PDF conversion failed")
+
+    # Convert PDF to images
+    print(f"Converting to images at {dpi} DPI...")
+    result = subprocess.run(
+        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError("Image conversion failed")
+
+    return sorted(temp_dir.glob("slide-*.jpg"))
+
+
+def store_cached_image(image_path, cache_dir, key):
+    """Copy a rendered slide into the cache without exposing partial files."""
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_dir / f".{key}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(Path(image_path).read_bytes())
+        os.replace(tmp_path, cache_dir / f"{key}.jpg")
+    except OSError as e:
+        print(f"Warning: Could not cache slide image: {e}")
+
+
+def touch_cached_image(path):
+    """Mark a cached render as recently used (mtime; atime is often not updated)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_cache(cache_dir, max_bytes, keep=()):
+    """Delete the least recently used renders (except names in keep) until the cache fits in max_bytes."""
+    entries = []
+    for path in cache_dir.glob("*.jpg"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if path.name in keep:
+            continue
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+
+
 def create_grids(
     image_paths,
     cols,
@@ -352,8 +515,18 @@ def create_grid(
         # Fall back to basic default font if size parameter not supported
         font = ImageFont.load_default()
 
+    # Decode and scale every slide image in parallel (PIL releases the GIL
+    # while decoding and resampling), then assemble the grid from the tiles
+    def load(i):
+        slide_num = start_slide_num + i
+        regions = placeholder_regions.get(slide_num) if placeholder_regions else None
+        return load_tile(image_paths[i], width, height, regions, slide_dimensions)
+
+    with ThreadPoolExecutor(max_workers=TILE_WORKERS) as pool:
+        tiles = list(pool.map(load, range(len(image_paths))))
+
     # Place thumbnails
-    for i, img_path in enumerate(image_paths):
+    for i, img in enumerate(tiles):
         row, col = i // cols, i % cols
         x = col * width + (col + 1) * GRID_PADDING
         y_base = (
@@ -374,76 +547,89 @@ def create_grid(
         # Add thumbnail below label with proportional spacing
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
-        with Image.open(img_path) as img:
-            # Get original dimensions before thumbnail
-            orig_w, orig_h = img.size
+        w, h = img.size
+        tx = x + (width - w) // 2
+        ty = y_thumbnail + (height - h) // 2
+        grid.paste(img, (tx, ty))
+
+        # Add border
+        if BORDER_WIDTH > 0:
+            draw.rectangle(
+                [
+                    (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
+                    (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
+                ],
+                outline="gray",
+                width=BORDER_WIDTH,
+            )
 
-            # Apply placeholder outlines if enabled
-            if placeholder_regions and (start_slide_num + i) in placeholder_regions:
-                # Convert to RGBA for transparency support
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
+    return grid
 
-                # Get the regions for this slide
-                regions = placeholder_regions[start_slide_num + i]
 
-                # Calculate scale factors using actual slide dimensions
-                if slide_dimensions:
-                    slide_width_inches, slide_height_inches = slide_dimensions
-                else:
-                    # Fallback: estimate from image size at CONVERSION_DPI
-                    slide_width_inches = orig_w / CONVERSION_DPI
-                    slide_height_inches = orig_h / CONVERSION_DPI
-
-                x_scale = orig_w / slide_width_inches
-                y_scale = orig_h / slide_height_inches
-
-                # Create a highlight overlay
-                overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
-                overlay_draw = ImageDraw.Draw(overlay)
-
-                # Highlight each placeholder region
-                for region in regions:
-                    # Convert from inches to pixels in the original image
-                    px_left = int(region["left"] * x_scale)
-                    px_top = int(region["top"] * y_scale)
-                    px_width = int(region["width"] * x_scale)
-                    px_height = int(region["height"] * y_scale)
-
-                    # Draw highlight outline with red color and thick stroke
-                    # Using a bright red outline instead of fill
-                    stroke_width = max(
-                        5, min(orig_w, orig_h) // 150
-                    )  # Thicker proportional stroke width
-                    overlay_draw.rectangle(
-                        [(px_left, px_top), (px_left + px_width, px_top + px_height)],
-                        outline=(255, 0, 0, 255),  # Bright red, fully opaque
-                        width=stroke_width,
-                    )
-
-                # Composite the overlay onto the image using alpha blending
-                img = Image.alpha_composite(img, overlay)
-                # Convert back to RGB for JPEG saving
-                img = img.convert("RGB")
-
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
-            w, h = img.size
-            tx = x + (width - w) // 2
-            ty = y_thumbnail + (height - h) // 2
-            grid.paste(img, (tx, ty))
-
-            # Add border
-            if BORDER_WIDTH > 0:
-                draw.rectangle(
-                    [
-                        (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
-                        (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
-                    ],
-                    outline="gray",
-                    width=BORDER_WIDTH,
+def load_tile(img_path, width, height, regions=None, slide_dimensions=None):
+    """Decode one slide image scaled to fit (width, height), with optional outlines.
+
+    JPEGs are decoded in draft mode at the smallest DCT scale that is still at
+    least twice the tile size, so full-resolution pixels are never produced
+    just to be thrown away by the resize.
+    """
+    with Image.open(img_path) as img:
+        # Get original dimensions before thumbnail
+        orig_w, orig_h = img.size
+
+        # Apply placeholder outlines if enabled (without outlines, thumbnail()
+        # below applies the same draft-mode decode itself)
+        if regions:
+            img.draft(None, (width * 2, height * 2))
+            img.load()
+            draft_scale = img.width / orig_w
+
+            # Convert to RGBA for transparency support
+            if img.mode != "RGBA":
+                img = img.convert("RGBA")
+
+            # Calculate scale factors using actual slide dimensions
+            if slide_dimensions:
+                slide_width_inches, slide_height_inches = slide_dimensions
+            else:
+                # Fallback: estimate from image size at CONVERSION_DPI
+                slide_width_inches = orig_w / CONVERSION_DPI
+                slide_height_inches = orig_h / CONVERSION_DPI
+
+            x_scale = img.width / slide_width_inches
+            y_scale = img.height / slide_height_inches
+
+            # Create a highlight overlay
+            overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
+            overlay_draw = ImageDraw.Draw(overlay)
+
+            # Thicker proportional stroke width, measured on the original image
+            stroke_width = max(
+                1, round(max(5, min(orig_w, orig_h) // 150) * draft_scale)
+            )
+
+            # Highlight each placeholder region
+            for region in regions:
+                # Convert from inches to pixels in the decoded image
+                px_left = int(region["left"] * x_scale)
+                px_top = int(region["top"] * y_scale)
+                px_width = int(region["width"] * x_scale)
+                px_height = int(region["height"] * y_scale)
+
+                # Draw highlight outline with red color and thick stroke
+                overlay_draw.rectangle(
+                    [(px_left, px_top), (px_left + px_width, px_top + px_height)],
+                    outline=(255, 0, 0, 255),  # Bright red, fully opaque
+                    width=stroke_width,
                 )
 
-    return grid
+            # Composite the overlay onto the image using alpha blending
+            img = Image.alpha_composite(img, overlay)
+            # Convert back to RGB for JPEG saving
+            img = img.convert("RGB")
+
+        img.thumbnail((width, height), Image.Resampling.LANCZOS)
+        return img
 
 
 if __name__ == "__main__":
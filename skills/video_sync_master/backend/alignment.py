@@ -3,12 +3,44 @@ import os
 import ffmpeg
 import os
 import tempfile
+import threading
+from collections import OrderedDict
 import numpy as np
+from time_stretch import stretch_to_duration, stretch_batch
+import media_io
 # Lazy imports: soundfile, librosa
 
+# ffprobe results by (path, size, mtime); a rewritten file gets a new key
+PROBE_CACHE_SIZE = 1024
+_probe_cache = OrderedDict()
+_probe_lock = threading.Lock()
+
+def probe_media(file_path):
+    """
+    media_io.probe (in-process, ffprobe fallback) with a cache shared by the whole backend,
+    so the same video or clip is probed once per version instead of once per call site.
+    Treat the result as read-only.
+    """
+    st = os.stat(file_path)
+    key = (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+    with _probe_lock:
+        if key in _probe_cache:
+            _probe_cache.move_to_end(key)
+            return _probe_cache[key]
+    probe = media_io.probe(file_path)
+    with _probe_lock:
+        _probe_cache[key] = probe
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return probe
+
 def get_audio_duration(file_path):
+    # WAV/FLAC (every TTS clip): read the header, no probe needed
+    duration = media_io.header_duration(file_path)
+    if duration is not None:
+        return duration
     try:
-        probe = ffmpeg.probe(file_path)
+        probe = probe_media(file_path)
         audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
         if audio_stream:
             return float(audio_stream['duration'])
@@ -20,21 +52,90 @@ def get_audio_duration(file_path):
 
 def align_audio(input_path, output_path, target_duration_sec):
     """
-    Time-stretch audio to match target duration using ffmpeg atempo.
+    Time-stretch audio to match target duration.
+    Stretches in-process (WSOLA, see time_stretch.py); formats soundfile can't
+    read or write go through ffmpeg atempo instead.
     :param input_path: Source audio file.
-    :param output_path: Destination audio file.
+    :param output_path: Destination audio file (may be input_path).
     :param target_duration_sec: Desired duration in seconds.
     :return: True if successful, False otherwise.
     """
+    if target_duration_sec <= 0:
+        print("Target duration must be positive.")
+        return False
+
+    try:
+        import soundfile as sf
+        y, sr = sf.read(input_path, dtype='float32', always_2d=True)
+        subtype = sf.info(input_path).subtype
+    except Exception as e:
+        print(f"In-process read failed ({e}), using ffmpeg atempo.")
+        return _align_audio_atempo(input_path, output_path, target_duration_sec)
+
+    print(f"Aligning: {len(y) / sr:.2f}s -> {target_duration_sec:.2f}s (Speed Factor: {len(y) / sr / target_duration_sec:.2f}x)")
+    try:
+        _write_audio(output_path, stretch_to_duration(y, sr, target_duration_sec), sr, subtype)
+    except Exception as e:
+        print(f"In-process stretch failed ({e}), using ffmpeg atempo.")
+        return _align_audio_atempo(input_path, output_path, target_duration_sec)
+    print(f"Aligned audio saved to {output_path}")
+    return True
+
+def fit_samples_to_slots(clips, sr, slot_durations, tolerance=0.1):
+    """
+    Compress, in memory and in one stretch_batch call, every clip that runs more than
+    `tolerance` seconds past its slot (a slot <= 0 or None leaves the clip alone).
+    :return: List of (samples, duration before fitting, whether they were stretched)
+    """
+    durations = [len(y) / sr for y in clips]
+    targets = [
+        slot if slot and slot > 0 and duration > slot + tolerance else None
+        for duration, slot in zip(durations, slot_durations)
+    ]
+    fitted = stretch_batch(clips, sr, targets)
+    return [(y, duration, target is not None) for y, duration, target in zip(fitted, durations, targets)]
+
+def fit_samples_to_slot(y, sr, slot_duration, tolerance=0.1):
+    """
+    Compress samples in memory if they run more than `tolerance` seconds past their slot.
+    :return: (samples, duration before fitting, whether they were stretched)
+    """
+    return fit_samples_to_slots([y], sr, [slot_duration], tolerance)[0]
+
+def fit_audio_to_slot(path, slot_duration, tolerance=0.1):
+    """
+    Compress a clip file if it runs more than `tolerance` seconds past its slot.
+    Reads the file once and takes the duration from the sample count (no probe); an
+    overrunning clip is rewritten through _write_audio. Clips fitted before their first
+    write (IndexTTS2 with a target_duration, see tts.py) are only read.
+    :return: (duration before fitting, whether the clip was stretched)
+    """
+    import soundfile as sf
+    y, sr = sf.read(path, dtype='float32', always_2d=True)
+    y, duration, aligned = fit_samples_to_slot(y, sr, slot_duration, tolerance)
+    if aligned:
+        _write_audio(path, y, sr, sf.info(path).subtype)
+    return duration, aligned
+
+def _write_audio(path, y, sr, subtype=None):
+    """Write via a temp file in the same directory, then replace (input and output may be the same file)."""
+    import soundfile as sf
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    try:
+        sf.write(tmp_path, y, sr, subtype=subtype)
+    except Exception:
+        # Subtype not valid for the output container: let soundfile pick its default
+        sf.write(tmp_path, y, sr)
+    os.replace(tmp_path, path)
+
+def _align_audio_atempo(input_path, output_path, target_duration_sec):
+    """ffmpeg atempo fallback for align_audio."""
     current_duration = get_audio_duration(input_path)
     if current_duration is None:
         print("Could not determine input audio duration.")
         return False
 
-    if target_duration_sec <= 0:
-        print("Target duration must be positive.")
-        return False
-
     speed_factor = current_duration / target_duration_sec
     print(f"Aligning: {current_duration:.2f}s -> {target_duration_sec:.2f}s (Speed Factor: {speed_factor:.2f}x)")
 
@@ -75,7 +176,8 @@ def merge_audios_to_video(video_path, audio_segments, output_path, strategy='aut
     This avoids the 'Argument list too long' (WinError 206) issue with ffmpeg complex filters.
     
     :param video_path: Path to original video.
-    :param audio_segments: List of dicts {'start': float, 'path': str}
+    :param audio_segments: List of dicts {'start': float, 'path': str}, optionally
+        'duration' (slot length) and 'audio_duration' (clip length, saves a probe)
     :param output_path: Path to save final video.
     """
     temp_mixed_path = None
@@ -90,7 +192,7 @@ def merge_audios_to_video(video_path, audio_segments, output_path, strategy='aut
 
         # 1. Get video duration to initialize the audio buffer
         try:
-            probe = ffmpeg.probe(video_path)
+            probe = probe_media(video_path)
             video_duration = float(probe['format']['duration'])
         except Exception as e:
             print(f"Error probing video duration: {e}")
@@ -178,18 +280,8 @@ def merge_audios_to_video(video_path, audio_segments, output_path, strategy='aut
         
         print("[PROGRESS] 50", flush=True)
 
-        # 4. Mux with original video using FFMPEG
-        input_video = ffmpeg.input(video_path)
-        input_audio = ffmpeg.input(temp_mixed_path)
-        
-        # Use video stream from original, audio from temp
-        v = input_video['v']
-        a = input_audio['a']
-        
-        # -c:v copy (fast), -c:a aac
-        stream = ffmpeg.output(v, a, output_path, vcodec='copy', acodec='aac', shortest=None)
-        
-        ffmpeg.run(stream, overwrite_output=True, quiet=False)
+        # 4. Mux with original video: video stream copied, mixed audio encoded to AAC
+        media_io.mux(video_path, temp_mixed_path, output_path, video_codec='copy', audio_codec='aac')
         print("[PROGRESS] 100", flush=True)
         print(f"Final video saved to {output_path}", flush=True)
         
@@ -259,7 +351,7 @@ def apply_rife_interpolation(input_path, output_path, target_duration):
         
     # Get info
     try:
-        probe = ffmpeg.probe(input_path)
+        probe = probe_media(input_path)
         video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
         orig_duration = float(probe['format']['duration'])
         # If duration is tiny, use video stream duration tag?
@@ -419,7 +511,8 @@ def merge_video_advanced(video_path, audio_segments, output_path, strategy):
                         print(f"Gap generation error: {e.stderr.decode() if e.stderr else str(e)}")
             
             # 2. Handle Segment
-            seg_audio_dur = get_audio_duration(seg_audio_path) or 0.1
+            # Callers that had the clip in memory pass its length; otherwise probe (cached)
+            seg_audio_dur = seg.get('audio_duration') or get_audio_duration(seg_audio_path) or 0.1
             
             # Determine processing
             if slot_dur <= 0.05:
@@ -522,7 +615,7 @@ def merge_video_advanced(video_path, audio_segments, output_path, strategy):
             cursor = seg_start + slot_dur
             
         # 3. Handle Tail
-        probe = ffmpeg.probe(video_path)
+        probe = probe_media(video_path)
         total_duration = float(probe['format']['duration'])
         
         if cursor < total_duration - 0.1:
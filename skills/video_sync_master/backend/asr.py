@@ -7,11 +7,17 @@ if os.path.exists(site_packages) and site_packages not in sys.path:
     sys.path.insert(0, site_packages)
 
 # Lazy Imports
+import copy
+import gc
 import json
+import numpy as np
+import threading
+import time
 import traceback
 
 from jianying import JianYingASR
 from bcut import BcutASR
+from base import run_many
 from asr_data import ASRData
 
 
@@ -24,7 +30,210 @@ PATH_DEV_2 = os.path.join(BACKEND_DIR, "..", "models", "faster-whisper-large-v3-
 PATH_PROD_1 = os.path.join(BACKEND_DIR, "..", "..", "models", "whisperx", "faster-whisper-large-v3-turbo-ct2")
 PATH_PROD_2 = os.path.join(BACKEND_DIR, "..", "..", "models", "faster-whisper-large-v3-turbo-ct2")
 
-DEFAULT_MODEL_ID = "large-v3-turbo" 
+DEFAULT_MODEL_ID = "large-v3-turbo"
+
+# --- Model Pool ---
+# Keeps transcription / alignment models resident across run_asr calls so batch
+# ASR over many short clips pays the load cost once.
+# key -> {"models": tuple, "device": str, "last_used": float}
+_model_pool = {}
+_pool_lock = threading.RLock()
+_janitor_started = False
+
+# Seconds a model may sit unused before it is unloaded (0 disables idle eviction)
+MODEL_IDLE_TIMEOUT = float(os.environ.get("ASR_MODEL_IDLE_TIMEOUT", "600"))
+# Minimum fraction of total VRAM that must be free before loading another model
+VRAM_MIN_FREE_RATIO = float(os.environ.get("ASR_VRAM_MIN_FREE_RATIO", "0.2"))
+
+
+def _free_device_memory(device):
+    gc.collect()
+    if device == "cuda":
+        try:
+            import torch
+            torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+
+def _evict_model(key):
+    entry = _model_pool.pop(key, None)
+    if entry is None:
+        return
+    print(f"[ModelPool] Evicting {key[0]} model: {key[1]}")
+    device = entry["device"]
+    del entry
+    _free_device_memory(device)
+
+
+def evict_idle_models(timeout=None):
+    """
+    Unload pooled models that have not been used for `timeout` seconds.
+    """
+    if timeout is None:
+        timeout = MODEL_IDLE_TIMEOUT
+    if timeout <= 0:
+        return
+    now = time.monotonic()
+    with _pool_lock:
+        for key in [k for k, v in _model_pool.items() if now - v["last_used"] > timeout]:
+            _evict_model(key)
+
+
+def _vram_under_pressure():
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return False
+        free, total = torch.cuda.mem_get_info()
+        return total > 0 and free / total < VRAM_MIN_FREE_RATIO
+    except Exception:
+        return False
+
+
+def _ensure_vram_headroom(keep_key=None):
+    """
+    Evict least-recently-used CUDA models until enough VRAM is free.
+    """
+    while _vram_under_pressure():
+        candidates = [(v["last_used"], k) for k, v in _model_pool.items()
+                      if k != keep_key and v["device"] == "cuda"]
+        if not candidates:
+            break
+        _evict_model(min(candidates)[1])
+
+
+def _janitor_loop():
+    interval = max(MODEL_IDLE_TIMEOUT / 4, 10)
+    while True:
+        time.sleep(interval)
+        try:
+            evict_idle_models()
+        except Exception as e:
+            print(f"[ModelPool] Idle eviction failed: {e}")
+
+
+def _start_janitor():
+    global _janitor_started
+    if _janitor_started or MODEL_IDLE_TIMEOUT <= 0:
+        return
+    _janitor_started = True
+    threading.Thread(target=_janitor_loop, name="asr-model-janitor", daemon=True).start()
+
+
+def get_pooled_model(key, device, loader):
+    """
+    Return the models cached under `key`, calling `loader()` on a miss.
+    `key` is (kind, model path, device, ...); `loader` returns a tuple of models.
+    """
+    with _pool_lock:
+        evict_idle_models()
+        entry = _model_pool.get(key)
+        if entry is not None:
+            print(f"[ModelPool] Reusing resident {key[0]} model: {key[1]}")
+        else:
+            if device == "cuda":
+                _ensure_vram_headroom(keep_key=key)
+            entry = {"models": loader(), "device": device}
+            _model_pool[key] = entry
+            _start_janitor()
+        entry["last_used"] = time.monotonic()
+        return entry["models"]
+
+
+def release_asr_models():
+    """
+    Unload every pooled ASR model (e.g. before loading an LLM or TTS model).
+    """
+    with _pool_lock:
+        for key in list(_model_pool.keys()):
+            _evict_model(key)
+
+
+def _word_time_arrays(words):
+    """
+    Returns (starts, ends, has_start, has_end) for a word list; missing times are NaN.
+    """
+    n = len(words)
+    has_start = np.fromiter(("start" in w for w in words), dtype=bool, count=n)
+    has_end = np.fromiter(("end" in w for w in words), dtype=bool, count=n)
+    starts = np.fromiter((w["start"] if "start" in w and w["start"] is not None else np.nan for w in words), dtype=np.float64, count=n)
+    ends = np.fromiter((w["end"] if "end" in w and w["end"] is not None else np.nan for w in words), dtype=np.float64, count=n)
+    return starts, ends, has_start, has_end
+
+
+def _repair_word_times(words, vad_start, vad_end, stats):
+    """
+    Fill missing word timestamps and clamp over-long words, in place.
+    An unaligned word starts where the previous word ends (or at the VAD start) and
+    ends 0.3s later, capped by the next aligned start (or the VAD end); if that leaves
+    no room it gets a 0.05s sliver. Aligned words are capped at 1.5s.
+    Returns the (starts, ends) arrays after repair.
+    """
+    n = len(words)
+    starts, ends, has_start, has_end = _word_time_arrays(words)
+    bad = ~(has_start & has_end)
+    bad_idx = np.flatnonzero(bad)
+
+    if len(bad_idx):
+        # Backward fill: start of the next word after i that carries a start, else the VAD end
+        pos = np.where(has_start, np.arange(n), n)
+        next_pos = np.append(np.minimum.accumulate(pos[::-1])[::-1][1:], n).tolist()
+
+        # Forward fill: repaired words chain off the previous (possibly repaired) end.
+        # Only unaligned words are visited, so bad runs cost O(run), not O(run^2).
+        for i in bad_idx.tolist():
+            w = words[i]
+            if i > 0 and "end" in words[i - 1]:
+                s_cand = words[i - 1]["end"]
+            else:
+                s_cand = vad_start
+            w_start = w.get("start", s_cand)
+            limit_end = words[next_pos[i]]["start"] if next_pos[i] < n else vad_end
+            target_end = min(w_start + 0.3, limit_end)
+            if target_end <= w_start:
+                target_end = w_start + 0.05 # Minimal duration for unaligned words in tight gaps
+                stats["squeezed"] += 1
+            else:
+                stats["fixed"] += 1
+            w["start"] = w_start
+            w["end"] = target_end
+            starts[i] = w_start
+            ends[i] = target_end
+
+    # Duration clamp for aligned words
+    over = (ends - starts) > 1.5
+    if over.any():
+        ends[over] = starts[over] + 1.5
+        for i, end in zip(np.flatnonzero(over).tolist(), ends[over].tolist()):
+            words[i]["end"] = end
+        stats["clamped"] += int(over.sum())
+
+    return starts, ends
+
+
+def _merge_ascii_words(words, starts, ends):
+    """
+    Merge runs of ASCII words whose gap to the previous word is in [0, 0.1).
+    Negative gaps (overlaps) never merge to prevent "time travel".
+    """
+    if not words:
+        return []
+    is_ascii = np.fromiter((w["word"].isascii() for w in words), dtype=bool, count=len(words))
+    gaps = starts[1:] - ends[:-1]  # NaN (missing time) never merges
+    joins = is_ascii[:-1] & is_ascii[1:] & (gaps >= 0) & (gaps < 0.1)
+    group_starts = np.flatnonzero(np.concatenate(([True], ~joins))).tolist()
+    group_ends = group_starts[1:] + [len(words)]
+
+    merged_words = []
+    for a, b in zip(group_starts, group_ends):
+        merged = words[a].copy()
+        if b - a > 1:
+            merged["word"] = "".join(w["word"] for w in words[a:b])
+            merged["end"] = words[b - 1]["end"]
+        merged_words.append(merged)
+    return merged_words
+
 
 def split_into_subtitles(segments, max_chars=35, max_gap=0.5):
     new_segments = []
@@ -37,89 +246,21 @@ def split_into_subtitles(segments, max_chars=35, max_gap=0.5):
     def is_content(w_text):
         return w_text.strip() not in PUNCTUATION
 
+    stats = {"fixed": 0, "squeezed": 0, "clamped": 0}
+
     for vad_seg in segments:
         words = vad_seg.get("words", [])
         if not words:
             continue
             
-        for i, w in enumerate(words):
-            if "start" not in w or "end" not in w:
-                # Infer start
-                if i > 0 and "end" in words[i-1]:
-                    s_cand = words[i-1]["end"]
-                else:
-                    s_cand = vad_seg["start"]
-                
-                e_cand = vad_seg["end"]
-                for j in range(i + 1, len(words)):
-                    if "start" in words[j]:
-                        e_cand = words[j]["start"]
-                        break
-                    
-                # Assign with safety checks
-                w["start"] = w.get("start", s_cand)
-                # Respect the hard limit of the next word's start
-                w["end"] = w.get("end", e_cand)
-                
-                
-                limit_end = e_cand
-                nominal_end = w["start"] + 0.3
-                
-                target_end = min(nominal_end, limit_end)
-                w["end"] = target_end
-                
-                # Ensure non-zero positive duration (even if it means microscopic overlap or push)
-                if w["end"] <= w["start"]:
-                    w["end"] = w["start"] + 0.05 # Minimal duration for unaligned words in tight gaps
-                    print(f"Squeezed unaligned word '{w.get('word')}' into tight gap: {w['start']:.3f}-{w['end']:.3f}")
-                else:
-                    dur = w["end"] - w["start"]
-                    print(f"Fixed unaligned word '{w.get('word')}' duration: {dur:.2f}s (Limit: {limit_end:.3f})")
-        
-        if i == 0 and len(segments) > 0: 
-             pass
-             
-        pass
-        
-        # 2. Existing Duration Clamp for aligned words
-        for w in words:
-            if "start" in w and "end" in w:
-                dur = w["end"] - w["start"]
-                if dur > 1.5:
-                    w["end"] = w["start"] + 1.5
-
-            
         vad_start = vad_seg["start"]
         vad_end = vad_seg["end"]
-        
-        merged_words = []
-        if words:
-            current_merged = words[0].copy()
-            for i in range(1, len(words)):
-                next_w = words[i]
-                
-                curr_end = current_merged.get("end")
-                next_start = next_w.get("start")
-                next_end = next_w.get("end")
-
-                if curr_end is None or next_start is None or next_end is None:
 
-                    merged_words.append(current_merged)
-                    current_merged = next_w.copy()
-                    continue
-
-                curr_is_ascii = all(ord(c) < 128 for c in current_merged["word"])
-                next_is_ascii = all(ord(c) < 128 for c in next_w["word"])
-                gap = next_start - curr_end
-                
-                # Prevent negative gap (overlap) merging which causes "time travel"
-                if curr_is_ascii and next_is_ascii and 0 <= gap < 0.1:
-                    current_merged["word"] += next_w["word"]
-                    current_merged["end"] = next_end
-                else:
-                    merged_words.append(current_merged)
-                    current_merged = next_w.copy()
-            merged_words.append(current_merged)
+        # 1. Repair unaligned words + clamp durations
+        starts, ends = _repair_word_times(words, vad_start, vad_end, stats)
+        
+        # 2. Merge adjacent ASCII fragments
+        merged_words = _merge_ascii_words(words, starts, ends)
             
         seg_chunks = []
         current_chunk_words = []
@@ -243,87 +384,479 @@ def split_into_subtitles(segments, max_chars=35, max_gap=0.5):
     #     if 0 < gap < 0.3: 
     #         curr["end"] = nxt["start"]
             
+    if stats["fixed"] or stats["squeezed"] or stats["clamped"]:
+        print(f"Word timing repair: {stats['fixed']} unaligned words fixed, "
+              f"{stats['squeezed']} squeezed into tight gaps, {stats['clamped']} over-long words clamped.")
+            
     return new_segments
 
 
 
 
-def run_asr(audio_path, model_path=None, service="whisperx", output_dir=None, vad_onset=0.700, vad_offset=0.700):
+VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov', '.flv']
+AUDIO_EXTENSIONS = ['.wav', '.mp3', '.flac', '.m4a', '.aac', '.ogg', '.opus']
+
+DEFAULT_ASR_BATCH_SIZE = 4
+DEFAULT_ASR_LANGUAGE = "zh"
+ASR_SAMPLE_RATE = 16000
+# Rough VRAM cost of one 30s chunk in a fp16 large-v3-turbo batch (used for auto batch sizing)
+ASR_BYTES_PER_BATCH_ITEM = 384 * 1024 * 1024
+ASR_MAX_BATCH_SIZE = 32
+# Files in flight at once for cloud (JianYing/Bcut) batch ASR
+CLOUD_ASR_CONCURRENCY = 4
+
+
+def _extract_audio(audio_path, output_dir=None):
     """
-    Run ASR using WhisperX or Cloud APIs:
-    1. Transcribe (Faster-Whisper generic / Cloud)
-    2. Align (WhipserX Phoneme Alignment - Only for WhisperX)
+    If input is video, extract audio into the cache dir and return its path.
     """
-    print(f"DEBUG: run_asr called with service={service}", flush=True)
+    ext = os.path.splitext(audio_path)[1].lower()
+    if ext not in VIDEO_EXTENSIONS:
+        return audio_path
 
+    import hashlib
     
-    # If input is video, extract audio first
-    ext = os.path.splitext(audio_path)[1].lower()
-    if ext in ['.mp4', '.mkv', '.avi', '.mov', '.flv']:
-        import hashlib
+    # Create cache directory
+    if output_dir:
+        cache_dir = output_dir
+    else:
+        # Fallback to Project Root .cache (parent of backend)
+        cache_dir = os.path.join(BACKEND_DIR, "..", ".cache")
         
-        # Create cache directory
-        if output_dir:
-            cache_dir = output_dir
-        else:
-            # Fallback to Project Root .cache (parent of backend)
-            cache_dir = os.path.join(BACKEND_DIR, "..", ".cache")
-            
-        os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    # Generare unique filename based on absolute path
+    abs_path = os.path.abspath(audio_path)
+    file_hash = hashlib.md5(abs_path.encode('utf-8')).hexdigest()
+    cached_audio = os.path.join(cache_dir, f"{file_hash}.mp3")
+    
+    if os.path.exists(cached_audio) and os.path.getsize(cached_audio) > 0:
+         print(f"Using cached audio: {cached_audio}")
+         return cached_audio
+
+    if os.path.exists(cached_audio):
+        print(f"Cached audio is empty (0 bytes), re-extracting...")
+        try:
+            os.remove(cached_audio)
+        except OSError:
+            pass
+    
+    print(f"Extracting audio to {cached_audio}...")
+    try:
+        from pydub import AudioSegment
+        AudioSegment.from_file(audio_path).export(cached_audio, format="mp3")
+        return cached_audio
+    except Exception as e:
+        print(f"Audio extraction failed: {e}")
+        # Fallback to original path if extraction fails (though likely will fail later)
+        return audio_path
+
+
+# --- Robust Path Resolution ---
+def _resolve_file_path(in_path):
+    if os.path.exists(in_path):
+        return in_path
+    
+    # Path might me mangled (e.g. contain '?'). Try to recover via timestamp prefix.
+    dirname, basename = os.path.split(in_path)
+    if not os.path.exists(dirname):
+        return in_path # Can't do anything if dir doesn't exist
         
-        # Generare unique filename based on absolute path
-        abs_path = os.path.abspath(audio_path)
-        file_hash = hashlib.md5(abs_path.encode('utf-8')).hexdigest()
-        cached_audio = os.path.join(cache_dir, f"{file_hash}.mp3")
+    import re
+    match = re.match(r"(\d+)_", basename)
+    if match:
+        prefix = match.group(1)
+        try:
+            for f in os.listdir(dirname):
+                if f.startswith(prefix):
+                    found_path = os.path.join(dirname, f)
+                    print(f"Resolving mangled path '{basename}' -> '{f}'")
+                    return found_path
+        except Exception as e:
+            print(f"Path resolution error: {e}")
+    
+    return in_path
+
+
+def _cloud_segments(asr_data):
+    # Convert ASRData to standard format
+    segments = []
+    for seg in asr_data.segments:
+        segments.append({
+            "start": seg.start_time / 1000.0,
+            "end": seg.end_time / 1000.0,
+            "text": seg.text
+        })
+    return segments
+
+
+def _import_whisperx():
+    """
+    WhisperX Service (Lazy Import). Raises ImportError if dependencies are missing.
+    """
+    import torch
+    import whisperx
+    import transformers.modeling_utils
+    import transformers.utils.import_utils
+    
+    # Patch transformers to avoid some pickling issues with offline mode
+    transformers.utils.import_utils.check_torch_load_is_safe = lambda: None
+    transformers.modeling_utils.check_torch_load_is_safe = lambda: None
+    return torch, whisperx
+
+
+def _resolve_whisperx_model():
+    """
+    Locate the local faster-whisper model. Returns (target_model, download_root).
+    """
+    local_model_path = None
+    if os.path.exists(PATH_PROD_1):
+        local_model_path = PATH_PROD_1
+    elif os.path.exists(PATH_PROD_2):
+        local_model_path = PATH_PROD_2
+    elif os.path.exists(PATH_DEV_1):
+        local_model_path = PATH_DEV_1
+    elif os.path.exists(PATH_DEV_2):
+        local_model_path = PATH_DEV_2
+
+    if local_model_path:
+        print(f"Found local model at: {local_model_path}")
+        return local_model_path, os.path.dirname(local_model_path)
+
+    print(f"Local model not found. Defaulting to {DEFAULT_MODEL_ID} but checking existence...")
+    if not os.path.exists(PATH_DEV_1) and not os.path.exists(PATH_PROD_1):
+         error_msg = (
+             "Fatal Error: Local WhisperX model not found.\n"
+             "Please ensure the 'models' folder is placed in the application root.\n"
+             "API services (Jianying/Bcut) are available without local models."
+         )
+         print(error_msg)
+         raise FileNotFoundError(error_msg)
+    
+    target_model = PATH_DEV_1 if os.path.exists(PATH_DEV_1) else PATH_PROD_1 
+    # Default download root: Prod path
+    download_root = os.path.join(BACKEND_DIR, "..", "..", "models", "whisperx")
+    if not os.path.exists(os.path.join(BACKEND_DIR, "..", "..")): # If not in prod structure
+         download_root = os.path.join(BACKEND_DIR, "..", "models", "whisperx") 
+    return target_model, download_root
+
+
+def _load_whisperx_model(whisperx, device, compute_type, language, vad_onset, vad_offset):
+    target_model, download_root = _resolve_whisperx_model()
+    print(f"Loading WhisperX model: {target_model} on {device} ({compute_type})...")
+
+    asr_options = {}
+    if language in (None, "zh"):
+        asr_options["initial_prompt"] = "这是一段包含标点符号的中文对话，请使用逗号和句号。"
+    
+    # VAD Options: Tuned for Aggressive Silence Detection (Strict Thresholds)
+    # Note: 'min_silence_duration_ms' is not supported by whisperx.load_model via kwargs
+    # We tune thresholds instead.
+    vad_options = {
+        "vad_onset": vad_onset,  
+        "vad_offset": vad_offset
+    }
+    
+    (model,) = get_pooled_model(
+        ("whisperx", target_model, device, compute_type, language, vad_onset, vad_offset),
+        device,
+        lambda: (whisperx.load_model(
+            target_model, 
+            device, 
+            compute_type=compute_type,
+            download_root=download_root,
+            asr_options=asr_options,
+            vad_options=vad_options 
+        ),)
+    )
+    return model
+
+
+def _auto_batch_size(device):
+    """
+    Pick an inference batch size that fits the free memory of `device`.
+    """
+    if device == "cuda":
+        try:
+            import torch
+            free, _ = torch.cuda.mem_get_info()
+            return max(1, min(ASR_MAX_BATCH_SIZE, int(free * 0.8) // ASR_BYTES_PER_BATCH_ITEM))
+        except Exception:
+            return DEFAULT_ASR_BATCH_SIZE
+    return max(1, min(ASR_MAX_BATCH_SIZE, (os.cpu_count() or 2) // 2))
+
+
+def _load_audio(audio_path):
+    print(f"Loading audio: {audio_path}")
+    # Decoded in-process (no ffmpeg per file); paths go to libav as-is, so Unicode is fine on Windows
+    from media_io import decode_audio
+    audio, _ = decode_audio(audio_path, sr=ASR_SAMPLE_RATE, mono=True)
+    audio = audio.astype("float32") # WhisperX expects float32
+    print(f"Audio loaded. Shape: {audio.shape}")
+    return audio
+
+
+def _vad_chunks(model, audio, chunk_size=30):
+    """
+    Run the pipeline's VAD on one file and merge speech regions into <= chunk_size windows.
+    Mirrors FasterWhisperPipeline.transcribe for both the old and the >=3.3 WhisperX VAD API.
+    """
+    import torch
+    vad = model.vad_model
+    if hasattr(vad, "preprocess_audio"):
+        waveform = vad.preprocess_audio(audio)
+        merge_chunks = vad.merge_chunks
+    else:
+        from whisperx.vad import merge_chunks
+        waveform = torch.from_numpy(audio).unsqueeze(0)
+    vad_segments = vad({"waveform": waveform, "sample_rate": ASR_SAMPLE_RATE})
+    return merge_chunks(
+        vad_segments,
+        chunk_size,
+        onset=model._vad_params["vad_onset"],
+        offset=model._vad_params["vad_offset"],
+    )
+
+
+def _set_tokenizer_language(model, language):
+    import faster_whisper.tokenizer
+    if model.tokenizer is None or model.tokenizer.language_code != language:
+        model.tokenizer = faster_whisper.tokenizer.Tokenizer(
+            model.model.hf_tokenizer,
+            model.model.model.is_multilingual,
+            task="transcribe",
+            language=language,
+        )
+
+
+def _transcribe_many(model, audios, batch_size, language):
+    """
+    Transcribe several audio arrays (same language) with VAD chunks from all of them
+    packed into shared inference batches. Returns one segment list per input.
+    """
+    # The pooled pipeline is shared: put its tokenizer back afterwards, or a model loaded
+    # with language=None would skip detection on its next run
+    saved_tokenizer = model.tokenizer
+    _set_tokenizer_language(model, language)
+    try:
+        items = []  # (file index, vad chunk)
+        for file_idx, audio in enumerate(audios):
+            for chunk in _vad_chunks(model, audio):
+                items.append((file_idx, chunk))
+        print(f"Batched transcription: {len(items)} VAD chunks from {len(audios)} files (batch size {batch_size}).")
+
+        def data():
+            for file_idx, chunk in items:
+                f1 = int(chunk["start"] * ASR_SAMPLE_RATE)
+                f2 = int(chunk["end"] * ASR_SAMPLE_RATE)
+                yield {"inputs": audios[file_idx][f1:f2]}
+
+        results = [[] for _ in audios]
+        outputs = model(data(), batch_size=batch_size, num_workers=0)
+        for (file_idx, chunk), out in zip(items, outputs):
+            text = out["text"]
+            if batch_size in [0, 1, None]:
+                text = text[0]
+            results[file_idx].append({
+                "text": text,
+                "start": round(chunk["start"], 3),
+                "end": round(chunk["end"], 3),
+            })
+        return results
+    finally:
+        model.tokenizer = saved_tokenizer
+
+
+def _resolve_align_model_dir():
+    """
+    Returns (align_model_name or None, local_align_dir).
+    """
+    # Define local alignment model path
+    # Model ID: jonatasgrosman/wav2vec2-large-xlsr-53-chinese-zh-cn
+    local_align_dir = os.path.join(BACKEND_DIR, "..", "models", "alignment") # Dev
+    prod_align_dir = os.path.join(BACKEND_DIR, "..", "..", "models", "alignment") # Prod
+    
+    if os.path.exists(prod_align_dir):
+        local_align_dir = prod_align_dir
+    align_model_name = None # Let WhisperX pick default if not found
+    
+    if os.path.exists(local_align_dir):
+        has_config = os.path.exists(os.path.join(local_align_dir, "config.json"))
+        has_weights = os.path.exists(os.path.join(local_align_dir, "pytorch_model.bin")) or \
+                      os.path.exists(os.path.join(local_align_dir, "model.safetensors"))
         
-        if os.path.exists(cached_audio) and os.path.getsize(cached_audio) > 0:
-             print(f"Using cached audio: {cached_audio}")
-             audio_path = cached_audio
+        if has_config and has_weights:
+             align_model_name = local_align_dir
+             print(f"Found local alignment model at: {local_align_dir}")
         else:
-            if os.path.exists(cached_audio):
-                print(f"Cached audio is empty (0 bytes), re-extracting...")
-                try:
-                    os.remove(cached_audio)
-                except OSError:
-                    pass
+             # Check for subfolder if user dragged the folder in
+             subdirs = [d for d in os.listdir(local_align_dir) if os.path.isdir(os.path.join(local_align_dir, d))]
+             if subdirs:
+                possible_path = os.path.join(local_align_dir, subdirs[0])
+                if os.path.exists(os.path.join(possible_path, "config.json")) and \
+                   (os.path.exists(os.path.join(possible_path, "pytorch_model.bin")) or \
+                    os.path.exists(os.path.join(possible_path, "model.safetensors"))):
+                    align_model_name = possible_path
+                    print(f"Found local alignment model at: {possible_path}")
+    return align_model_name, local_align_dir
+
+
+def _save_debug_outputs(aligned_result, audio_path, output_dir):
+    """
+    Save raw aligned JSON/SRT next to the audio (or in output_dir). Returns the file prefix.
+    """
+    if output_dir:
+        base_name = os.path.splitext(os.path.basename(audio_path))[0]
+        save_prefix = os.path.join(output_dir, base_name)
+    else:
+        base_name = os.path.splitext(audio_path)[0]
+        save_prefix = base_name # Fallback to same folder as audio
+
+    try:
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        # 1. Save JSON (Full Detail)
+        json_path = save_prefix + "_raw.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(aligned_result["segments"], f, ensure_ascii=False, indent=2)
+        print(f"Debug: Saved raw JSON to {json_path}")
+        
+        # 2. Save SRT (Raw Segments)
+        srt_path = save_prefix + "_raw.srt"
+        def fmt_time(t):
+            hours = int(t // 3600)
+            minutes = int((t % 3600) // 60)
+            seconds = int(t % 60)
+            milliseconds = int((t % 1) * 1000)
+            return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+        with open(srt_path, "w", encoding="utf-8") as f:
+            for i, seg in enumerate(aligned_result["segments"]):
+                start = fmt_time(seg["start"])
+                end = fmt_time(seg["end"])
+                text = seg["text"].strip()
+                f.write(f"{i+1}\n{start} --> {end}\n{text}\n\n")
+        print(f"Debug: Saved raw SRT to {srt_path}")
+        
+    except Exception as e:
+        print(f"Warning: Failed to save debug files: {e}")
+    return save_prefix
+
+
+def _align_segments(whisperx, result, audio, device):
+    """
+    Phoneme-align transcription segments. Returns the aligned result, or None when
+    no alignment model is available in offline mode.
+    """
+    # 2. Align (Visual Timestamp Correction)
+    print("Loading Alignment Model...")
+    align_model_name, local_align_dir = _resolve_align_model_dir()
+    
+    # If we didn't find a valid local model (with weights), warn the user.
+    if not align_model_name:
+         print(f"Local alignment model not found (or missing weights).")
+         # Strict Offline Mode: Fail with instruction
+         if os.environ.get("HF_HUB_OFFLINE") == "1":
+             error_msg = (
+                 f"CRITICAL ERROR: Alignment model weights missing in {local_align_dir}\n"
+                 "Please manually download 'pytorch_model.bin' or 'model.safetensors' and place it in that folder.\n"
+                 "Auto-download is disabled by policy.\n"
+                 "Proceeding with unaligned results (timestamps may be less accurate)."
+             )
+             print(error_msg)
+             return None
             
-            print(f"Extracting audio to {cached_audio}...")
-            try:
-                from pydub import AudioSegment
-                AudioSegment.from_file(audio_path).export(cached_audio, format="mp3")
-                audio_path = cached_audio
-            except Exception as e:
-                print(f"Audio extraction failed: {e}")
-                # Fallback to original path if extraction fails (though likely will fail later)
-                pass
+    if not align_model_name:
+         print(f"Local alignment model not found (checked {local_align_dir} and subdirs). Downloading from HF Hub...")
+    
+    load_args = {"language_code": result["language"], "device": device}
+    if align_model_name and result["language"] == "zh":
+         load_args["model_name"] = align_model_name
+
+    model_a, metadata = get_pooled_model(
+        ("align", load_args.get("model_name") or "default", device, result["language"]),
+        device,
+        lambda: whisperx.load_align_model(**load_args)
+    )
+    
+    print("Aligning segments...")
+    aligned_result = whisperx.align(result["segments"], model_a, metadata, audio, device, return_char_alignments=True)
+    del model_a
+    return aligned_result
+
+
+def _align_and_split(whisperx, result, audio, audio_path, device, output_dir=None):
+    """
+    Phoneme-align transcription segments, save debug files and split into subtitles.
+    """
+    aligned_result = _align_segments(whisperx, result, audio, device)
+    if aligned_result is None:
+        # Return unaligned segments to prevent crash
+        return split_into_subtitles(result["segments"], max_chars=30)
+    
+    # --- DEBUG: Save Raw Output (User Request) ---
+    save_prefix = _save_debug_outputs(aligned_result, audio_path, output_dir)
+    # ---------------------------------------------
+
+    print("Splitting long segments into subtitles...")
+    # Use existing logic helper
+    final_segments = split_into_subtitles(aligned_result["segments"], max_chars=30)
+    
+    # --- DEBUG: Save Repaired (Intermediate) ---
+    try:
+         repaired_json_path = save_prefix + "_debug_repaired.json"
+         with open(repaired_json_path, "w", encoding="utf-8") as f:
+             json.dump(aligned_result["segments"], f, ensure_ascii=False, indent=2)
+         print(f"Debug: Saved repaired JSON to {repaired_json_path}")
+    except Exception as e:
+         print(f"Warning: Failed to save repaired debug info: {e}")
+    # -------------------------------------------
+
+
+    # --- DEBUG: Save Final Output (Corrected) ---
+    try:
+        final_json_path = save_prefix + "_debug_final.json"
+        with open(final_json_path, "w", encoding="utf-8") as f:
+            json.dump(final_segments, f, ensure_ascii=False, indent=2)
+        print(f"Debug: Saved FINAL JSON to {final_json_path}")
+    except Exception as e:
+        print(f"Warning: Failed to save final debug info: {e}")
+    # --------------------------------------------
+    return final_segments
+
+
+def run_asr(audio_path, model_path=None, service="whisperx", output_dir=None, vad_onset=0.700, vad_offset=0.700,
+            batch_size=DEFAULT_ASR_BATCH_SIZE, language=DEFAULT_ASR_LANGUAGE, chunked=False, workers=None,
+            on_window=None):
+    """
+    Run ASR using WhisperX or Cloud APIs:
+    1. Transcribe (Faster-Whisper generic / Cloud)
+    2. Align (WhipserX Phoneme Alignment - Only for WhisperX)
+
+    :param batch_size: WhisperX inference batch size (<= 0 picks one from free memory).
+    :param language: Transcription language code, or None to auto-detect.
+    :param chunked: WhisperX only. Split long audio at silences and process windows in parallel.
+    :param workers: Worker processes for chunked mode on CPU (None = auto).
+    :param on_window: Chunked mode only. Called with each window's subtitle segments as soon
+        as that window is done, in timeline order (lets callers start on early segments).
+    """
+    print(f"DEBUG: run_asr called with service={service}", flush=True)
+
+    # If input is video, extract audio first
+    audio_path = _extract_audio(audio_path, output_dir)
 
     if service == "jianying":
         print(f"Running JianYing ASR on {audio_path}")
         asr = JianYingASR(audio_path, need_word_time_stamp=False)
-        asr_data = asr.run()
-        # Convert ASRData to standard format
-        segments = []
-        for seg in asr_data.segments:
-            segments.append({
-                "start": seg.start_time / 1000.0,
-                "end": seg.end_time / 1000.0,
-                "text": seg.text
-            })
+        segments = _cloud_segments(asr.run())
         print(f"JianYing ASR complete. {len(segments)} segments.")
         return segments
 
     elif service == "bcut":
         print(f"Running Bcut ASR on {audio_path}")
         asr = BcutASR(audio_path, need_word_time_stamp=False)
-        asr_data = asr.run()
-        # Convert ASRData to standard format
-        segments = []
-        for seg in asr_data.segments:
-            segments.append({
-                "start": seg.start_time / 1000.0,
-                "end": seg.end_time / 1000.0,
-                "text": seg.text
-            })
+        segments = _cloud_segments(asr.run())
         print(f"Bcut ASR complete. {len(segments)} segments.")
         return segments
 
@@ -333,7 +866,10 @@ def run_asr(audio_path, model_path=None, service="whisperx", output_dir=None, va
             import whisper
             import torch
             device = "cuda" if torch.cuda.is_available() else "cpu"
-            model = whisper.load_model("medium", device=device)
+            (model,) = get_pooled_model(
+                ("openai_whisper", "medium", device), device,
+                lambda: (whisper.load_model("medium", device=device),)
+            )
             result = model.transcribe(audio_path)
             
             segments = []
@@ -351,131 +887,35 @@ def run_asr(audio_path, model_path=None, service="whisperx", output_dir=None, va
             return []
     
     # Default: WhisperX
-    
-    # WhisperX Service (Lazy Import)
+    if chunked:
+        return run_asr_chunked(audio_path, output_dir=output_dir, vad_onset=vad_onset, vad_offset=vad_offset,
+                               batch_size=batch_size, language=language, workers=workers, on_window=on_window)
+
     try:
-        import torch
-        import whisperx
-        import gc
-        import transformers.modeling_utils
-        import transformers.utils.import_utils
-        
-        # Patch transformers to avoid some pickling issues with offline mode
-        transformers.utils.import_utils.check_torch_load_is_safe = lambda: None
-        transformers.modeling_utils.check_torch_load_is_safe = lambda: None
-        
+        torch, whisperx = _import_whisperx()
     except ImportError as e:
         print(f"Failed to import WhisperX dependencies: {e}")
         return []
 
     device = "cuda" if torch.cuda.is_available() else "cpu"
     compute_type = "float16" if device == "cuda" else "int8"
-    batch_size = 4 
-    
-    local_model_path = None
-    if os.path.exists(PATH_PROD_1):
-        local_model_path = PATH_PROD_1
-    elif os.path.exists(PATH_PROD_2):
-        local_model_path = PATH_PROD_2
-    elif os.path.exists(PATH_DEV_1):
-        local_model_path = PATH_DEV_1
-    elif os.path.exists(PATH_DEV_2):
-        local_model_path = PATH_DEV_2
-
-    target_model = DEFAULT_MODEL_ID
-    
-    # --- Robust Path Resolution ---
-    def resolve_file_path(in_path):
-        if os.path.exists(in_path):
-            return in_path
-        
-        # Path might me mangled (e.g. contain '?'). Try to recover via timestamp prefix.
-        dirname, basename = os.path.split(in_path)
-        if not os.path.exists(dirname):
-            return in_path # Can't do anything if dir doesn't exist
-            
-        import re
-        match = re.match(r"(\d+)_", basename)
-        if match:
-            prefix = match.group(1)
-            try:
-                for f in os.listdir(dirname):
-                    if f.startswith(prefix):
-                        found_path = os.path.join(dirname, f)
-                        print(f"Resolving mangled path '{basename}' -> '{f}'")
-                        return found_path
-            except Exception as e:
-                print(f"Path resolution error: {e}")
-        
-        return in_path
-
-    resolved_path = resolve_file_path(audio_path)
-    if resolved_path != audio_path:
-        audio_path = resolved_path
-        
-    if local_model_path:
-        print(f"Found local model at: {local_model_path}")
-        target_model = local_model_path
-    else:
-        print(f"Local model not found. Defaulting to {DEFAULT_MODEL_ID} but checking existence...")
-        if not os.path.exists(PATH_DEV_1) and not os.path.exists(PATH_PROD_1):
-             error_msg = (
-                 "Fatal Error: Local WhisperX model not found.\n"
-                 "Please ensure the 'models' folder is placed in the application root.\n"
-                 "API services (Jianying/Bcut) are available without local models."
-             )
-             print(error_msg)
-             raise FileNotFoundError(error_msg)
-        
-        target_model = PATH_DEV_1 if os.path.exists(PATH_DEV_1) else PATH_PROD_1 
+    if not batch_size or batch_size <= 0:
+        batch_size = _auto_batch_size(device)
     
-    # 1. Transcribe
-    print(f"Loading WhisperX model: {target_model} on {device} ({compute_type})...")
+    audio_path = _resolve_file_path(audio_path)
     
     try:
-        if local_model_path:
-            download_root = os.path.dirname(local_model_path)
-        else:
-            # Default download root: Prod path
-            download_root = os.path.join(BACKEND_DIR, "..", "..", "models", "whisperx")
-            if not os.path.exists(os.path.join(BACKEND_DIR, "..", "..")): # If not in prod structure
-                 download_root = os.path.join(BACKEND_DIR, "..", "models", "whisperx") 
-        
-        asr_options = {
-            "initial_prompt": "这是一段包含标点符号的中文对话，请使用逗号和句号。",
-        }
+        # 1. Transcribe
+        model = _load_whisperx_model(whisperx, device, compute_type, language, vad_onset, vad_offset)
         
-        # VAD Options: Tuned for Aggressive Silence Detection (Strict Thresholds)
-        # Note: 'min_silence_duration_ms' is not supported by whisperx.load_model via kwargs
-        # We tune thresholds instead.
-        vad_options = {
-            "vad_onset": vad_onset,  
-            "vad_offset": vad_offset
-        }
-        
-        model = whisperx.load_model(
-            target_model, 
-            device, 
-            compute_type=compute_type,
-            download_root=download_root,
-            asr_options=asr_options,
-            vad_options=vad_options 
-        )
-        
-        print(f"Loading audio: {audio_path}")
-        print(f"Loading audio: {audio_path}")
-        # Use librosa for robust Unicode handling on Windows
-        import librosa
-        audio, _ = librosa.load(audio_path, sr=16000, mono=True)
-        audio = audio.astype("float32") # WhisperX expects float32
-        print(f"Audio loaded via librosa. Shape: {audio.shape}")
+        audio = _load_audio(audio_path)
         
         print("Transcribing with VAD filtering...")
 
         result = model.transcribe(
             audio, 
             batch_size=batch_size, 
-            language="zh", 
+            language=language, 
             task="transcribe"
         )
         
@@ -485,140 +925,360 @@ def run_asr(audio_path, model_path=None, service="whisperx", output_dir=None, va
         
         print(f"Transcription complete. Detected language: {result['language']}")
         
-        # 2. Align (Visual Timestamp Correction)
-        print("Loading Alignment Model...")
-        
-        # Define local alignment model path
-        # Model ID: jonatasgrosman/wav2vec2-large-xlsr-53-chinese-zh-cn
-        local_align_dir = os.path.join(BACKEND_DIR, "..", "models", "alignment") # Dev
-        prod_align_dir = os.path.join(BACKEND_DIR, "..", "..", "models", "alignment") # Prod
-        
-        if os.path.exists(prod_align_dir):
-            local_align_dir = prod_align_dir
-        align_model_name = None # Let WhisperX pick default if not found
-        
-        if os.path.exists(local_align_dir):
-            has_config = os.path.exists(os.path.join(local_align_dir, "config.json"))
-            has_weights = os.path.exists(os.path.join(local_align_dir, "pytorch_model.bin")) or \
-                          os.path.exists(os.path.join(local_align_dir, "model.safetensors"))
-            
-            if has_config and has_weights:
-                 align_model_name = local_align_dir
-                 print(f"Found local alignment model at: {local_align_dir}")
-            else:
-                 # Check for subfolder if user dragged the folder in
-                 subdirs = [d for d in os.listdir(local_align_dir) if os.path.isdir(os.path.join(local_align_dir, d))]
-                 if subdirs:
-                    possible_path = os.path.join(local_align_dir, subdirs[0])
-                    if os.path.exists(os.path.join(possible_path, "config.json")) and \
-                       (os.path.exists(os.path.join(possible_path, "pytorch_model.bin")) or \
-                        os.path.exists(os.path.join(possible_path, "model.safetensors"))):
-                        align_model_name = possible_path
-                        print(f"Found local alignment model at: {possible_path}")
-        
-        # If we didn't find a valid local model (with weights), warn the user.
-        if not align_model_name:
-             print(f"Local alignment model not found (or missing weights).")
-             # Strict Offline Mode: Fail with instruction
-             if os.environ.get("HF_HUB_OFFLINE") == "1":
-                 error_msg = (
-                     f"CRITICAL ERROR: Alignment model weights missing in {local_align_dir}\n"
-                     "Please manually download 'pytorch_model.bin' or 'model.safetensors' and place it in that folder.\n"
-                     "Auto-download is disabled by policy.\n"
-                     "Proceeding with unaligned results (timestamps may be less accurate)."
-                 )
-                 print(error_msg)
-                 # Return unaligned segments to prevent crash
-                 return split_into_subtitles(result["segments"], max_chars=30)
-                
-        if not align_model_name:
-             print(f"Local alignment model not found (checked {local_align_dir} and subdirs). Downloading from HF Hub...")
-        
-        load_args = {"language_code": result["language"], "device": device}
-        if align_model_name and result["language"] == "zh":
-             load_args["model_name"] = align_model_name
+        final_segments = _align_and_split(whisperx, result, audio, audio_path, device, output_dir)
 
-        model_a, metadata = whisperx.load_align_model(**load_args)
-        
-        print("Aligning segments...")
-        aligned_result = whisperx.align(result["segments"], model_a, metadata, audio, device, return_char_alignments=True)
-        
-        # --- DEBUG: Save Raw Output (User Request) ---
-        try:
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-                base_name = os.path.splitext(os.path.basename(audio_path))[0]
-                save_prefix = os.path.join(output_dir, base_name)
-            else:
-                base_name = os.path.splitext(audio_path)[0]
-                save_prefix = base_name # Fallback to same folder as audio
-            
-            # 1. Save JSON (Full Detail)
-            json_path = save_prefix + "_raw.json"
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(aligned_result["segments"], f, ensure_ascii=False, indent=2)
-            print(f"Debug: Saved raw JSON to {json_path}")
-            
-            # 2. Save SRT (Raw Segments)
-            srt_path = save_prefix + "_raw.srt"
-            def fmt_time(t):
-                hours = int(t // 3600)
-                minutes = int((t % 3600) // 60)
-                seconds = int(t % 60)
-                milliseconds = int((t % 1) * 1000)
-                return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
-
-            with open(srt_path, "w", encoding="utf-8") as f:
-                for i, seg in enumerate(aligned_result["segments"]):
-                    start = fmt_time(seg["start"])
-                    end = fmt_time(seg["end"])
-                    text = seg["text"].strip()
-                    f.write(f"{i+1}\n{start} --> {end}\n{text}\n\n")
-            print(f"Debug: Saved raw SRT to {srt_path}")
-            
-        except Exception as e:
-            print(f"Warning: Failed to save debug files: {e}")
-        # ---------------------------------------------
-        
-        # Cleanup
-        del model_a
-        
-        # Cleanup Whisper Model
+        # Models stay resident in the pool; only drop our local reference
         del model
-        
         gc.collect()
+        
+        print(f"WhisperX processing complete. {len(final_segments)} segments.")
+        return final_segments
+
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        print(f"Error during WhisperX ASR: {e}")
+        traceback.print_exc()
+        return []
+
+
+# --- Chunked ASR (long recordings) ---
+# Windows are cut at the quietest point near every CHUNK_WINDOW_SEC so only one window
+# of audio per worker is ever decoded, and each window overlaps its neighbours by
+# CHUNK_OVERLAP_SEC so words straddling a cut are still seen whole by one worker.
+CHUNK_WINDOW_SEC = 600.0
+CHUNK_SEARCH_SEC = 15.0
+CHUNK_OVERLAP_SEC = 1.0
+CHUNK_THREADS_PER_WORKER = 4
+
+
+def _find_silence_cut(audio_path, nominal, search_sec=CHUNK_SEARCH_SEC):
+    """
+    Return the time of the quietest 300 ms stretch within +-search_sec of `nominal`.
+    """
+    import librosa
+    import numpy as np
+    from media_io import decode_audio
+
+    start = max(0.0, nominal - search_sec)
+    y, sr = decode_audio(audio_path, sr=ASR_SAMPLE_RATE, mono=True, start=start, duration=2 * search_sec)
+    hop = int(0.01 * sr)
+    rms = librosa.feature.rms(y=y, frame_length=int(0.03 * sr), hop_length=hop)[0]
+    if len(rms) == 0:
+        return nominal
+    # Smooth so we land inside a pause rather than between two phonemes
+    win = min(30, len(rms))
+    smoothed = np.convolve(rms, np.ones(win) / win, mode="same")
+    return start + int(np.argmin(smoothed)) * hop / sr
+
+
+def _plan_windows(audio_path, total_duration, window_sec=CHUNK_WINDOW_SEC, overlap_sec=CHUNK_OVERLAP_SEC):
+    """
+    Returns a list of window dicts: {index, start, end, own_start, own_end}.
+    [start, end) is decoded; only segments centred in [own_start, own_end) are kept.
+    """
+    cuts = [0.0]
+    nominal = window_sec
+    while nominal < total_duration - window_sec / 4:
+        cut = _find_silence_cut(audio_path, nominal)
+        if cut <= cuts[-1]:
+            cut = nominal
+        cuts.append(cut)
+        nominal = cut + window_sec
+    cuts.append(total_duration)
+
+    windows = []
+    for i in range(len(cuts) - 1):
+        windows.append({
+            "index": i,
+            "start": max(0.0, cuts[i] - overlap_sec),
+            "end": min(total_duration, cuts[i + 1] + overlap_sec),
+            "own_start": cuts[i],
+            "own_end": cuts[i + 1],
+        })
+    return windows
+
+
+def _shift_segments(segments, offset):
+    for seg in segments:
+        for key in ("start", "end"):
+            if key in seg:
+                seg[key] += offset
+        for w in seg.get("words", []):
+            for key in ("start", "end"):
+                if key in w:
+                    w[key] += offset
+    return segments
+
+
+def _load_window_audio(audio_path, window):
+    from media_io import decode_audio
+
+    audio, _ = decode_audio(audio_path, sr=ASR_SAMPLE_RATE, mono=True,
+                            start=window["start"], duration=window["end"] - window["start"])
+    return audio.astype("float32")
+
+
+def _transcribe_window(whisperx, model, audio, window, device, batch_size, language):
+    """
+    Transcribe and align one window. Returns segments on the global timeline,
+    restricted to the window's owned range.
+    """
+    result = model.transcribe(audio, batch_size=batch_size, language=language, task="transcribe")
+    if not result["segments"]:
+        return []
+
+    aligned_result = _align_segments(whisperx, result, audio, device)
+    segments = aligned_result["segments"] if aligned_result else result["segments"]
+    segments = _shift_segments(segments, window["start"])
+
+    # De-duplicate the overlap: a segment belongs to the window holding its midpoint
+    kept = []
+    for seg in segments:
+        mid = (seg["start"] + seg["end"]) / 2
+        if window["own_start"] <= mid < window["own_end"]:
+            kept.append(seg)
+    return kept
+
+
+def _chunk_worker_init(threads):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _chunk_worker(audio_path, window, batch_size, language, vad_onset, vad_offset):
+    """
+    Process-pool entry point. Each worker keeps its own pooled model between windows.
+    """
+    _, whisperx = _import_whisperx()
+    model = _load_whisperx_model(whisperx, "cpu", "int8", language, vad_onset, vad_offset)
+    audio = _load_window_audio(audio_path, window)
+    segments = _transcribe_window(whisperx, model, audio, window, "cpu", batch_size, language)
+    print(f"[ChunkedASR] Window {window['index']} done: {len(segments)} segments.", flush=True)
+    return segments
+
+
+def _emit_window(on_window, segments):
+    # split_into_subtitles repairs word times in place; work on a copy so the
+    # final whole-timeline pass sees the same input as without streaming
+    on_window(split_into_subtitles(copy.deepcopy(segments), max_chars=30))
+
+
+def run_asr_chunked(audio_path, output_dir=None, vad_onset=0.700, vad_offset=0.700,
+                    batch_size=DEFAULT_ASR_BATCH_SIZE, language=DEFAULT_ASR_LANGUAGE,
+                    workers=None, window_sec=CHUNK_WINDOW_SEC, on_window=None):
+    """
+    WhisperX ASR for long recordings with bounded memory.
+    Audio is split at silences into ~window_sec windows; windows are transcribed and
+    aligned by a process pool on CPU, or through one resident model on GPU (with the
+    next window decoded in the background), then stitched back onto one timeline.
+    If given, `on_window(segments)` receives each window's subtitle segments in order.
+    Failures before the first window is emitted return [] like run_asr; once the caller
+    has received part of the transcript, errors (including those raised by on_window)
+    propagate so a truncated transcript is never mistaken for the whole file.
+    """
+    try:
+        torch, whisperx = _import_whisperx()
+    except ImportError as e:
+        print(f"Failed to import WhisperX dependencies: {e}")
+        return []
+
+    from alignment import get_audio_duration
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if not batch_size or batch_size <= 0:
+        batch_size = _auto_batch_size(device)
+
+    audio_path = _resolve_file_path(_extract_audio(audio_path, output_dir))
+    total_duration = get_audio_duration(audio_path)
+    if not total_duration:
+        print("[ChunkedASR] Could not determine duration, falling back to single-pass ASR.")
+        return run_asr(audio_path, output_dir=output_dir, vad_onset=vad_onset, vad_offset=vad_offset,
+                       batch_size=batch_size, language=language)
+
+    windows = _plan_windows(audio_path, total_duration, window_sec)
+    print(f"[ChunkedASR] {total_duration:.1f}s audio -> {len(windows)} windows on {device}", flush=True)
+
+    emitted = False
+    try:
+        window_segments = []
         if device == "cuda":
-            torch.cuda.empty_cache()
+            # GPU queue: one resident model, next window's audio decoded while this one runs
+            model = _load_whisperx_model(whisperx, device, "float16", language, vad_onset, vad_offset)
+            with ThreadPoolExecutor(max_workers=1) as loader:
+                pending = loader.submit(_load_window_audio, audio_path, windows[0])
+                for i, window in enumerate(windows):
+                    audio = pending.result()
+                    if i + 1 < len(windows):
+                        pending = loader.submit(_load_window_audio, audio_path, windows[i + 1])
+                    window_segments.append(
+                        _transcribe_window(whisperx, model, audio, window, device, batch_size, language)
+                    )
+                    del audio
+                    print(f"[ChunkedASR] Window {window['index'] + 1}/{len(windows)} done.", flush=True)
+                    if on_window:
+                        emitted = True
+                        _emit_window(on_window, window_segments[-1])
+            del model
+        else:
+            if workers is None:
+                workers = max(1, (os.cpu_count() or 2) // CHUNK_THREADS_PER_WORKER)
+            workers = max(1, min(workers, len(windows)))
+            threads = max(1, (os.cpu_count() or 2) // workers)
+            print(f"[ChunkedASR] Using {workers} worker processes ({threads} threads each)", flush=True)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_chunk_worker_init, initargs=(threads,)) as pool:
+                futures = [
+                    pool.submit(_chunk_worker, audio_path, w, batch_size, language, vad_onset, vad_offset)
+                    for w in windows
+                ]
+                try:
+                    for f in futures:
+                        window_segments.append(f.result())
+                        if on_window:
+                            emitted = True
+                            _emit_window(on_window, window_segments[-1])
+                except BaseException:
+                    # Don't transcribe the remaining windows before the error surfaces
+                    for f in futures:
+                        f.cancel()
+                    raise
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        if emitted:
+            raise
+        print(f"Error during chunked WhisperX ASR: {e}")
+        traceback.print_exc()
+        return []
 
-        print("Splitting long segments into subtitles...")
-        # Use existing logic helper
-        final_segments = split_into_subtitles(aligned_result["segments"], max_chars=30)
-        
-        # --- DEBUG: Save Repaired (Intermediate) ---
+    # Stitch: windows are already on the global timeline and de-duplicated
+    stitched = [seg for segs in window_segments for seg in segs]
+    stitched.sort(key=lambda seg: seg["start"])
+    aligned_result = {"segments": stitched}
+    save_prefix = _save_debug_outputs(aligned_result, audio_path, output_dir)
+
+    final_segments = split_into_subtitles(stitched, max_chars=30)
+    try:
+        final_json_path = save_prefix + "_debug_final.json"
+        with open(final_json_path, "w", encoding="utf-8") as f:
+            json.dump(final_segments, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        print(f"Warning: Failed to save final debug info: {e}")
+
+    print(f"Chunked WhisperX processing complete. {len(final_segments)} segments.")
+    return final_segments
+
+
+def run_asr_batch(audio_paths, service="whisperx", output_dir=None, vad_onset=0.700, vad_offset=0.700,
+                  batch_size=0, language=DEFAULT_ASR_LANGUAGE):
+    """
+    Transcribe many files with one model load. For WhisperX, VAD chunks from all
+    files are packed into shared inference batches and the results scattered back.
+
+    :param audio_paths: List of audio/video paths.
+    :param batch_size: Inference batch size (<= 0 sizes it to available memory).
+    :param language: Language code shared by all files, or None to detect per file.
+    :return: Dict of {input path: segments}
+    """
+    results = {}
+    if service in ("jianying", "bcut"):
+        # Cloud services: keep several files uploading/polling at once
+        asr_cls = JianYingASR if service == "jianying" else BcutASR
+        jobs = []  # (input path, asr instance)
+        for path in audio_paths:
+            try:
+                jobs.append((path, asr_cls(_extract_audio(path, output_dir), need_word_time_stamp=False)))
+            except Exception as e:
+                print(f"Failed to load {path}: {e}")
+        outputs = run_many([job[1] for job in jobs], max_concurrency=CLOUD_ASR_CONCURRENCY)
+        for (path, _), out in zip(jobs, outputs):
+            if isinstance(out, BaseException):
+                print(f"{service} ASR failed for {path}: {out}")
+            else:
+                results[path] = _cloud_segments(out)
+        return {path: results.get(path, []) for path in audio_paths}
+
+    if service != "whisperx":
+        for path in audio_paths:
+            results[path] = run_asr(path, service=service, output_dir=output_dir,
+                                    vad_onset=vad_onset, vad_offset=vad_offset,
+                                    batch_size=batch_size, language=language)
+        return results
+
+    try:
+        torch, whisperx = _import_whisperx()
+    except ImportError as e:
+        print(f"Failed to import WhisperX dependencies: {e}")
+        return {path: [] for path in audio_paths}
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    compute_type = "float16" if device == "cuda" else "int8"
+    if not batch_size or batch_size <= 0:
+        batch_size = _auto_batch_size(device)
+    print(f"Batch ASR: {len(audio_paths)} files on {device}, batch size {batch_size}", flush=True)
+
+    try:
+        model = _load_whisperx_model(whisperx, device, compute_type, language, vad_onset, vad_offset)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        print(f"Error loading WhisperX model: {e}")
+        traceback.print_exc()
+        return {path: [] for path in audio_paths}
+
+    # Load all audio; files that fail are reported individually
+    prepared = []  # (input path, resolved audio path, audio, language)
+    for path in audio_paths:
         try:
-             repaired_json_path = save_prefix + "_debug_repaired.json"
-             with open(repaired_json_path, "w", encoding="utf-8") as f:
-                 json.dump(aligned_result["segments"], f, ensure_ascii=False, indent=2)
-             print(f"Debug: Saved repaired JSON to {repaired_json_path}")
+            audio_path = _resolve_file_path(_extract_audio(path, output_dir))
+            audio = _load_audio(audio_path)
+            file_lang = language or model.detect_language(audio)
+            prepared.append((path, audio_path, audio, file_lang))
         except Exception as e:
-             print(f"Warning: Failed to save repaired debug info: {e}")
-        # -------------------------------------------
+            print(f"Failed to load {path}: {e}")
+            results[path] = []
 
+    # One combined transcription pass per language
+    by_lang = {}
+    for item in prepared:
+        by_lang.setdefault(item[3], []).append(item)
 
-        # --- DEBUG: Save Final Output (Corrected) ---
+    for lang, items in by_lang.items():
         try:
-            final_json_path = save_prefix + "_debug_final.json"
-            with open(final_json_path, "w", encoding="utf-8") as f:
-                json.dump(final_segments, f, ensure_ascii=False, indent=2)
-            print(f"Debug: Saved FINAL JSON to {final_json_path}")
+            transcripts = _transcribe_many(model, [item[2] for item in items], batch_size, lang)
         except Exception as e:
-            print(f"Warning: Failed to save final debug info: {e}")
-        # --------------------------------------------
-        
-        print(f"WhisperX processing complete. {len(final_segments)} segments.")
-        return final_segments
+            print(f"Error during batched WhisperX transcription ({lang}): {e}")
+            traceback.print_exc()
+            for item in items:
+                results[item[0]] = []
+            continue
 
-    except Exception as e:
-        print(f"Error during WhisperX ASR: {e}")
-        traceback.print_exc()
-        return []
\ No newline at end of file
+        for (path, audio_path, audio, _), segments in zip(items, transcripts):
+            try:
+                result = {"segments": segments, "language": lang}
+                results[path] = _align_and_split(whisperx, result, audio, audio_path, device, output_dir)
+                print(f"[{len(results)}/{len(audio_paths)}] {os.path.basename(path)}: {len(results[path])} segments.")
+            except Exception as e:
+                print(f"Error aligning {path}: {e}")
+                traceback.print_exc()
+                results[path] = []
+
+    del model
+    gc.collect()
+    return {path: results.get(path, []) for path in audio_paths}
+
+
+def list_audio_files(directory):
+    """
+    Audio/video files directly inside `directory`, sorted by name.
+    """
+    exts = set(AUDIO_EXTENSIONS + VIDEO_EXTENSIONS)
+    return [
+        os.path.join(directory, f) for f in sorted(os.listdir(directory))
+        if os.path.splitext(f)[1].lower() in exts
+    ]
@@ -1,11 +1,14 @@
+import asyncio
 import os
 import threading
 import time
 import uuid
 import zlib
 from io import BytesIO
-from typing import Callable, Optional, Union, cast
+from typing import Any, Callable, List, Optional, Union, cast
 
+import requests
+from requests.adapters import HTTPAdapter
 from pydub import AudioSegment
 
 # from app.core.utils.cache import get_asr_cache, is_cache_enabled
@@ -32,6 +35,56 @@ from asr_data import ASRData, ASRDataSeg
 
 logger = setup_logger("asr")
 
+# Connections kept alive per host; bounds concurrent part uploads as well
+HTTP_POOL_SIZE = 16
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide pooled HTTP session shared by cloud ASR clients."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def poll_with_backoff(
+    fetch: Callable[[], Any],
+    is_done: Callable[[Any], bool],
+    initial_interval: float = 0.5,
+    max_interval: float = 8.0,
+    factor: float = 1.5,
+    timeout: float = 600.0,
+) -> Any:
+    """Call fetch() until is_done(result), sleeping with exponential backoff.
+
+    Args:
+        fetch: Function returning the latest status
+        is_done: Predicate on fetch() result; may raise to abort polling
+        initial_interval: First sleep in seconds
+        max_interval: Upper bound for a single sleep
+        factor: Backoff multiplier
+        timeout: Total seconds before giving up
+
+    Returns:
+        The last fetch() result (check is_done again if the deadline matters)
+    """
+    deadline = time.monotonic() + timeout
+    interval = initial_interval
+    result = fetch()
+    while not is_done(result) and time.monotonic() < deadline:
+        time.sleep(min(interval, max(0.0, deadline - time.monotonic())))
+        interval = min(interval * factor, max_interval)
+        result = fetch()
+    return result
+
 
 class BaseASR:
     """Base class for ASR (Automatic Speech Recognition) implementations.
@@ -139,6 +192,16 @@ class BaseASR:
         segments = self._make_segments(resp_data)
         return ASRData(segments)
 
+    async def run_async(
+        self, callback: Optional[Callable[[int, str], None]] = None, **kwargs
+    ) -> ASRData:
+        """Run ASR without blocking the event loop.
+
+        The blocking HTTP workflow runs in a worker thread, so many files can
+        be uploaded and polled concurrently (see run_many_async).
+        """
+        return await asyncio.to_thread(self.run, callback, **kwargs)
+
     def _get_key(self) -> str:
         """Get cache key for this ASR request.
 
@@ -223,3 +286,31 @@ class BaseASR:
             tag=tag,
             expire=int(self.RATE_LIMIT_TIME_WINDOW) + 3600,
         )
+
+
+async def run_many_async(
+    asr_list: List["BaseASR"], max_concurrency: int = 4
+) -> List[Union[ASRData, BaseException]]:
+    """Run several ASR jobs with at most max_concurrency in flight.
+
+    Args:
+        asr_list: Prepared ASR instances (one per file)
+        max_concurrency: Upper bound on simultaneous jobs
+
+    Returns:
+        Results in input order; failed jobs yield their exception
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _one(asr: "BaseASR"):
+        async with semaphore:
+            return await asr.run_async()
+
+    return await asyncio.gather(*(_one(a) for a in asr_list), return_exceptions=True)
+
+
+def run_many(
+    asr_list: List["BaseASR"], max_concurrency: int = 4
+) -> List[Union[ASRData, BaseException]]:
+    """Synchronous wrapper around run_many_async."""
+    return asyncio.run(run_many_async(asr_list, max_concurrency))
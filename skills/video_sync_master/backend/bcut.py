@@ -1,20 +1,26 @@
 import json
-import time
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, List, Optional, Union
 
-import requests
-
 from asr_data import ASRDataSeg
-from base import BaseASR
+from base import BaseASR, get_http_session, poll_with_backoff
 from status import ASRStatus
 
 __version__ = "0.0.3"
 
-API_BASE_URL = "https://member.bilibili.com/x/bcut/rubick-interface"
-API_REQ_UPLOAD = API_BASE_URL + "/resource/create"
-API_COMMIT_UPLOAD = API_BASE_URL + "/resource/create/complete"
-API_CREATE_TASK = API_BASE_URL + "/task"
-API_QUERY_RESULT = API_BASE_URL + "/task/result"
+# Overridable (e.g. to point at a local stub server)
+API_BASE_URL = os.environ.get(
+    "BCUT_API_BASE_URL", "https://member.bilibili.com/x/bcut/rubick-interface"
+)
+
+# Parallel PUTs per file when uploading parts
+UPLOAD_CONCURRENCY = 4
+# Seconds to wait for the transcription task before giving up
+RESULT_TIMEOUT = 600
+
+TASK_STATE_FAILED = 3
+TASK_STATE_DONE = 4
 
 
 class BcutASR(BaseASR):
@@ -33,9 +39,11 @@ class BcutASR(BaseASR):
         audio_input: Union[str, bytes],
         use_cache: bool = True,
         need_word_time_stamp: bool = False,
+        api_base_url: Optional[str] = None,
     ):
         super().__init__(audio_input, use_cache=use_cache)
-        self.session = requests.Session()
+        self.session = get_http_session()
+        self.api_base_url = (api_base_url or API_BASE_URL).rstrip("/")
         self.task_id: Optional[str] = None
         self.__etags: List[str] = []
 
@@ -66,7 +74,9 @@ class BcutASR(BaseASR):
             }
         )
 
-        resp = requests.post(API_REQ_UPLOAD, data=payload, headers=self.headers)
+        resp = self.session.post(
+            self.api_base_url + "/resource/create", data=payload, headers=self.headers
+        )
         resp.raise_for_status()
         resp = resp.json()
         resp_data = resp["data"]
@@ -81,8 +91,20 @@ class BcutASR(BaseASR):
         self.__upload_part()
         self.__commit_upload()
 
+    def __put_part(self, clip: int) -> Optional[str]:
+        """PUT one part and return its ETag."""
+        start_range = clip * self.__per_size
+        end_range = (clip + 1) * self.__per_size
+        resp = self.session.put(
+            self.__upload_urls[clip],
+            data=self.file_binary[start_range:end_range],
+            headers=self.headers,
+        )
+        resp.raise_for_status()
+        return resp.headers.get("Etag")
+
     def __upload_part(self) -> None:
-        """Upload audio data in multiple parts."""
+        """Upload audio data in multiple parts (bounded parallelism)."""
         if (
             self.__clips is None
             or self.__per_size is None
@@ -91,18 +113,11 @@ class BcutASR(BaseASR):
         ):
             raise ValueError("Upload parameters not initialized")
 
-        for clip in range(self.__clips):
-            start_range = clip * self.__per_size
-            end_range = (clip + 1) * self.__per_size
-            resp = requests.put(
-                self.__upload_urls[clip],
-                data=self.file_binary[start_range:end_range],
-                headers=self.headers,
-            )
-            resp.raise_for_status()
-            etag = resp.headers.get("Etag")
-            if etag is not None:
-                self.__etags.append(etag)
+        workers = max(1, min(UPLOAD_CONCURRENCY, self.__clips))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() keeps part order, which the commit's ETag list relies on
+            etags = list(pool.map(self.__put_part, range(self.__clips)))
+        self.__etags.extend(etag for etag in etags if etag is not None)
 
     def __commit_upload(self) -> None:
         """Commit the upload and get download URL."""
@@ -115,15 +130,17 @@ class BcutASR(BaseASR):
                 "model_id": "8",
             }
         )
-        resp = requests.post(API_COMMIT_UPLOAD, data=data, headers=self.headers)
+        resp = self.session.post(
+            self.api_base_url + "/resource/create/complete", data=data, headers=self.headers
+        )
         resp.raise_for_status()
         resp = resp.json()
         self.__download_url = resp["data"]["download_url"]
 
     def create_task(self) -> str:
         """Create ASR task."""
-        resp = requests.post(
-            API_CREATE_TASK,
+        resp = self.session.post(
+            self.api_base_url + "/task",
             json={"resource": self.__download_url, "model_id": "8"},
             headers=self.headers,
         )
@@ -134,8 +151,8 @@ class BcutASR(BaseASR):
 
     def result(self, task_id: Optional[str] = None):
         """Query ASR result."""
-        resp = requests.get(
-            API_QUERY_RESULT,
+        resp = self.session.get(
+            self.api_base_url + "/task/result",
             params={"model_id": 7, "task_id": task_id or self.task_id},
             headers=self.headers,
         )
@@ -165,14 +182,14 @@ class BcutASR(BaseASR):
         callback(*ASRStatus.TRANSCRIBING.callback_tuple())
 
         # Poll task status until complete
-        task_resp = None
-        for _ in range(500):
-            task_resp = self.result()
-            if task_resp["state"] == 4:
-                break
-            time.sleep(1)
-
-        if task_resp is None or task_resp["state"] != 4:
+        def _is_done(task_resp: dict) -> bool:
+            if task_resp["state"] == TASK_STATE_FAILED:
+                raise RuntimeError("ASR task failed")
+            return task_resp["state"] == TASK_STATE_DONE
+
+        task_resp = poll_with_backoff(self.result, _is_done, timeout=RESULT_TIMEOUT)
+
+        if task_resp is None or task_resp["state"] != TASK_STATE_DONE:
             raise RuntimeError("ASR task failed or timeout")
 
         callback(*ASRStatus.COMPLETED.callback_tuple())
@@ -0,0 +1,129 @@
+"""
+Parity check of the in-process WSOLA stretch (time_stretch.py) against the
+ffmpeg atempo chain it replaces (alignment._align_audio_atempo).
+
+Each clip is stretched to several target durations both ways and the outputs
+are compared on length, fundamental frequency and RMS level:
+
+    python check_time_stretch.py              # synthetic voiced test tone
+    python check_time_stretch.py clip.wav ... # real TTS clips
+
+Exits with status 1 when a check fails. Without ffmpeg the atempo side is
+skipped and WSOLA is compared against the unstretched input instead.
+"""
+import os
+import sys
+import tempfile
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+import media_io
+from alignment import _align_audio_atempo
+from time_stretch import stretch_to_duration
+
+# Speed factors to check (input length / target length)
+RATES = [0.5, 0.8, 1.25, 1.6, 2.0, 2.5]
+# Allowed differences
+LENGTH_TOLERANCE_SEC = 0.05  # atempo vs target; WSOLA must be sample exact
+F0_TOLERANCE = 0.03          # relative
+RMS_TOLERANCE_DB = 1.5
+
+
+def test_tone(sr=24000, seconds=3.0, f0=140.0):
+    """Voiced-speech stand-in: harmonics of a gliding f0 under a syllable-rate envelope."""
+    t = np.arange(int(sr * seconds)) / sr
+    pitch = f0 * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    y = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)
+    return (0.2 * y * envelope).astype(np.float32), sr
+
+
+def fundamental(y, sr, fmin=60.0, fmax=400.0):
+    """Median f0 over 50 ms frames, from the autocorrelation peak (shortest lag within
+    10% of the best, which avoids octave errors)."""
+    frame = int(0.05 * sr)
+    lags = np.arange(int(sr / fmax), int(sr / fmin))
+    estimates = []
+    for start in range(0, len(y) - frame - lags[-1], frame):
+        seg = y[start:start + frame + lags[-1]]
+        head = seg[:frame]
+        if np.sqrt(np.mean(head ** 2)) < 1e-3:
+            continue
+        corr = np.array([np.dot(head, seg[lag:lag + frame]) for lag in lags])
+        best = int(np.argmax(corr >= 0.9 * corr.max()))
+        estimates.append(sr / lags[best])
+    return float(np.median(estimates)) if estimates else 0.0
+
+
+def rms_db(y):
+    return float(20 * np.log10(np.sqrt(np.mean(np.square(y))) + 1e-12))
+
+
+def measure(y, sr):
+    return {"length": len(y) / sr, "f0": fundamental(y, sr), "rms": rms_db(y)}
+
+
+def check_clip(name, y, sr, work_dir):
+    """Compare both stretch paths on one mono clip; returns the number of failures."""
+    source_path = os.path.join(work_dir, "source.wav")
+    media_io.write_pcm(source_path, y, sr)
+    y, sr = media_io.decode_audio(source_path)  # Same 16-bit input as atempo reads
+    source = measure(y, sr)
+    print(f"\n{name}: {source['length']:.2f}s, f0 {source['f0']:.1f} Hz, {source['rms']:.1f} dBFS")
+    print(f"{'rate':>5}  {'target':>7}  {'len wsola/atempo':>17}  {'f0 wsola/atempo':>16}  {'rms wsola/atempo':>17}")
+
+    failures = 0
+    for rate in RATES:
+        target = source["length"] / rate
+        wsola = measure(stretch_to_duration(y, sr, target), sr)
+
+        atempo = None
+        atempo_path = os.path.join(work_dir, f"atempo_{rate}.wav")
+        try:
+            if _align_audio_atempo(source_path, atempo_path, target):
+                atempo = measure(media_io.decode_audio(atempo_path)[0], sr)
+        except Exception as e:
+            print(f"  atempo unavailable ({e})")
+        reference = atempo or source
+
+        problems = []
+        if abs(wsola["length"] - target) > 1.0 / sr:
+            problems.append("wsola length")
+        if atempo and abs(atempo["length"] - target) > LENGTH_TOLERANCE_SEC:
+            problems.append("atempo length")
+        if abs(wsola["f0"] - reference["f0"]) > F0_TOLERANCE * reference["f0"]:
+            problems.append("f0")
+        if abs(wsola["rms"] - reference["rms"]) > RMS_TOLERANCE_DB:
+            problems.append("rms")
+        failures += bool(problems)
+
+        def pair(key, fmt):
+            other = format(atempo[key], fmt) if atempo else "-"
+            return f"{format(wsola[key], fmt)}/{other}"
+
+        status = "FAIL " + ", ".join(problems) if problems else "ok"
+        print(f"{rate:>5.2f}  {target:>6.2f}s  {pair('length', '.3f'):>17}  {pair('f0', '.1f'):>16}  "
+              f"{pair('rms', '.1f'):>17}  {status}")
+    return failures
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        if len(sys.argv) > 1:
+            for path in sys.argv[1:]:
+                y, sr = media_io.decode_audio(path)
+                failures += check_clip(os.path.basename(path), y, sr, work_dir)
+        else:
+            y, sr = test_tone()
+            failures += check_clip("test tone", y, sr, work_dir)
+    print(f"\n{'All checks passed' if not failures else f'{failures} check(s) failed'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+One-off conversion of the IndexTTS2 torch checkpoints to safetensors.
+
+IndexTTS2 loads `<name>.safetensors` instead of `<name>.pth` / `.pt` / `.bin`
+whenever it exists next to the original and is not older than it,
+memory-mapped directly onto the inference device. Run once after downloading
+the models, and again after replacing a checkpoint (stale copies are
+re-converted):
+
+    python -m indextts.convert_checkpoints --model_dir ../models/index-tts
+
+Converts the GPT and s2mel checkpoints named in config.yaml plus the CAMPPlus
+and BigVGAN weights in the Hugging Face cache (when already downloaded).
+Extra checkpoint files can be passed as positional arguments.
+"""
+import os
+import sys
+import warnings
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+
+def find_checkpoints(cfg_path, model_dir):
+    """Torch checkpoints IndexTTS2 loads for this config, skipping hub files that aren't cached."""
+    from huggingface_hub import hf_hub_download
+    from omegaconf import OmegaConf
+
+    cfg = OmegaConf.load(cfg_path)
+    paths = [
+        os.path.join(model_dir, cfg.gpt_checkpoint),
+        os.path.join(model_dir, cfg.s2mel_checkpoint),
+    ]
+    hub_files = [
+        ("funasr/campplus", "campplus_cn_common.bin"),
+        (cfg.vocoder.name, "bigvgan_generator.pt"),
+    ]
+    for repo_id, filename in hub_files:
+        if os.path.isdir(repo_id):
+            paths.append(os.path.join(repo_id, filename))
+            continue
+        try:
+            paths.append(hf_hub_download(repo_id, filename=filename, local_files_only=True))
+        except Exception as e:
+            print(f">> {repo_id}/{filename} is not downloaded yet, skipping ({e.__class__.__name__})")
+    return paths
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert IndexTTS2 checkpoints to safetensors")
+    parser.add_argument("checkpoints", nargs="*", help="Additional checkpoint files to convert")
+    parser.add_argument("-c", "--config", type=str, default=None, help="Path to the config file. Default is '<model_dir>/config.yaml'")
+    parser.add_argument("--model_dir", type=str, default="checkpoints", help="Path to the model directory. Default is 'checkpoints'")
+    parser.add_argument("-f", "--force", action="store_true", default=False, help="Overwrite existing .safetensors files")
+    args = parser.parse_args()
+
+    cfg_path = args.config or os.path.join(args.model_dir, "config.yaml")
+    if not os.path.exists(cfg_path):
+        print(f"Config file {cfg_path} does not exist.")
+        parser.print_help()
+        sys.exit(1)
+
+    # The model dir's HF cache must be set up before huggingface_hub is imported
+    from indextts import infer_v2  # noqa: F401
+    from indextts.utils.checkpoint import convert_to_safetensors, is_stale_safetensors, safetensors_path
+
+    failed = False
+    for path in find_checkpoints(cfg_path, args.model_dir) + args.checkpoints:
+        output_path = safetensors_path(path)
+        if not os.path.exists(path):
+            print(f">> {path} does not exist, skipping")
+            continue
+        if os.path.exists(output_path) and not args.force and not is_stale_safetensors(path, output_path):
+            print(f">> {output_path} already exists (use --force to overwrite)")
+            continue
+        try:
+            convert_to_safetensors(path, output_path)
+            print(f">> {path} -> {output_path}")
+        except Exception as e:
+            print(f">> Failed to convert {path}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,11 @@ print(f"Set HF_HUB_CACHE to {HF_CACHE_DIR}")
 
 import json
 import re
+import threading
 import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import librosa
 import torch
 import torchaudio
@@ -35,7 +39,7 @@ from omegaconf import OmegaConf
 
 from indextts.gpt.model_v2 import UnifiedVoice
 from indextts.utils.maskgct_utils import build_semantic_model, build_semantic_codec
-from indextts.utils.checkpoint import load_checkpoint
+from indextts.utils.checkpoint import load_checkpoint, load_state_dict_file
 from indextts.utils.front import TextNormalizer, TextTokenizer
 
 from indextts.s2mel.modules.commons import load_checkpoint2, MyModel
@@ -51,6 +55,30 @@ from transformers import SeamlessM4TFeatureExtractor
 import random
 import torch.nn.functional as F
 
+# Shortest a segment may be made by duration control (target_duration), relative to
+# its natural length; the length regulator starts to slur speech below this.
+DURATION_MIN_SCALE = float(os.environ.get("INDEXTTS_DURATION_MIN_SCALE", "0.75"))
+
+# Lazily loaded submodules: component name -> the IndexTTS2 attributes it provides.
+# Each one is built by `IndexTTS2._load_<name>()` the first time any of its attributes is used.
+COMPONENTS = {
+    "qwen_emo": ("qwen_emo",),
+    "gpt": ("gpt",),
+    "semantic_model": ("extract_features", "semantic_model", "semantic_mean", "semantic_std"),
+    "semantic_codec": ("semantic_codec",),
+    "s2mel": ("s2mel",),
+    "campplus": ("campplus_model",),
+    "bigvgan": ("bigvgan",),
+    "text_frontend": ("normalizer", "tokenizer"),
+    "emo_matrices": ("emo_matrix", "spk_matrix"),
+}
+# Everything `infer()` needs; QwenEmotion is only loaded when `use_emo_text` is set
+SYNTHESIS_COMPONENTS = [name for name in COMPONENTS if name != "qwen_emo"]
+_COMPONENT_OF_ATTR = {attr: name for name, attrs in COMPONENTS.items() for attr in attrs}
+# Threads used by warmup() to load independent components concurrently
+LOAD_WORKERS = int(os.environ.get("INDEXTTS_LOAD_WORKERS", "4"))
+
+
 class IndexTTS2:
     def __init__(
             self, cfg_path="checkpoints/config.yaml", model_dir="checkpoints", use_fp16=False, device=None,
@@ -95,22 +123,106 @@ class IndexTTS2:
         self.stop_mel_token = self.cfg.gpt.stop_mel_token
         self.use_accel = use_accel
         self.use_torch_compile = use_torch_compile
+        self.use_deepspeed = use_deepspeed
 
         qwen_path = os.path.join(self.model_dir, self.cfg.qwen_emo_path)
         # Fix for transformers identifying path as Repo ID if it has trailing slashes on Windows
-        qwen_path = os.path.normpath(qwen_path).rstrip(os.sep)
-        self.qwen_emo = QwenEmotion(qwen_path)
-
-        self.gpt = UnifiedVoice(**self.cfg.gpt, use_accel=self.use_accel)
+        self.qwen_path = os.path.normpath(qwen_path).rstrip(os.sep)
         self.gpt_path = os.path.join(self.model_dir, self.cfg.gpt_checkpoint)
-        load_checkpoint(self.gpt, self.gpt_path)
-        self.gpt = self.gpt.to(self.device)
+        self.s2mel_path = os.path.join(self.model_dir, self.cfg.s2mel_checkpoint)
+        self.bpe_path = os.path.join(self.model_dir, self.cfg.dataset["bpe_model"])
+        self.glossary_path = os.path.join(self.model_dir, "glossary.yaml")
+        self.emo_num = list(self.cfg.emo_num)
+
+        # Submodules are built on first access (or by warmup()), see COMPONENTS.
+        # component name -> seconds it took to load
+        self.load_times = {}
+        self._load_locks = {name: threading.Lock() for name in COMPONENTS}
+
+        mel_fn_args = {
+            "n_fft": self.cfg.s2mel['preprocess_params']['spect_params']['n_fft'],
+            "win_size": self.cfg.s2mel['preprocess_params']['spect_params']['win_length'],
+            "hop_size": self.cfg.s2mel['preprocess_params']['spect_params']['hop_length'],
+            "num_mels": self.cfg.s2mel['preprocess_params']['spect_params']['n_mels'],
+            "sampling_rate": self.cfg.s2mel["preprocess_params"]["sr"],
+            "fmin": self.cfg.s2mel['preprocess_params']['spect_params'].get('fmin', 0),
+            "fmax": None if self.cfg.s2mel['preprocess_params']['spect_params'].get('fmax', "None") == "None" else 8000,
+            "center": False
+        }
+        self.mel_fn = lambda x: mel_spectrogram(x, **mel_fn_args)
+
+        # 缓存参考音频：
+        self.cache_spk_cond = None
+        self.cache_s2mel_style = None
+        self.cache_s2mel_prompt = None
+        self.cache_spk_audio_prompt = None
+        self.cache_emo_cond = None
+        self.cache_emo_audio_prompt = None
+        self.cache_mel = None
+
+        # 进度引用显示（可选）
+        self.gr_progress = None
+        self.model_version = self.cfg.version if hasattr(self.cfg, "version") else None
+
+    def __getattr__(self, name):
+        # only reached for attributes that are not set yet, i.e. components not loaded so far
+        component = _COMPONENT_OF_ATTR.get(name)
+        if component is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self._load_component(component)
+        return self.__dict__[name]
+
+    def warmup(self, components=None, max_workers=LOAD_WORKERS):
+        """
+        Load submodules now instead of on first use.
+        Args:
+            components (None | list[str]): names from `COMPONENTS` to load. None loads
+                everything plain synthesis needs (`SYNTHESIS_COMPONENTS`).
+            max_workers (int): components are independent, so up to this many load
+                concurrently (checkpoint reads and deserialization release the GIL).
+        Returns:
+            dict: load time in seconds of each requested component.
+        """
+        if components is None:
+            components = SYNTHESIS_COMPONENTS
+        unknown = [name for name in components if name not in COMPONENTS]
+        if unknown:
+            raise ValueError(f"Unknown IndexTTS2 components: {unknown}. Available: {list(COMPONENTS)}")
+        pending = [name for name in components if name not in self.load_times]
+        if len(pending) > 1 and max_workers > 1:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+                # list() re-raises the first loader error
+                list(pool.map(self._load_component, pending))
+            print(f">> {len(pending)} components loaded in {time.perf_counter() - start:.2f}s")
+        else:
+            for name in pending:
+                self._load_component(name)
+        return {name: self.load_times[name] for name in components}
+
+    def _load_component(self, name):
+        with self._load_locks[name]:
+            if name in self.load_times:
+                return
+            start = time.perf_counter()
+            getattr(self, f"_load_{name}")()
+            self.load_times[name] = time.perf_counter() - start
+        print(f">> [{name}] loaded in {self.load_times[name]:.2f}s")
+
+    def _load_qwen_emo(self):
+        self.qwen_emo = QwenEmotion(self.qwen_path)
+
+    def _load_gpt(self):
+        # move the empty model first, so the weights are read straight onto the device
+        gpt = UnifiedVoice(**self.cfg.gpt, use_accel=self.use_accel).to(self.device)
+        load_checkpoint(gpt, self.gpt_path, device=self.device)
         if self.use_fp16:
-            self.gpt.eval().half()
+            gpt.eval().half()
         else:
-            self.gpt.eval()
+            gpt.eval()
         print(">> GPT weights restored from:", self.gpt_path)
 
+        use_deepspeed = self.use_deepspeed
         if use_deepspeed:
             try:
                 import deepspeed
@@ -118,120 +230,101 @@ class IndexTTS2:
                 use_deepspeed = False
                 print(f">> Failed to load DeepSpeed. Falling back to normal inference. Error: {e}")
 
-        self.gpt.post_init_gpt2_config(use_deepspeed=use_deepspeed, kv_cache=True, half=self.use_fp16)
+        gpt.post_init_gpt2_config(use_deepspeed=use_deepspeed, kv_cache=True, half=self.use_fp16)
+        self.gpt = gpt
 
-        if self.use_cuda_kernel:
-            # preload the CUDA kernel for BigVGAN
-            try:
-                from indextts.s2mel.modules.bigvgan.alias_free_activation.cuda import activation1d
-
-                print(">> Preload custom CUDA kernel for BigVGAN", activation1d.anti_alias_activation_cuda)
-            except Exception as e:
-                print(">> Failed to load custom CUDA kernel for BigVGAN. Falling back to torch.")
-                print(f"{e!r}")
-                self.use_cuda_kernel = False
-
-        self.extract_features = SeamlessM4TFeatureExtractor.from_pretrained("facebook/w2v-bert-2.0")
-        self.semantic_model, self.semantic_mean, self.semantic_std = build_semantic_model(
+    def _load_semantic_model(self):
+        extract_features = SeamlessM4TFeatureExtractor.from_pretrained("facebook/w2v-bert-2.0")
+        semantic_model, semantic_mean, semantic_std = build_semantic_model(
             os.path.join(self.model_dir, self.cfg.w2v_stat))
-        self.semantic_model = self.semantic_model.to(self.device)
-        self.semantic_model.eval()
-        self.semantic_mean = self.semantic_mean.to(self.device)
-        self.semantic_std = self.semantic_std.to(self.device)
-
+        semantic_model = semantic_model.to(self.device)
+        semantic_model.eval()
+        self.semantic_mean = semantic_mean.to(self.device)
+        self.semantic_std = semantic_std.to(self.device)
+        self.semantic_model = semantic_model
+        self.extract_features = extract_features
+
+    def _load_semantic_codec(self):
         semantic_codec = build_semantic_codec(self.cfg.semantic_codec)
         semantic_code_ckpt = hf_hub_download("amphion/MaskGCT", filename="semantic_codec/model.safetensors")
-        safetensors.torch.load_model(semantic_codec, semantic_code_ckpt)
-        self.semantic_codec = semantic_codec.to(self.device)
-        self.semantic_codec.eval()
+        semantic_codec = semantic_codec.to(self.device)
+        safetensors.torch.load_model(semantic_codec, semantic_code_ckpt, device=str(self.device))
+        semantic_codec.eval()
+        self.semantic_codec = semantic_codec
         print('>> semantic_codec weights restored from: {}'.format(semantic_code_ckpt))
 
-        s2mel_path = os.path.join(self.model_dir, self.cfg.s2mel_checkpoint)
-        s2mel = MyModel(self.cfg.s2mel, use_gpt_latent=True)
+    def _load_s2mel(self):
+        s2mel = MyModel(self.cfg.s2mel, use_gpt_latent=True).to(self.device)
         s2mel, _, _, _ = load_checkpoint2(
             s2mel,
             None,
-            s2mel_path,
+            self.s2mel_path,
             load_only_params=True,
             ignore_modules=[],
             is_distributed=False,
+            device=self.device,
         )
-        self.s2mel = s2mel.to(self.device)
-        self.s2mel.models['cfm'].estimator.setup_caches(max_batch_size=1, max_seq_length=8192)
-        
+        s2mel.models['cfm'].estimator.setup_caches(max_batch_size=1, max_seq_length=8192)
+
         # Enable torch.compile optimization if requested
         if self.use_torch_compile:
             print(">> Enabling torch.compile optimization")
-            self.s2mel.enable_torch_compile()
+            s2mel.enable_torch_compile()
             print(">> torch.compile optimization enabled successfully")
-        
-        self.s2mel.eval()
-        print(">> s2mel weights restored from:", s2mel_path)
 
-        # load campplus_model
+        s2mel.eval()
+        self.s2mel = s2mel
+        print(">> s2mel weights restored from:", self.s2mel_path)
+
+    def _load_campplus(self):
         campplus_ckpt_path = hf_hub_download(
             "funasr/campplus", filename="campplus_cn_common.bin"
         )
-        campplus_model = CAMPPlus(feat_dim=80, embedding_size=192)
-        campplus_model.load_state_dict(torch.load(campplus_ckpt_path, map_location="cpu"))
-        self.campplus_model = campplus_model.to(self.device)
-        self.campplus_model.eval()
+        campplus_model = CAMPPlus(feat_dim=80, embedding_size=192).to(self.device)
+        campplus_model.load_state_dict(load_state_dict_file(campplus_ckpt_path, self.device))
+        campplus_model.eval()
+        self.campplus_model = campplus_model
         print(">> campplus_model weights restored from:", campplus_ckpt_path)
 
+    def _load_bigvgan(self):
+        if self.use_cuda_kernel:
+            # preload the CUDA kernel for BigVGAN
+            try:
+                from indextts.s2mel.modules.bigvgan.alias_free_activation.cuda import activation1d
+
+                print(">> Preload custom CUDA kernel for BigVGAN", activation1d.anti_alias_activation_cuda)
+            except Exception as e:
+                print(">> Failed to load custom CUDA kernel for BigVGAN. Falling back to torch.")
+                print(f"{e!r}")
+                self.use_cuda_kernel = False
+
         bigvgan_name = self.cfg.vocoder.name
-        self.bigvgan = bigvgan.BigVGAN.from_pretrained(bigvgan_name, use_cuda_kernel=self.use_cuda_kernel)
-        self.bigvgan = self.bigvgan.to(self.device)
-        self.bigvgan.remove_weight_norm()
-        self.bigvgan.eval()
+        vocoder = bigvgan.BigVGAN.from_pretrained(bigvgan_name, use_cuda_kernel=self.use_cuda_kernel)
+        vocoder = vocoder.to(self.device)
+        vocoder.remove_weight_norm()
+        vocoder.eval()
+        self.bigvgan = vocoder
         print(">> bigvgan weights restored from:", bigvgan_name)
 
-        self.bpe_path = os.path.join(self.model_dir, self.cfg.dataset["bpe_model"])
-        self.normalizer = TextNormalizer(enable_glossary=True)
-        self.normalizer.load()
+    def _load_text_frontend(self):
+        normalizer = TextNormalizer(enable_glossary=True)
+        normalizer.load()
         print(">> TextNormalizer loaded")
-        self.tokenizer = TextTokenizer(self.bpe_path, self.normalizer)
+        tokenizer = TextTokenizer(self.bpe_path, normalizer)
         print(">> bpe model loaded from:", self.bpe_path)
 
         # 加载术语词汇表（如果存在）
-        self.glossary_path = os.path.join(self.model_dir, "glossary.yaml")
         if os.path.exists(self.glossary_path):
-            self.normalizer.load_glossary_from_yaml(self.glossary_path)
+            normalizer.load_glossary_from_yaml(self.glossary_path)
             print(">> Glossary loaded from:", self.glossary_path)
+        self.normalizer = normalizer
+        self.tokenizer = tokenizer
 
+    def _load_emo_matrices(self):
         emo_matrix = torch.load(os.path.join(self.model_dir, self.cfg.emo_matrix))
-        self.emo_matrix = emo_matrix.to(self.device)
-        self.emo_num = list(self.cfg.emo_num)
-
         spk_matrix = torch.load(os.path.join(self.model_dir, self.cfg.spk_matrix))
-        self.spk_matrix = spk_matrix.to(self.device)
-
-        self.emo_matrix = torch.split(self.emo_matrix, self.emo_num)
-        self.spk_matrix = torch.split(self.spk_matrix, self.emo_num)
-
-        mel_fn_args = {
-            "n_fft": self.cfg.s2mel['preprocess_params']['spect_params']['n_fft'],
-            "win_size": self.cfg.s2mel['preprocess_params']['spect_params']['win_length'],
-            "hop_size": self.cfg.s2mel['preprocess_params']['spect_params']['hop_length'],
-            "num_mels": self.cfg.s2mel['preprocess_params']['spect_params']['n_mels'],
-            "sampling_rate": self.cfg.s2mel["preprocess_params"]["sr"],
-            "fmin": self.cfg.s2mel['preprocess_params']['spect_params'].get('fmin', 0),
-            "fmax": None if self.cfg.s2mel['preprocess_params']['spect_params'].get('fmax', "None") == "None" else 8000,
-            "center": False
-        }
-        self.mel_fn = lambda x: mel_spectrogram(x, **mel_fn_args)
-
-        # 缓存参考音频：
-        self.cache_spk_cond = None
-        self.cache_s2mel_style = None
-        self.cache_s2mel_prompt = None
-        self.cache_spk_audio_prompt = None
-        self.cache_emo_cond = None
-        self.cache_emo_audio_prompt = None
-        self.cache_mel = None
-
-        # 进度引用显示（可选）
-        self.gr_progress = None
-        self.model_version = self.cfg.version if hasattr(self.cfg, "version") else None
+        self.emo_matrix = torch.split(emo_matrix.to(self.device), self.emo_num)
+        self.spk_matrix = torch.split(spk_matrix.to(self.device), self.emo_num)
 
     @torch.no_grad()
     def get_emb(self, input_features, attention_mask):
@@ -377,14 +470,21 @@ class IndexTTS2:
               emo_audio_prompt=None, emo_alpha=1.0,
               emo_vector=None,
               use_emo_text=False, emo_text=None, use_random=False, interval_silence=200,
-              verbose=False, max_text_tokens_per_segment=120, stream_return=False, more_segment_before=0, **generation_kwargs):
+              verbose=False, max_text_tokens_per_segment=120, stream_return=False, more_segment_before=0,
+              target_duration=None, **generation_kwargs):
+        """
+        :param target_duration: Seconds the generated speech should fit into. Speech that
+            would run longer is sped up in the s2mel length regulator (at most down to
+            DURATION_MIN_SCALE of its natural length); whatever remains is up to the caller.
+        """
         if stream_return:
             return self.infer_generator(
                 spk_audio_prompt, text, output_path,
                 emo_audio_prompt, emo_alpha,
                 emo_vector,
                 use_emo_text, emo_text, use_random, interval_silence,
-                verbose, max_text_tokens_per_segment, stream_return, more_segment_before, **generation_kwargs
+                verbose, max_text_tokens_per_segment, stream_return, more_segment_before,
+                target_duration=target_duration, **generation_kwargs
             )
         else:
             try:
@@ -393,7 +493,8 @@ class IndexTTS2:
                     emo_audio_prompt, emo_alpha,
                     emo_vector,
                     use_emo_text, emo_text, use_random, interval_silence,
-                    verbose, max_text_tokens_per_segment, stream_return, more_segment_before, **generation_kwargs
+                    verbose, max_text_tokens_per_segment, stream_return, more_segment_before,
+                    target_duration=target_duration, **generation_kwargs
                 ))[0]
             except IndexError:
                 return None
@@ -402,7 +503,8 @@ class IndexTTS2:
               emo_audio_prompt=None, emo_alpha=1.0,
               emo_vector=None,
               use_emo_text=False, emo_text=None, use_random=False, interval_silence=200,
-              verbose=False, max_text_tokens_per_segment=120, stream_return=False, quick_streaming_tokens=0, **generation_kwargs):
+              verbose=False, max_text_tokens_per_segment=120, stream_return=False, quick_streaming_tokens=0,
+              target_duration=None, **generation_kwargs):
         print(">> starting inference...")
         self._set_gr_progress(0, "starting inference...")
         if verbose:
@@ -410,6 +512,8 @@ class IndexTTS2:
                   f"emo_audio_prompt:{emo_audio_prompt}, emo_alpha:{emo_alpha}, "
                   f"emo_vector:{emo_vector}, use_emo_text:{use_emo_text}, "
                   f"emo_text:{emo_text}")
+        # load whatever is still missing up front, so it is not counted as inference time
+        self.warmup()
         start_time = time.perf_counter()
 
         if use_emo_text or emo_vector is not None:
@@ -546,6 +650,15 @@ class IndexTTS2:
         inference_cfg_rate = generation_kwargs.pop("inference_cfg_rate", 0.7)
         sampling_rate = 22050
 
+        # Duration control: mel frames left for speech once the silences between segments
+        # are taken out, shared by the segments in proportion to their text tokens
+        speech_frames_budget = None
+        if target_duration:
+            hop_length = self.cfg.s2mel['preprocess_params']['spect_params']['hop_length']
+            silence_sec = (segments_count - 1) * max(0, interval_silence) / 1000.0
+            speech_frames_budget = max(0.0, target_duration - silence_sec) * sampling_rate / hop_length
+            total_text_tokens = max(1, sum(len(sent) for sent in segments))
+
         wavs = []
         gpt_gen_time = 0
         gpt_forward_time = 0
@@ -661,6 +774,13 @@ class IndexTTS2:
                     S_infer = S_infer.transpose(1, 2)
                     S_infer = S_infer + latent
                     target_lengths = (code_lens * 1.72).long()
+                    if speech_frames_budget is not None:
+                        natural_len = target_lengths[0].item()
+                        scale = duration_scale(natural_len, speech_frames_budget * len(sent) / total_text_tokens)
+                        if scale < 1.0:
+                            target_lengths = (target_lengths.float() * scale).long().clamp(min=1)
+                            if verbose:
+                                print(f"duration control: {natural_len} -> {target_lengths[0].item()} mel frames")
 
                     cond = self.s2mel.models['length_regulator'](S_infer,
                                                                  ylens=target_lengths,
@@ -728,6 +848,16 @@ class IndexTTS2:
             yield (sampling_rate, wav_data)
 
 
+def duration_scale(natural_frames, budget_frames):
+    """
+    Factor for the length regulator target so `natural_frames` fit into `budget_frames`.
+    Speech is only ever shortened, and by no more than DURATION_MIN_SCALE.
+    """
+    if natural_frames <= 0 or budget_frames >= natural_frames:
+        return 1.0
+    return max(DURATION_MIN_SCALE, budget_frames / natural_frames)
+
+
 def find_most_similar_cosine(query_vector, matrix):
     query_vector = query_vector.float()
     matrix = matrix.float()
@@ -737,9 +867,18 @@ def find_most_similar_cosine(query_vector, matrix):
     return most_similar_index
 
 class QwenEmotion:
+    # emotion vectors kept per instance, keyed by normalized text
+    cache_size = 4096
+    # prompts per generate() call in inference_many()
+    batch_size = 16
+
     def __init__(self, model_dir):
         self.model_dir = model_dir
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        # batched generation with a decoder-only model needs the padding on the left
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model = AutoModelForCausalLM.from_pretrained(
             self.model_dir,
             torch_dtype="float16",  # "auto"
@@ -773,6 +912,7 @@ class QwenEmotion:
         }
         self.max_score = 1.2
         self.min_score = 0.0
+        self._cache = OrderedDict()
 
     def clamp_score(self, value):
         return max(self.min_score, min(self.max_score, value))
@@ -795,28 +935,87 @@ class QwenEmotion:
 
         return emotion_dict
 
+    @staticmethod
+    def normalize_text(text):
+        # identical lines that only differ in width forms or spacing share one cache entry
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
     def inference(self, text_input):
-        start = time.time()
-        messages = [
-            {"role": "system", "content": f"{self.prompt}"},
-            {"role": "user", "content": f"{text_input}"}
+        return self.inference_many([text_input])[0]
+
+    def inference_many(self, texts, batch_size=None):
+        """
+        Emotion vectors for several texts, e.g. every subtitle line of a job.
+        Texts already seen (after normalization) come from the cache; the rest
+        are classified in padded batches of `batch_size` prompts.
+        Returns:
+            list[dict]: one emotion dictionary per text, in input order.
+        """
+        batch_size = batch_size or self.batch_size
+        keys = [self.normalize_text(text) for text in texts]
+        # the normalized text is only the cache key; the model is prompted with the
+        # first original text seen for it, exactly as inference() would send it
+        originals = {}
+        for key, text in zip(keys, texts):
+            originals.setdefault(key, text)
+        pending = [key for key in originals if key not in self._cache]
+        if pending:
+            start = time.perf_counter()
+            # similar lengths in one batch keep the padding small
+            pending.sort(key=lambda key: len(originals[key]))
+            for i in range(0, len(pending), batch_size):
+                batch = pending[i:i + batch_size]
+                for key, content in zip(batch, self._generate([originals[key] for key in batch])):
+                    self._cache_put(key, content)
+            print(f">> QwenEmotion classified {len(pending)} texts in {time.perf_counter() - start:.2f}s "
+                  f"({len(texts) - len(pending)} cached)")
+        results = []
+        for key in keys:
+            content = self._cache.get(key)
+            if content is None:
+                # evicted while classifying a batch larger than the cache
+                content = self._generate([originals[key]])[0]
+                self._cache_put(key, content)
+            else:
+                self._cache.move_to_end(key)
+            results.append(dict(content))
+        return results
+
+    def _cache_put(self, key, content):
+        self._cache[key] = content
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _generate(self, text_inputs):
+        prompts = [
+            self.tokenizer.apply_chat_template(
+                [
+                    {"role": "system", "content": f"{self.prompt}"},
+                    {"role": "user", "content": f"{text_input}"}
+                ],
+                tokenize=False,
+                add_generation_prompt=True,
+                enable_thinking=False,
+            )
+            for text_input in text_inputs
         ]
-        text = self.tokenizer.apply_chat_template(
-            messages,
-            tokenize=False,
-            add_generation_prompt=True,
-            enable_thinking=False,
-        )
-        model_inputs = self.tokenizer([text], return_tensors="pt").to(self.model.device)
+        model_inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
 
         # conduct text completion
         generated_ids = self.model.generate(
             **model_inputs,
             max_new_tokens=32768,
-            pad_token_id=self.tokenizer.eos_token_id
+            pad_token_id=self.tokenizer.pad_token_id
         )
-        output_ids = generated_ids[0][len(model_inputs.input_ids[0]):].tolist()
+        # left padding: every prompt ends at the same position
+        prompt_len = model_inputs.input_ids.shape[1]
+        return [
+            self._parse_output(output_ids[prompt_len:].tolist(), text_input)
+            for output_ids, text_input in zip(generated_ids, text_inputs)
+        ]
 
+    def _parse_output(self, output_ids, text_input):
         # parsing thinking content
         try:
             # rindex finding 151668 (</think>)
@@ -849,7 +1048,6 @@ class QwenEmotion:
 
         return self.convert(content)
 
-
 if __name__ == "__main__":
     prompt_wav = "examples/voice_01.wav"
     text = '欢迎大家来体验indextts2，并给予我们意见与反馈，谢谢大家。'
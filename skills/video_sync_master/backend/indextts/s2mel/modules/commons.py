@@ -8,6 +8,8 @@ import json
 import argparse
 from torch.nn.parallel import DistributedDataParallel as DDP
 
+from indextts.utils.checkpoint import load_state_dict_file
+
 def str2bool(v):
     if isinstance(v, bool):
         return v
@@ -584,8 +586,9 @@ def load_checkpoint2(
     ignore_modules=[],
     is_distributed=False,
     load_ema=False,
+    device="cpu",
 ):
-    state = torch.load(path, map_location="cpu")
+    state = load_state_dict_file(path, device)
     params = state["net"]
     if load_ema and "ema" in state:
         print("Loading EMA")
@@ -18,12 +18,101 @@ import os
 import re
 from collections import OrderedDict
 
+import safetensors.torch
 import torch
 import yaml
 
+# Nesting separator used when a checkpoint dict is flattened into safetensors;
+# parameter names contain '.', but never '/'.
+SAFETENSORS_SEP = '/'
 
-def load_checkpoint(model: torch.nn.Module, model_pth: str) -> dict:
-    checkpoint = torch.load(model_pth, map_location='cpu')
+
+def safetensors_path(model_pth: str) -> str:
+    """Path of the safetensors copy of `model_pth` (same name, .safetensors suffix)."""
+    return os.path.splitext(model_pth)[0] + '.safetensors'
+
+
+def flatten_state_dict(state: dict, prefix: str = '') -> dict:
+    """Flatten nested dicts of tensors ({'net': {'cfm': {...}}}) into {'net/cfm/...': tensor}.
+
+    Non-tensor entries (optimizer state, epoch counters, ...) are dropped.
+    """
+    flat = {}
+    for key, value in state.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten_state_dict(value, name + SAFETENSORS_SEP))
+        elif isinstance(value, torch.Tensor):
+            flat[name] = value
+        else:
+            logging.info(f'skipping non-tensor checkpoint entry {name}')
+    return flat
+
+
+def unflatten_state_dict(flat: dict) -> dict:
+    state = {}
+    for name, tensor in flat.items():
+        *parents, key = name.split(SAFETENSORS_SEP)
+        node = state
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = tensor
+    return state
+
+
+def convert_to_safetensors(model_pth: str, output_path: str = None) -> str:
+    """Write the tensors of a torch checkpoint to a safetensors file, which
+    `load_state_dict_file` then prefers over the original."""
+    output_path = output_path or safetensors_path(model_pth)
+    flat = flatten_state_dict(torch.load(model_pth, map_location='cpu'))
+    # safetensors refuses tensors that share storage (tied weights), so give every tensor its own
+    seen = set()
+    for name, tensor in flat.items():
+        tensor = tensor.contiguous()
+        key = (tensor.untyped_storage().data_ptr(), tensor.storage_offset())
+        if key in seen or tensor.untyped_storage().nbytes() != tensor.nbytes:
+            tensor = tensor.clone()
+        seen.add(key)
+        flat[name] = tensor
+    safetensors.torch.save_file(flat, output_path)
+    return output_path
+
+
+def is_stale_safetensors(model_pth: str, st_path: str) -> bool:
+    """True when the checkpoint at `model_pth` is newer than its safetensors copy."""
+    return os.path.exists(model_pth) and os.path.getmtime(st_path) < os.path.getmtime(model_pth)
+
+
+def load_state_dict_file(model_pth: str, device='cpu') -> dict:
+    """Load a checkpoint dict onto `device`.
+
+    A .safetensors file (or the .safetensors copy next to a .pth, see
+    `convert_to_safetensors`) is memory-mapped and materialized straight on
+    `device`; otherwise the file is read with torch.load, memory-mapped
+    when the torch version and file format allow it. A copy older than its
+    .pth is stale (the checkpoint was replaced) and is ignored.
+    """
+    if model_pth.endswith('.safetensors'):
+        st_path = model_pth
+    else:
+        st_path = safetensors_path(model_pth)
+        if os.path.exists(st_path) and is_stale_safetensors(model_pth, st_path):
+            print(f">> {st_path} is older than {model_pth}, loading the latter; "
+                  f"re-run indextts.convert_checkpoints to refresh it")
+            st_path = None
+    if st_path and os.path.exists(st_path):
+        return unflatten_state_dict(safetensors.torch.load_file(st_path, device=str(device)))
+    try:
+        return torch.load(model_pth, map_location=device, mmap=True)
+    except (TypeError, RuntimeError):
+        # torch < 2.1 has no mmap, and legacy (non-zip) checkpoints can't be mapped
+        return torch.load(model_pth, map_location=device)
+
+
+def load_checkpoint(model: torch.nn.Module, model_pth: str, device='cpu') -> dict:
+    """Load weights into `model`; pass the device the model already lives on
+    to skip the round trip through CPU memory."""
+    checkpoint = load_state_dict_file(model_pth, device)
     checkpoint = checkpoint['model'] if 'model' in checkpoint else checkpoint
     model.load_state_dict(checkpoint, strict=True)
     info_path = re.sub('.pth$', '.yaml', model_pth)
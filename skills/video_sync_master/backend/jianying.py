@@ -13,9 +13,18 @@ import requests
 VERSION = "v1.4.0"
 
 from asr_data import ASRDataSeg
-from base import BaseASR
+from base import BaseASR, get_http_session, poll_with_backoff
 from status import ASRStatus
 
+# Overridable (e.g. to point at a local stub server)
+API_HOST = os.environ.get("JIANYING_API_HOST", "https://lv-pc-api-sinfonlinec.ulikecam.com")
+SIGN_URL = os.environ.get("JIANYING_SIGN_URL", "https://asrtools-update.bkfeng.top/sign")
+VOD_URL = os.environ.get("JIANYING_VOD_URL", "https://vod.bytedanceapi.com/")
+UPLOAD_SCHEME = os.environ.get("JIANYING_UPLOAD_SCHEME", "https")
+
+# Seconds to wait for the subtitle task before giving up
+QUERY_TIMEOUT = 600
+
 
 class JianYingASR(BaseASR):
     """JianYing (CapCut) ASR API implementation.
@@ -32,6 +41,7 @@ class JianYingASR(BaseASR):
         end_time: float = 6000,
     ):
         super().__init__(audio_input, use_cache)
+        self.session = get_http_session()
         self.audio_input = audio_input
         self.end_time = end_time
         self.start_time = start_time
@@ -53,7 +63,7 @@ class JianYingASR(BaseASR):
 
     def submit(self) -> str:
         """Submit the task"""
-        url = "https://lv-pc-api-sinfonlinec.ulikecam.com/lv/v1/audio_subtitle/submit"
+        url = API_HOST + "/lv/v1/audio_subtitle/submit"
         payload = {
             "adjust_endtime": 200,
             "audio": self.store_uri,
@@ -70,7 +80,7 @@ class JianYingASR(BaseASR):
             url="/lv/v1/audio_subtitle/submit", pf="4", appvr="6.6.0", tdid=self.tdid
         )
         headers = self._build_headers(device_time, sign)
-        response = requests.post(url, json=payload, headers=headers)
+        response = self.session.post(url, json=payload, headers=headers)
         resp_data = response.json()
 
         if resp_data.get("ret") != "0":
@@ -91,13 +101,13 @@ class JianYingASR(BaseASR):
 
     def query(self, query_id: str):
         """Query the task"""
-        url = "https://lv-pc-api-sinfonlinec.ulikecam.com/lv/v1/audio_subtitle/query"
+        url = API_HOST + "/lv/v1/audio_subtitle/query"
         payload = {"id": query_id, "pack_options": {"need_attribute": True}}
         sign, device_time = self._generate_sign_parameters(
             url="/lv/v1/audio_subtitle/query", pf="4", appvr="6.6.0", tdid=self.tdid
         )
         headers = self._build_headers(device_time, sign)
-        response = requests.post(url, json=payload, headers=headers)
+        response = self.session.post(url, json=payload, headers=headers)
         resp_data = response.json()
 
         if resp_data.get("ret") != "0":
@@ -123,7 +133,16 @@ class JianYingASR(BaseASR):
 
         if callback:
             callback(*ASRStatus.QUERYING_RESULT.with_progress(60))
-        resp_data = self.query(query_id)
+        # The task may still be running right after submit; poll until utterances arrive
+        resp_data = poll_with_backoff(
+            lambda: self.query(query_id),
+            lambda resp: "utterances" in (resp.get("data") or {}),
+            timeout=QUERY_TIMEOUT,
+        )
+
+        # Never hand an incomplete response back: BaseASR.run would cache it
+        if resp_data is None or "utterances" not in (resp_data.get("data") or {}):
+            raise RuntimeError("ASR task failed or timeout")
 
         if callback:
             callback(*ASRStatus.COMPLETED.callback_tuple())
@@ -175,9 +194,9 @@ class JianYingASR(BaseASR):
             "t": current_time,
         }
         # Replace with your actual endpoint URL
-        get_sign_url = "https://asrtools-update.bkfeng.top/sign"
+        get_sign_url = SIGN_URL
         try:
-            response = requests.post(get_sign_url, json=data, headers=headers)
+            response = self.session.post(get_sign_url, json=data, headers=headers)
             response.raise_for_status()
             response_data = response.json()
             sign = response_data.get("sign")
@@ -215,13 +234,13 @@ class JianYingASR(BaseASR):
 
     def _upload_sign(self):
         """Get upload sign"""
-        url = "https://lv-pc-api-sinfonlinec.ulikecam.com/lv/v1/upload_sign"
+        url = API_HOST + "/lv/v1/upload_sign"
         payload = json.dumps({"biz": "pc-recognition"})
         sign, device_time = self._generate_sign_parameters(
             url="/lv/v1/upload_sign", pf="4", appvr="6.6.0", tdid=self.tdid
         )
         headers = self._build_headers(device_time, sign)
-        response = requests.post(url, data=payload, headers=headers)
+        response = self.session.post(url, data=payload, headers=headers)
         response.raise_for_status()
         login_data = response.json()
         self.access_key = login_data["data"]["access_key_id"]
@@ -248,8 +267,8 @@ class JianYingASR(BaseASR):
         )
         authorization = f"AWS4-HMAC-SHA256 Credential={self.access_key}/{datestamp}/cn/vod/aws4_request, SignedHeaders=x-amz-date;x-amz-security-token, Signature={signature}"
         headers["authorization"] = authorization
-        response = requests.get(
-            f"https://vod.bytedanceapi.com/?{request_parameters}", headers=headers
+        response = self.session.get(
+            f"{VOD_URL}?{request_parameters}", headers=headers
         )
         store_infos = response.json()
 
@@ -269,27 +288,27 @@ class JianYingASR(BaseASR):
 
     def _upload_file(self):
         """Upload the file"""
-        url = f"https://{self.upload_hosts}/{self.store_uri}?partNumber=1&uploadID={self.upload_id}"
+        url = f"{UPLOAD_SCHEME}://{self.upload_hosts}/{self.store_uri}?partNumber=1&uploadID={self.upload_id}"
         headers = self._uplosd_headers()
-        response = requests.put(url, data=self.file_binary, headers=headers)
+        response = self.session.put(url, data=self.file_binary, headers=headers)
         resp_data = response.json()
         assert resp_data["success"] == 0, f"File upload failed: {response.text}"
         return resp_data
 
     def _upload_check(self):
         """Check upload result"""
-        url = f"https://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}"
+        url = f"{UPLOAD_SCHEME}://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}"
         payload = f"1:{self.crc32_hex}"
         headers = self._uplosd_headers()
-        response = requests.post(url, data=payload, headers=headers)
+        response = self.session.post(url, data=payload, headers=headers)
         resp_data = response.json()
         return resp_data
 
     def _upload_commit(self):
         """Commit the uploaded file"""
-        url = f"https://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}&partNumber=1&x-amz-security-token={self.session_token}"
+        url = f"{UPLOAD_SCHEME}://{self.upload_hosts}/{self.store_uri}?uploadID={self.upload_id}&partNumber=1&x-amz-security-token={self.session_token}"
         headers = self._uplosd_headers()
-        requests.put(url, data=self.file_binary, headers=headers)
+        self.session.put(url, data=self.file_binary, headers=headers)
         return self.store_uri
 
 
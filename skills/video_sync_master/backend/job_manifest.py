@@ -0,0 +1,147 @@
+"""
+Per-job manifest for resumable dubbing.
+
+`dub_video` records every segment's progress in `<basename>_segments/manifest.json`:
+the ASR segments, each segment's translation, the key and hash of its TTS clip and
+whether the clip was aligned. A run with `resume=True` reuses everything that is
+still valid and only redoes segments whose source text, translation or TTS
+parameters changed. Editing `translated_text` in the manifest and resuming
+re-renders just the edited lines.
+
+Layout:
+    {
+      "version": 1,
+      "input": {"path", "size", "mtime"},
+      "asr": {"key", "complete", "segments": [...]},
+      "segments": {
+        "<idx>": {"start", "duration", "text", "translated_text", "target_lang",
+                  "tts_key", "tts_sha1", "align_key", "audio_sha1", "audio_duration", "status"}
+      }
+    }
+`status` moves through "asr" -> "translated" -> "synthesized" -> "aligned".
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+# Seconds between manifest writes while segments stream in; stage ends always write
+SAVE_INTERVAL = 2.0
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def params_key(**params):
+    """Stable hash of the parameters an output depends on."""
+    blob = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def _input_fingerprint(input_path):
+    st = os.stat(input_path)
+    return {"path": os.path.abspath(input_path), "size": st.st_size, "mtime": st.st_mtime}
+
+
+class JobManifest:
+    def __init__(self, segments_dir, input_path, resume=False):
+        self.path = os.path.join(segments_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        fingerprint = _input_fingerprint(input_path)
+        self.data = {
+            "version": MANIFEST_VERSION,
+            "input": fingerprint,
+            "asr": {"key": None, "complete": False, "segments": []},
+            "segments": {},
+        }
+        self.resumed = False
+        if resume and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Manifest] Ignoring unreadable manifest {self.path}: {e}")
+                data = None
+            if data and data.get("version") == MANIFEST_VERSION and data.get("input") == fingerprint:
+                self.data = data
+                self.resumed = True
+                print(f"[Manifest] Resuming from {self.path} ({len(data['segments'])} segments recorded)")
+            elif data:
+                print("[Manifest] Input video changed since the last run; starting over.")
+
+    def save(self, force=True):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_save < SAVE_INTERVAL:
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self._last_save = now
+
+    # --- ASR ---
+
+    def cached_asr(self, key):
+        """ASR segments of a completed earlier run with the same settings, else None."""
+        asr = self.data["asr"]
+        if asr["complete"] and asr["key"] == key:
+            return list(asr["segments"])
+        return None
+
+    def start_asr(self, key):
+        with self._lock:
+            self.data["asr"] = {"key": key, "complete": False, "segments": []}
+
+    def add_asr_segment(self, seg):
+        with self._lock:
+            self.data["asr"]["segments"].append(seg)
+        self.save(force=False)
+
+    def finish_asr(self):
+        with self._lock:
+            asr = self.data["asr"]
+            asr["complete"] = True
+            # Segments past the end belong to an older transcript
+            count = len(asr["segments"])
+            self.data["segments"] = {k: v for k, v in self.data["segments"].items() if int(k) < count}
+        self.save()
+
+    # --- Segments ---
+
+    def segment(self, idx, start, duration, text):
+        """
+        The recorded entry for segment `idx` if it still describes the same source
+        segment; otherwise a fresh entry replaces it. Returns a copy.
+        """
+        with self._lock:
+            entry = self.data["segments"].get(str(idx))
+            if entry is None or entry.get("text") != text or entry.get("start") != start \
+                    or entry.get("duration") != duration:
+                entry = {"start": start, "duration": duration, "text": text, "status": "asr"}
+                self.data["segments"][str(idx)] = entry
+            return dict(entry)
+
+    def update_segment(self, idx, **fields):
+        with self._lock:
+            self.data["segments"][str(idx)].update(fields)
+        self.save(force=False)
+
+    def audio_is_current(self, entry, path, sha1_field):
+        """True when `path` still holds the clip whose hash was recorded in `sha1_field`."""
+        expected = entry.get(sha1_field)
+        if not expected or not os.path.exists(path):
+            return False
+        try:
+            return file_sha1(path) == expected
+        except OSError:
+            return False
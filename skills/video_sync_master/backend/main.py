@@ -255,9 +255,12 @@ def setup_gpu_paths():
 
 # 238: 
 # Lazy Imports moved to functions or after dependency checks
-from asr import run_asr
-from alignment import align_audio, merge_audios_to_video, get_audio_duration
+from asr import run_asr, run_asr_batch, list_audio_files, release_asr_models
+from alignment import align_audio, fit_audio_to_slot, merge_audios_to_video, get_audio_duration, probe_media
 from llm import LLMTranslator
+from pipeline import run_pipeline
+from job_manifest import JobManifest, file_sha1, params_key
+from media_io import extract_audio
 import ffmpeg
 import json
 import shutil
@@ -298,11 +301,24 @@ def get_tts_runner(service="indextts", check_deps=True):
         print(f"[Main] Failed to import TTS service {service}: {e}")
         return None, None
 
+def release_tts_model(service="indextts"):
+    """
+    Unload the TTS model `run_tts` keeps resident between calls.
+    """
+    try:
+        if service == "qwen":
+            from qwen_tts_service import release_model
+        else:
+            from tts import release_model
+        release_model()
+    except ImportError:
+        pass
+
 
 
 def analyze_video(file_path):
     try:
-        probe = ffmpeg.probe(file_path)
+        probe = probe_media(file_path)
         video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
         audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
         
@@ -388,7 +404,11 @@ def translate_text(input_text_or_json, target_lang):
 
 
 # 333: 
-def dub_video(input_path, target_lang, output_path, asr_service="whisperx", vad_onset=0.700, vad_offset=0.700, tts_service="indextts", **kwargs):
+def dub_video(input_path, target_lang, output_path, asr_service="whisperx", vad_onset=0.700, vad_offset=0.700, tts_service="indextts", asr_batch_size=4, asr_language="zh", asr_chunked=False, asr_workers=None, resume=False, **kwargs):
+    """
+    Full dubbing flow. Progress is recorded per segment in {basename}_segments/manifest.json;
+    with resume=True the segments that are still valid are reused (see job_manifest.py).
+    """
     print(f"Starting AI Dubbing for {input_path} -> {target_lang} using ASR:{asr_service} TTS:{tts_service}", flush=True)
     
     # 0. Get TTS Runner (This will switch deps if needed)
@@ -396,142 +416,236 @@ def dub_video(input_path, target_lang, output_path, asr_service="whisperx", vad_
     if not run_tts_func:
         return {"success": False, "error": f"Failed to initialize TTS service: {tts_service}"}
 
-    # 1. Initialize LLM
-    translator = LLMTranslator()
-    
-    # 2. Run ASR
-    print("Step 1/4: Running ASR...", flush=True)
-    
-    output_dir_root = os.path.dirname(output_path)
+    output_dir = os.path.dirname(output_path)
     basename = os.path.splitext(os.path.basename(output_path))[0]
-    segments_dir = os.path.join(output_dir_root, f"{basename}_segments") 
-    
+    segments_dir = os.path.join(output_dir, f"{basename}_segments")
     
-    cache_dir = os.path.join(output_dir_root, ".cache")
+    cache_dir = os.path.join(output_dir, ".cache")
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
-        
-    segments = run_asr(input_path, service=asr_service, output_dir=cache_dir, vad_onset=vad_onset, vad_offset=vad_offset) 
-    if not segments:
-        return {"success": False, "error": "ASR failed or no speech detected."}
-    
-    
-    output_dir = os.path.dirname(output_path)
-    basename = os.path.splitext(os.path.basename(output_path))[0]
-    segments_dir = os.path.join(output_dir, f"{basename}_segments")
     
     print(f"DEBUG: Output Path: {output_path}")
     print(f"DEBUG: Segments Dir: {segments_dir}")
     print(f"DEBUG: Input Path: {input_path}")
     
-    if os.path.exists(segments_dir):
+    if os.path.exists(segments_dir) and not resume:
         shutil.rmtree(segments_dir)
-    os.makedirs(segments_dir)
+    os.makedirs(segments_dir, exist_ok=True)
+    manifest = JobManifest(segments_dir, input_path, resume=resume)
+    manifest.save()
+
+    strategy = kwargs.get('strategy', 'auto_speedup')
+    should_align = strategy not in ['frame_blend', 'freeze_frame', 'rife']
+    if not should_align:
+        print(f"    [DubVideo] Strategy is {strategy}, skipping audio alignment.")
+
+    # What a segment's clip depends on besides its text and timing
+    tts_params = {k: v for k, v in kwargs.items() if k != 'strategy'}
+    asr_key = params_key(service=asr_service, vad_onset=vad_onset, vad_offset=vad_offset, language=asr_language, chunked=asr_chunked)
+
+    # The stages below run side by side (see pipeline.py): each one starts on the first
+    # items of the previous stage, and models that don't fit in memory together are
+    # loaded one group after another. Items are dicts describing one segment.
+    asr_count = [0]
+
+    # 1. ASR (chunked WhisperX streams segments window by window)
+    def asr_stage(_, emit):
+        print("Step 1/4: Running ASR...", flush=True)
+        streamed = [False]
+        stream_error = [None]
+
+        def emit_segments(segments, record=True):
+            streamed[0] = True
+            try:
+                _emit_segments(segments, record)
+            except Exception as e:
+                # Remembered in case the ASR call swallows it: the transcript is then partial
+                stream_error[0] = e
+                raise
+
+        def _emit_segments(segments, record):
+            for seg in segments:
+                if record:
+                    seg = {"start": seg['start'], "end": seg['end'], "text": seg['text']}
+                    manifest.add_asr_segment(seg)
+                item = {
+                    "idx": asr_count[0],
+                    "start": seg['start'],
+                    "duration": seg['end'] - seg['start'],
+                    "original_seg": seg
+                }
+                item['entry'] = manifest.segment(item['idx'], item['start'], item['duration'], seg['text'])
+                emit(item)
+                asr_count[0] += 1
 
-    new_audio_segments = []
-    result_segments = [] 
-    
-    
-    print(f"Step 2: Translating {len(segments)} segments...", flush=True)
-    
-    tts_tasks = []
-    
-    for idx, seg in enumerate(segments):
-        original_text = seg['text']
-        start = seg['start']
-        end = seg['end']
-        duration = end - start
-        
-        print(f"  [{idx+1}/{len(segments)}] Translating: {original_text}")
-        translated_text = translator.translate(original_text, target_lang)
-        print(f"    -> {translated_text}")
-        
-        if not translated_text:
-             print("    Skipping (Translation failed)")
-             continue
-             
-        tts_tasks.append({
-            "idx": idx,
-            "translated_text": translated_text,
-            "start": start,
-            "duration": duration,
-            "original_seg": seg
-        })
-        
-    print("Translation done. Releasing LLM VRAM...", flush=True)
-    translator.cleanup()
-    del translator
-    
-    print(f"Step 3: Cloning Voice for {len(tts_tasks)} segments using {tts_service}...", flush=True)
-    
-    for item in tts_tasks:
-        idx = item['idx']
-        translated_text = item['translated_text']
-        start = item['start']
-        duration = item['duration']
-        
-        ref_clip_path = os.path.join(segments_dir, f"ref_{idx}.wav")
+        cached = manifest.cached_asr(asr_key)
+        if cached is not None:
+            print(f"[DubVideo] Reusing {len(cached)} ASR segments from the manifest.", flush=True)
+            emit_segments(cached, record=False)
+            return
+
+        manifest.start_asr(asr_key)
         try:
-            (
-                ffmpeg
-                .input(input_path, ss=start, t=duration)
-                .output(ref_clip_path, acodec='pcm_s16le', ac=1, ar=24000, loglevel="error")
-                .run(overwrite_output=True)
-            )
-        except Exception as e:
-            print(f"    Failed to extract ref audio: {e}")
-            continue
-
-        # C. TTS
-        tts_output_path = os.path.join(segments_dir, f"tts_{idx}.wav")
-        # Call the dynamic runner
-        success = run_tts_func(translated_text, ref_clip_path, tts_output_path, language=target_lang, **kwargs)
-        
-        if success:
+            segments = run_asr(input_path, service=asr_service, output_dir=cache_dir, vad_onset=vad_onset, vad_offset=vad_offset, batch_size=asr_batch_size, language=asr_language, chunked=asr_chunked, workers=asr_workers, on_window=emit_segments)
+            if stream_error[0] is not None:
+                raise stream_error[0]
+            if not streamed[0]:
+                emit_segments(segments or [])
+            # Only a transcript that ran to the end may be reused by --resume
+            if asr_count[0]:
+                manifest.finish_asr()
+        finally:
+            # Free ASR VRAM for the LLM and TTS models
+            release_asr_models()
+
+    # 2. Translate (LLM loaded on the first segment)
+    def translate_stage(items, emit):
+        translator = None
+        try:
+            for item in items:
+                entry = item['entry']
+                # Keep earlier (possibly hand-edited) translations of the same source line
+                if entry.get('translated_text') and entry.get('target_lang') == target_lang:
+                    item['translated_text'] = entry['translated_text']
+                    emit(item)
+                    continue
+                if translator is None:
+                    print("Step 2/4: Translating segments...", flush=True)
+                    translator = LLMTranslator()
+                original_text = item['original_seg']['text']
+                print(f"  [{item['idx']+1}] Translating: {original_text}")
+                translated_text = translator.translate(original_text, target_lang)
+                print(f"    -> {translated_text}")
                 
-            should_align = True
-            strategy = kwargs.get('strategy', 'auto_speedup')
-            if strategy in ['frame_blend', 'freeze_frame', 'rife']:
-                should_align = False
-                print(f"    [DubVideo] Strategy is {strategy}, skipping audio alignment.")
-
+                if not translated_text:
+                    print("    Skipping (Translation failed)")
+                    continue
+                item['translated_text'] = translated_text
+                manifest.update_segment(item['idx'], translated_text=translated_text, target_lang=target_lang, status="translated")
+                emit(item)
+        finally:
+            if translator is not None:
+                print("Translation done. Releasing LLM VRAM...", flush=True)
+                translator.cleanup()
+            manifest.save()
+
+    # Reference clips for voice cloning (ffmpeg, runs ahead of TTS)
+    def ref_stage(items, emit):
+        for item in items:
+            idx = item['idx']
+            entry = item['entry']
+            tts_output_path = os.path.join(segments_dir, f"tts_{idx}.wav")
+            item['audio_path'] = tts_output_path
+            item['tts_key'] = params_key(text=item['translated_text'], service=tts_service, language=target_lang,
+                                         start=item['start'], duration=item['duration'], params=tts_params)
+            item['align_key'] = params_key(tts_key=item['tts_key'], align=should_align)
+            # A clip from an earlier run is reused when its inputs are unchanged and the file is intact
+            if entry.get('tts_key') == item['tts_key']:
+                if entry.get('status') == "aligned" and entry.get('align_key') == item['align_key'] \
+                        and manifest.audio_is_current(entry, tts_output_path, 'audio_sha1'):
+                    item['resumed'] = "aligned"
+                elif entry.get('status') == "synthesized" \
+                        and manifest.audio_is_current(entry, tts_output_path, 'tts_sha1'):
+                    item['resumed'] = "synthesized"
+            if item.get('resumed'):
+                emit(item)
+                continue
+
+            ref_clip_path = os.path.join(segments_dir, f"ref_{item['idx']}.wav")
+            try:
+                extract_audio(input_path, ref_clip_path, start=item['start'], duration=item['duration'], sr=24000)
+            except Exception as e:
+                print(f"    Failed to extract ref audio: {e}")
+                continue
+            item['ref_clip_path'] = ref_clip_path
+            emit(item)
+
+    # 3. TTS (model stays loaded across segments, released when the stage ends)
+    def tts_stage(items, emit):
+        announced = False
+        try:
+            for item in items:
+                if item.get('resumed'):
+                    emit(item)
+                    continue
+                if not announced:
+                    announced = True
+                    print(f"Step 3/4: Cloning Voice using {tts_service}...", flush=True)
+                tts_output_path = item['audio_path']
+                # Call the dynamic runner
+                # Let the model aim for the slot; the align stage only stretches what is left over
+                if should_align and item['duration'] > 0:
+                    success = run_tts_func(item['translated_text'], item['ref_clip_path'], tts_output_path, language=target_lang, target_duration=item['duration'], **kwargs)
+                else:
+                    success = run_tts_func(item['translated_text'], item['ref_clip_path'], tts_output_path, language=target_lang, **kwargs)
+                if not success:
+                    continue
+                try:
+                    os.remove(item['ref_clip_path'])
+                except:
+                    pass
+                manifest.update_segment(item['idx'], tts_key=item['tts_key'], tts_sha1=file_sha1(tts_output_path), status="synthesized")
+                emit(item)
+        finally:
+            release_tts_model(tts_service)
+            manifest.save()
+
+    # Fit finished clips into their slots
+    def align_stage(items, emit):
+        for item in items:
+            idx = item['idx']
+            duration = item['duration']
+            tts_output_path = item['audio_path']
+            if item.get('resumed') == "aligned":
+                item['audio_duration'] = item['entry'].get('audio_duration')
+                emit(item)
+                continue
             if duration > 0 and should_align:
                 try:
-                    current_dur = get_audio_duration(tts_output_path)
-                    if current_dur and current_dur > duration + 0.1:
-                        print(f"    [DubVideo] Segment {idx} duration {current_dur:.2f}s > {duration:.2f}s. Aligning...")
-                        temp_aligned = tts_output_path.replace('.wav', '_aligned_temp.wav')
-                        if align_audio(tts_output_path, temp_aligned, duration):
-                            try:
-                                if os.path.exists(tts_output_path):
-                                     os.remove(tts_output_path)
-                                os.rename(temp_aligned, tts_output_path)
-                                print(f"    [DubVideo] Aligned and overwritten: {tts_output_path}")
-                            except Exception as e:
-                                print(f"    [DubVideo] Failed to overwrite aligned file: {e}")
+                    # IndexTTS2 clips already fit (stretched before their only write); others are
+                    # read once and, if they overrun, stretched in memory and rewritten
+                    current_dur, aligned = fit_audio_to_slot(tts_output_path, duration)
+                    # Known from the sample count, so merging needn't probe the clip again
+                    item['audio_duration'] = duration if aligned else current_dur
+                    if aligned:
+                        print(f"    [DubVideo] Segment {idx} duration {current_dur:.2f}s > {duration:.2f}s. Aligned in place: {tts_output_path}")
                 except Exception as e:
                     print(f"    [DubVideo] Auto-align warning: {e}")
+            manifest.update_segment(idx, align_key=item['align_key'], audio_sha1=file_sha1(tts_output_path),
+                                    audio_duration=item.get('audio_duration'), status="aligned")
+            emit(item)
 
-            new_audio_segments.append({
-                'start': start,
-                'path': tts_output_path,
-                'duration': duration 
-            })
-            result_segments.append({
-                "index": idx,
-                "text": translated_text,
-                "audio_path": tts_output_path,
-                "duration": duration
-            })
-            
-            try:
-                os.remove(ref_clip_path)
-            except:
-                pass
+    try:
+        finished = run_pipeline([
+            {"name": "asr", "run": asr_stage},
+            {"name": "translate", "run": translate_stage},
+            {"name": "ref", "run": ref_stage},
+            {"name": "tts", "run": tts_stage},
+            {"name": "align", "run": align_stage},
+        ])
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    finally:
+        manifest.save()
+
+    if not asr_count[0]:
+        return {"success": False, "error": "ASR failed or no speech detected."}
+    resumed = sum(1 for item in finished if item.get('resumed'))
+    if resumed:
+        print(f"[DubVideo] Reused {resumed}/{len(finished)} clips from the previous run.", flush=True)
+
+    new_audio_segments = [
+        {'start': item['start'], 'path': item['audio_path'], 'duration': item['duration'], 'audio_duration': item.get('audio_duration')}
+        for item in finished
+    ]
+    result_segments = [
+        {"index": item['idx'], "text": item['translated_text'], "audio_path": item['audio_path'], "duration": item['duration']}
+        for item in finished
+    ]
         
     # 4. Merge
     print("Step 4/4: Merging Video...")
-    success = merge_audios_to_video(input_path, new_audio_segments, output_path, strategy=kwargs.get('strategy', 'auto_speedup'))
+    success = merge_audios_to_video(input_path, new_audio_segments, output_path, strategy=strategy)
     
     if success:
         return {
@@ -543,13 +657,12 @@ def dub_video(input_path, target_lang, output_path, asr_service="whisperx", vad_
         return {"success": False, "error": "Merging failed."}
 
 
-
 def main():
     # Setup GPU paths early to prevent DLL load errors
     setup_gpu_paths()
 
     parser = argparse.ArgumentParser(description="VideoSync Backend")
-    parser.add_argument("--action", type=str, help="Action to perform: asr, tts, align, merge_video", default="test_asr")
+    parser.add_argument("--action", type=str, help="Action to perform: asr, batch_asr, tts, align, merge_video", default="test_asr")
     parser.add_argument("--input", type=str, help="Input file path or JSON string for complex inputs")
     parser.add_argument("--ref", type=str, help="Reference audio path for TTS (or segments JSON for batch)")
     parser.add_argument("--ref_audio", type=str, help="Explicit reference audio path (overrides auto-extraction)")
@@ -577,8 +690,15 @@ def main():
     parser.add_argument("--qwen_model_size", type=str, help="Qwen Model Size: 1.7B or 0.6B", default="1.7B")
     parser.add_argument("--qwen_ref_text", type=str, help="Reference text for Qwen Clone mode", default="")
     parser.add_argument("--batch_size", type=int, help="Batch Size for TTS", default=1)
+    parser.add_argument("--asr_batch_size", type=int, help="WhisperX inference batch size (0 = size to available memory)", default=4)
+    parser.add_argument("--asr_language", type=str, help="ASR language code, or 'auto' to detect", default="zh")
+    parser.add_argument("--asr_chunked", action="store_true", help="Split long audio at silences and run WhisperX windows in parallel")
+    parser.add_argument("--asr_workers", type=int, help="Worker processes for chunked CPU ASR (default: auto)", default=None)
+    parser.add_argument("--resume", action="store_true", help="dub_video: reuse finished segments recorded in the job manifest")
     args = parser.parse_args()
 
+    asr_language = None if args.asr_language == "auto" else args.asr_language
+
     tts_kwargs = {
         "temperature": args.temperature,
         "top_p": args.top_p,
@@ -599,7 +719,7 @@ def main():
             if not args.json:
                 print(f"Testing ASR on {args.input} using {args.asr}", flush=True)
             # Pass output_dir for raw saving
-            segments = run_asr(args.input, service=args.asr, output_dir=args.output_dir, vad_onset=args.vad_onset, vad_offset=args.vad_offset)
+            segments = run_asr(args.input, service=args.asr, output_dir=args.output_dir, vad_onset=args.vad_onset, vad_offset=args.vad_offset, batch_size=args.asr_batch_size, language=asr_language, chunked=args.asr_chunked, workers=args.asr_workers)
             if args.json:
                 result_data = segments
             else:
@@ -607,6 +727,27 @@ def main():
                     print(f"[{seg['start']:.2f} -> {seg['end']:.2f}] {seg['text']}")
         else:
             print("Please provide --input to test ASR.")
+
+    elif args.action == "batch_asr":
+        # --input: a directory of clips or a JSON list of file paths
+        if args.input:
+            if os.path.isdir(args.input):
+                audio_files = list_audio_files(args.input)
+            else:
+                audio_files = json.loads(args.input)
+
+            if not args.json:
+                print(f"Batch ASR on {len(audio_files)} files using {args.asr}", flush=True)
+            results = run_asr_batch(audio_files, service=args.asr, output_dir=args.output_dir, vad_onset=args.vad_onset, vad_offset=args.vad_offset, batch_size=args.asr_batch_size, language=asr_language)
+            if args.json:
+                result_data = {"success": True, "results": results}
+            else:
+                for path, segments in results.items():
+                    print(f"== {path} ({len(segments)} segments)")
+                    for seg in segments:
+                        print(f"[{seg['start']:.2f} -> {seg['end']:.2f}] {seg['text']}")
+        else:
+            print("Usage: --action batch_asr --input clips_dir --asr_batch_size 0 --asr_language zh")
             
     elif args.action == "test_tts":
          # ... (keep existing) ...
@@ -675,6 +816,8 @@ def main():
                          if os.path.exists(audio_path):
                              current_duration = get_audio_duration(audio_path)
                              if current_duration:
+                                 # Passed on so the advanced merge doesn't probe the clip again
+                                 audio_segments[i]['audio_duration'] = current_duration
                                  # If audio is significantly longer than slot (e.g. > 0.1s diff), compress it.
                                  if current_duration > target_duration + 0.1:
                                      # Check strategy
@@ -690,6 +833,7 @@ def main():
                                          if align_audio(audio_path, aligned_path, target_duration):
                                              # Update path in segment to point to aligned file
                                              audio_segments[i]['path'] = aligned_path
+                                             audio_segments[i]['audio_duration'] = target_duration
                                          else:
                                              print(f"Failed to align segment {i}, using original.")
                                  else:
@@ -730,7 +874,7 @@ def main():
         if args.input and args.output:
             target = args.lang if args.lang else "English"
             # Explicitly pass tts_service from args to function
-            result_data = dub_video(args.input, target, args.output, asr_service=args.asr, tts_service=args.tts_service, strategy=args.strategy, **tts_kwargs)
+            result_data = dub_video(args.input, target, args.output, asr_service=args.asr, tts_service=args.tts_service, asr_batch_size=args.asr_batch_size, asr_language=asr_language, asr_chunked=args.asr_chunked, asr_workers=args.asr_workers, resume=args.resume, strategy=args.strategy, **tts_kwargs)
             if not args.json:
                 print(result_data)
         else:
@@ -781,9 +925,7 @@ def main():
                     else:
                         # Extract from video
                         try:
-                            ffmpeg.input(video_path, ss=start_time, t=duration).output(
-                                ref_clip_path, acodec='pcm_s16le', ac=1, ar=24000, loglevel="error"
-                            ).run(overwrite_output=True)
+                            extract_audio(video_path, ref_clip_path, start=start_time, duration=duration, sr=24000)
                             should_delete_ref = True
                         except Exception as e:
                             result_data = {"success": False, "error": f"Failed to extract ref audio: {str(e)}"}
@@ -797,8 +939,12 @@ def main():
                     if not translated_text:
                         result_data = {"success": False, "error": "No text provided"}
                     else:
-                        # 3. Generate TTS
-                        success = run_tts_func(translated_text, ref_clip_path, output_audio, language=target_lang, **tts_kwargs)
+                        # 3. Generate TTS (duration falls back to 3.0 for the reference clip only;
+                        # the model aims for a slot only when --duration was given)
+                        if args.duration and duration > 0 and getattr(args, 'strategy', 'auto_speedup') not in ['frame_blend', 'freeze_frame', 'rife']:
+                            success = run_tts_func(translated_text, ref_clip_path, output_audio, language=target_lang, target_duration=duration, **tts_kwargs)
+                        else:
+                            success = run_tts_func(translated_text, ref_clip_path, output_audio, language=target_lang, **tts_kwargs)
                         
                         # 4. Cleanup ref
                         try:
@@ -894,9 +1040,7 @@ def main():
                         ref_path = os.path.join(work_dir, f"ref_{i}_{start}.wav")
                         should_clean_ref = True
                         try:
-                            ffmpeg.input(video_path, ss=start, t=extraction_duration).output(
-                                ref_path, acodec='pcm_s16le', ac=1, ar=24000, loglevel="error"
-                            ).run(overwrite_output=True)
+                            extract_audio(video_path, ref_path, start=start, duration=extraction_duration, sr=24000)
                         except Exception as e:
                             print(f"Failed to extract ref for segment {i}: {e}")
                             continue
@@ -906,7 +1050,9 @@ def main():
                         "ref_audio_path": ref_path,
                         "output_path": out_path,
                         "index": i,
-                        "clean_ref": should_clean_ref
+                        "clean_ref": should_clean_ref,
+                        # Slot the model should aim for (auto_speedup only; other strategies stretch the video)
+                        "target_duration": extraction_duration if getattr(args, 'strategy', 'auto_speedup') not in ['frame_blend', 'freeze_frame', 'rife'] and extraction_duration > 0 else None
                     })
                 
                 # 2. Run Batch TTS
@@ -0,0 +1,344 @@
+"""
+In-process media I/O.
+
+Probing, ranged audio decoding, PCM encoding and stream-copy muxing through
+PyAV (the libav* libraries ffmpeg is built on), so the hot loops of a job
+don't start an ffmpeg/ffprobe process per call or re-open containers through
+a CLI. WAV/FLAC durations are read from the file header.
+
+Every function falls back to the ffmpeg/ffprobe executables when PyAV is not
+installed or fails on a file; results have the same shape either way. Also
+used by skills/audio_enhancer and workflows/make_blog_video.py.
+"""
+import heapq
+import json
+import os
+import subprocess
+import wave
+import numpy as np
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# Formats whose duration the header gives exactly
+HEADER_FORMATS = {".wav", ".flac"}
+
+
+def _binary(name, env_var):
+    """Executable from the environment variable if it exists, else from PATH."""
+    path = os.environ.get(env_var)
+    if path and os.path.exists(path):
+        return path
+    return name
+
+
+def _run_cli(cmd):
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(cmd[0])} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def _as_list(frames):
+    # AudioResampler.resample returns a list since PyAV 9, a single frame (or None) before
+    if frames is None:
+        return []
+    return frames if isinstance(frames, list) else [frames]
+
+
+# --- Probe ---
+
+def probe(path):
+    """
+    ffprobe-style description of a media file: {'format': {...}, 'streams': [...]},
+    with durations as strings like ffprobe's JSON output.
+    """
+    if av is not None:
+        try:
+            return _probe_av(path)
+        except Exception as e:
+            print(f"[Media] PyAV probe failed for {path} ({e}), using ffprobe")
+    out = _run_cli([_binary("ffprobe", "FFPROBE_PATH"), "-v", "error", "-show_format", "-show_streams", "-of", "json", path])
+    return json.loads(out.decode("utf-8"))
+
+
+def _probe_av(path):
+    with av.open(path) as container:
+        streams = []
+        for stream in container.streams:
+            ctx = stream.codec_context
+            info = {"index": stream.index, "codec_type": stream.type, "codec_name": ctx.name if ctx else None}
+            if stream.duration is not None and stream.time_base is not None:
+                info["duration"] = str(float(stream.duration * stream.time_base))
+            if stream.type == "video":
+                info["width"] = ctx.width
+                info["height"] = ctx.height
+                if stream.average_rate:
+                    info["avg_frame_rate"] = f"{stream.average_rate.numerator}/{stream.average_rate.denominator}"
+            elif stream.type == "audio":
+                info["sample_rate"] = str(ctx.sample_rate)
+                info["channels"] = len(ctx.layout.channels)
+            streams.append(info)
+        fmt = {"filename": path, "format_name": container.format.name, "nb_streams": len(streams)}
+        if container.duration is not None:
+            fmt["duration"] = str(container.duration / av.time_base)
+        if container.bit_rate:
+            fmt["bit_rate"] = str(container.bit_rate)
+        return {"format": fmt, "streams": streams}
+
+
+def header_duration(path):
+    """Duration of a WAV/FLAC file from its header, or None for other formats / unreadable headers."""
+    if os.path.splitext(path)[1].lower() not in HEADER_FORMATS:
+        return None
+    try:
+        import soundfile as sf
+        info = sf.info(path)
+        return info.frames / info.samplerate
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / w.getframerate()
+    except Exception:
+        return None
+
+
+# --- Audio decode / encode ---
+
+def decode_audio(path, sr=None, mono=True, start=0.0, duration=None):
+    """
+    Decode (part of) the first audio stream of any media file to float32.
+    :param sr: Output sample rate (None = the stream's)
+    :param start: Offset in seconds
+    :param duration: Seconds to decode (None = to the end)
+    :return: (samples, sr); samples have shape (N,) if mono else (N, channels)
+    """
+    if av is not None:
+        try:
+            return _decode_av(path, sr, mono, start, duration)
+        except Exception as e:
+            print(f"[Media] PyAV decode failed for {path} ({e}), using ffmpeg")
+
+    channels = 1
+    if sr is None or not mono:
+        audio = next(s for s in probe(path)["streams"] if s["codec_type"] == "audio")
+        sr = sr or int(audio["sample_rate"])
+        channels = 1 if mono else int(audio["channels"])
+    cmd = [_binary("ffmpeg", "FFMPEG_PATH"), "-v", "error", "-nostdin"]
+    if start:
+        cmd += ["-ss", str(start)]
+    if duration is not None:
+        cmd += ["-t", str(duration)]
+    cmd += ["-i", path, "-vn", "-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(sr), "-"]
+    y = np.frombuffer(_run_cli(cmd), dtype="<f4").astype(np.float32)
+    return (y if mono else y.reshape(-1, channels)), sr
+
+
+def _decode_av(path, sr, mono, start, duration):
+    with av.open(path) as container:
+        stream = container.streams.audio[0]
+        ctx = stream.codec_context
+        out_rate = sr or ctx.sample_rate
+        channels = 1 if mono else len(ctx.layout.channels)
+        resampler = av.AudioResampler(format="flt", layout="mono" if mono else ctx.layout.name, rate=out_rate)
+        if start:
+            container.seek(int(start / stream.time_base), stream=stream)
+        end = None if duration is None else start + duration
+
+        chunks = []
+        first_time = None
+        for frame in container.decode(stream):
+            if frame.time is not None:
+                if end is not None and frame.time >= end:
+                    break
+                if first_time is None:
+                    first_time = frame.time
+            for out in _as_list(resampler.resample(frame)):
+                chunks.append(out.to_ndarray().reshape(-1))
+        for out in _as_list(resampler.resample(None)):
+            chunks.append(out.to_ndarray().reshape(-1))
+
+    y = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    y = y.astype(np.float32, copy=False).reshape(-1, channels)
+    # Seeking lands on the packet before `start`; drop the lead-in
+    skip = max(0, int(round((start - (first_time if first_time is not None else start)) * out_rate)))
+    y = y[skip:]
+    if duration is not None:
+        y = y[:int(round(duration * out_rate))]
+    return (y[:, 0] if mono else y), out_rate
+
+
+def write_pcm(path, y, sr, subtype="PCM_16"):
+    """Write samples (float, shape (N,) or (N, channels)) as PCM; soundfile if installed, else the wave module."""
+    try:
+        import soundfile as sf
+    except ImportError:
+        sf = None
+    if sf is not None:
+        sf.write(path, y, sr, subtype=subtype)
+        return
+    if subtype != "PCM_16" or os.path.splitext(path)[1].lower() != ".wav":
+        raise RuntimeError(f"soundfile is required to write {subtype} {path}")
+    y = np.asarray(y)
+    pcm = (np.clip(y, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1 if y.ndim == 1 else y.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+
+
+def extract_audio(input_path, output_path, start=0.0, duration=None, sr=None, mono=True):
+    """
+    Cut the audio of a media file into a 16-bit PCM WAV (e.g. TTS reference clips).
+    Raises on failure.
+    """
+    if av is not None:
+        try:
+            y, rate = _decode_av(input_path, sr, mono, start, duration)
+            write_pcm(output_path, y, rate)
+            return output_path
+        except Exception as e:
+            print(f"[Media] PyAV extract failed for {input_path} ({e}), using ffmpeg")
+    cmd = [_binary("ffmpeg", "FFMPEG_PATH"), "-v", "error", "-nostdin", "-y"]
+    if start:
+        cmd += ["-ss", str(start)]
+    if duration is not None:
+        cmd += ["-t", str(duration)]
+    cmd += ["-i", input_path, "-vn", "-acodec", "pcm_s16le"]
+    if mono:
+        cmd += ["-ac", "1"]
+    if sr:
+        cmd += ["-ar", str(sr)]
+    _run_cli(cmd + [output_path])
+    return output_path
+
+
+# --- Mux ---
+
+def mux(video_path, audio_path, output_path, video_codec="copy", audio_codec="aac", audio_bitrate=None,
+        loop_video=False, faststart=False, copy_metadata=False):
+    """
+    Combine the first video stream of `video_path` with the first audio stream of
+    `audio_path`, ending with the shorter one (ffmpeg -shortest). A missing video
+    stream gives an audio-only output.
+    :param video_codec: "copy" stream-copies in-process; anything else re-encodes via ffmpeg
+    :param loop_video: Repeat the video until the audio ends (ffmpeg -stream_loop -1)
+    :param faststart: Put the moov atom first (MP4/MOV)
+    :param copy_metadata: Copy the global metadata of `video_path`
+    Raises on failure.
+    """
+    if av is not None and video_codec == "copy":
+        try:
+            _mux_av(video_path, audio_path, output_path, audio_codec, audio_bitrate, loop_video, faststart, copy_metadata)
+            return output_path
+        except Exception as e:
+            print(f"[Media] PyAV mux failed ({e}), using ffmpeg")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+    cmd = [_binary("ffmpeg", "FFMPEG_PATH"), "-v", "error", "-nostdin", "-y"]
+    if loop_video:
+        cmd += ["-stream_loop", "-1"]
+    cmd += ["-i", video_path, "-i", audio_path, "-map", "0:v:0?", "-map", "1:a:0"]
+    if copy_metadata:
+        cmd += ["-map_metadata", "0"]
+    cmd += ["-c:v", video_codec, "-c:a", audio_codec]
+    if audio_bitrate:
+        cmd += ["-b:a", str(audio_bitrate)]
+    if faststart:
+        cmd += ["-movflags", "+faststart"]
+    _run_cli(cmd + ["-shortest", output_path])
+    return output_path
+
+
+def _copy_stream(out, template):
+    # add_stream(template=...) became add_stream_from_template in PyAV 14
+    if hasattr(out, "add_stream_from_template"):
+        return out.add_stream_from_template(template)
+    return out.add_stream(template=template)
+
+
+def _mux_av(video_path, audio_path, output_path, audio_codec, audio_bitrate, loop_video, faststart, copy_metadata):
+    options = {"movflags": "+faststart"} if faststart else {}
+    with av.open(video_path) as v_in, av.open(audio_path) as a_in, av.open(output_path, "w", options=options) as out:
+        v_src = v_in.streams.video[0] if v_in.streams.video else None
+        a_src = a_in.streams.audio[0]
+        if copy_metadata:
+            out.metadata.update(v_in.metadata)
+
+        audio_end = a_in.duration / av.time_base if a_in.duration is not None else float("inf")
+        video_len = v_in.duration / av.time_base if v_in.duration is not None else None
+        end = audio_end
+        if v_src is not None and not loop_video and video_len is not None:
+            end = min(end, video_len)
+        if v_src is not None and loop_video and not video_len:
+            raise RuntimeError("cannot loop a video of unknown length")
+
+        v_out = _copy_stream(out, v_src) if v_src is not None else None
+        copy_audio = a_src.codec_context.name == audio_codec and not audio_bitrate
+        if copy_audio:
+            a_out = _copy_stream(out, a_src)
+        else:
+            a_out = out.add_stream(audio_codec, rate=a_src.codec_context.sample_rate)
+            a_out.layout = a_src.codec_context.layout.name
+            if audio_bitrate:
+                a_out.bit_rate = _parse_bitrate(audio_bitrate)
+
+        def video_packets():
+            if v_out is None:
+                return
+            offset = 0.0
+            while offset < end:
+                v_in.seek(0)
+                for packet in v_in.demux(v_src):
+                    if packet.dts is None:
+                        continue
+                    t = float(packet.pts * packet.time_base) + offset if packet.pts is not None else offset
+                    if t >= end:
+                        return
+                    shift = int(round(offset / packet.time_base))
+                    packet.dts += shift
+                    if packet.pts is not None:
+                        packet.pts += shift
+                    packet.stream = v_out
+                    yield t, packet
+                if not loop_video:
+                    return
+                offset += video_len
+
+        def audio_packets():
+            if copy_audio:
+                for packet in a_in.demux(a_src):
+                    if packet.dts is None:
+                        continue
+                    t = float(packet.pts * packet.time_base) if packet.pts is not None else 0.0
+                    if t >= end:
+                        return
+                    packet.stream = a_out
+                    yield t, packet
+                return
+            for frame in a_in.decode(a_src):
+                if frame.time is not None and frame.time >= end:
+                    break
+                frame.pts = None
+                for packet in a_out.encode(frame):
+                    yield float(packet.pts * packet.time_base) if packet.pts is not None else 0.0, packet
+            for packet in a_out.encode(None):
+                yield float(packet.pts * packet.time_base) if packet.pts is not None else end, packet
+
+        # Interleave the two streams by time, like ffmpeg does
+        for _, packet in heapq.merge(video_packets(), audio_packets(), key=lambda item: item[0]):
+            out.mux(packet)
+
+
+def _parse_bitrate(value):
+    """'192k' -> 192000."""
+    value = str(value).strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * scale)
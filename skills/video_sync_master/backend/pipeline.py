@@ -0,0 +1,185 @@
+"""
+Staged pipeline for dubbing: every stage runs in its own thread and hands items
+to the next through a bounded queue, so translation starts on the first ASR
+segments, TTS on the first translations, and so on. Total latency then follows
+the slowest stage instead of the sum of all stages.
+
+Which stages may hold their models at the same time is decided by
+`plan_residency` from the free device memory: a stage whose models would not
+fit next to the ones still loaded upstream waits until those stages have
+finished (and released their models) before it starts.
+"""
+import os
+import queue
+import threading
+import time
+import traceback
+
+# Items buffered between two stages that run side by side
+DEFAULT_QUEUE_SIZE = int(os.environ.get("DUB_QUEUE_SIZE", "8"))
+
+# Approximate memory (GB) a stage's models take while loaded, on the device they run on
+MODEL_FOOTPRINT_GB = {
+    "asr": float(os.environ.get("DUB_ASR_GB", "4")),          # WhisperX large-v3-turbo + align model
+    "translate": float(os.environ.get("DUB_LLM_GB", "6")),    # Qwen2.5-7B-Instruct, 4-bit
+    "tts": float(os.environ.get("DUB_TTS_GB", "8")),          # IndexTTS2 / Qwen3-TTS
+}
+# Fraction of free memory left alone for activations and other processes
+MEMORY_HEADROOM = float(os.environ.get("DUB_MEMORY_HEADROOM", "0.15"))
+
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage failed."""
+
+
+def memory_budget_gb():
+    """
+    Memory the dubbing models may use: free VRAM on CUDA, otherwise available RAM.
+    DUB_MEMORY_BUDGET_GB overrides the measurement. Returns None if unknown.
+    """
+    override = os.environ.get("DUB_MEMORY_BUDGET_GB")
+    if override:
+        return float(override)
+    try:
+        import torch
+        if torch.cuda.is_available():
+            free, _ = torch.cuda.mem_get_info()
+            return free / 1024 ** 3 * (1 - MEMORY_HEADROOM)
+    except Exception:
+        pass
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 1024 ** 3 * (1 - MEMORY_HEADROOM)
+    except ImportError:
+        pass
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        return available / 1024 ** 3 * (1 - MEMORY_HEADROOM)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def plan_residency(stage_names, budget_gb=None, footprints=None):
+    """
+    Split consecutive stages into groups whose models fit in memory together.
+    :param stage_names: Stage names in pipeline order
+    :param budget_gb: Memory budget; None measures it (unknown = everything co-resides)
+    :param footprints: Per-stage GB, defaults to MODEL_FOOTPRINT_GB (missing = 0)
+    :return: List of groups (lists of stage names); each group starts after the previous finished
+    """
+    if budget_gb is None:
+        budget_gb = memory_budget_gb()
+    footprints = MODEL_FOOTPRINT_GB if footprints is None else footprints
+
+    groups = [[]]
+    used = 0.0
+    for name in stage_names:
+        need = footprints.get(name, 0.0)
+        if groups[-1] and budget_gb is not None and need > 0 and used + need > budget_gb:
+            groups.append([])
+            used = 0.0
+        groups[-1].append(name)
+        used += need
+    return groups
+
+
+def run_pipeline(stages, queue_size=DEFAULT_QUEUE_SIZE, budget_gb=None):
+    """
+    Run stages concurrently, connected by queues.
+    :param stages: List of dicts in pipeline order:
+        name: Stage name (also the MODEL_FOOTPRINT_GB key)
+        run:  fn(items, emit). `items` iterates the previous stage's output (empty for
+              the first stage); `emit(item)` passes an item on. Load models lazily and
+              release them before returning, so later stages can take the memory.
+    :param budget_gb: Memory budget for plan_residency (None = measure)
+    :return: Items emitted by the last stage, in order
+    Raises the first exception raised by any stage.
+    """
+    groups = plan_residency([stage["name"] for stage in stages], budget_gb)
+    if len(groups) > 1:
+        print(f"[Pipeline] Models don't all fit in memory; running {' -> '.join('+'.join(g) for g in groups)}", flush=True)
+    else:
+        print(f"[Pipeline] Running {' + '.join(groups[0])} side by side", flush=True)
+    group_of = {name: gi for gi, group in enumerate(groups) for name in group}
+
+    failed = threading.Event()
+    errors = []
+    finished = {stage["name"]: threading.Event() for stage in stages}
+    results = []
+    # A queue into a stage that waits for its producer to finish must not block the producer
+    queues = [None] + [
+        queue.Queue(maxsize=queue_size if group_of[stages[i - 1]["name"]] == group_of[stage["name"]] else 0)
+        for i, stage in enumerate(stages) if i > 0
+    ]
+
+    def put(q, item):
+        while True:
+            if failed.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def iterate(q):
+        if q is None:
+            return
+        while True:
+            try:
+                item = q.get(timeout=0.5)
+            except queue.Empty:
+                if failed.is_set():
+                    raise PipelineAborted()
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def worker(i, stage):
+        name = stage["name"]
+        out_q = queues[i + 1] if i + 1 < len(stages) else None
+        emit = (lambda item: put(out_q, item)) if out_q is not None else results.append
+        try:
+            # Wait until every stage of the previous residency groups released its models
+            for upstream in stages[:i]:
+                if group_of[upstream["name"]] < group_of[name]:
+                    while not finished[upstream["name"]].wait(timeout=0.5):
+                        if failed.is_set():
+                            raise PipelineAborted()
+            start = time.perf_counter()
+            stage["run"](iterate(queues[i]), emit)
+            print(f"[Pipeline] Stage {name} finished in {time.perf_counter() - start:.1f}s", flush=True)
+        except PipelineAborted:
+            pass
+        except BaseException as e:
+            print(f"[Pipeline] Stage {name} failed: {e}")
+            traceback.print_exc()
+            errors.append(e)
+            failed.set()
+        finally:
+            finished[name].set()
+            if out_q is not None:
+                # Unbounded wait is fine: the consumer drains until _DONE or sees `failed`
+                while True:
+                    try:
+                        out_q.put(_DONE, timeout=0.5)
+                        break
+                    except queue.Full:
+                        if failed.is_set():
+                            break
+
+    threads = [
+        threading.Thread(target=worker, args=(i, stage), name=f"pipeline-{stage['name']}", daemon=True)
+        for i, stage in enumerate(stages)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+    return results
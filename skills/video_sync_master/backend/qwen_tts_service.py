@@ -5,6 +5,8 @@ import soundfile as sf
 import traceback
 import json
 
+from tts_batching import plan_batches, emit_partial
+
 _model = None
 _model_spec = None # tuple (model_type, model_size)
 
@@ -80,6 +82,19 @@ def get_model(model_type='base', model_size='1.7B'):
         traceback.print_exc()
         raise e
 
+def release_model():
+    """
+    Drop the resident Qwen3-TTS model and free its VRAM.
+    """
+    global _model, _model_spec
+    if _model is None:
+        return
+    print("[QwenTTS] Unloading model to free VRAM...")
+    _model = None
+    _model_spec = None
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
 def run_qwen_tts(text, ref_audio_path, output_path, language="English", **kwargs):
     """
     Single generation entry point.
@@ -164,8 +179,10 @@ def run_qwen_tts(text, ref_audio_path, output_path, language="English", **kwargs
 def run_batch_qwen_tts(tasks, language="English", **kwargs):
     """
     Batch generation with concurrency control.
+    Tasks are batched by similar text length (see tts_batching.plan_batches);
+    results are returned in task order.
     """
-    results = []
+    results = [None] * len(tasks)
     qwen_mode = kwargs.get('qwen_mode', 'clone')
     voice_instruct = kwargs.get('voice_instruct', '')
     model_size = kwargs.get('qwen_model_size', '1.7B')
@@ -175,48 +192,26 @@ def run_batch_qwen_tts(tasks, language="English", **kwargs):
         if qwen_mode == 'design' and voice_instruct:
              model = get_model('design', model_size)
              print(f"[QwenTTS] Batch Design ({len(tasks)} items, Batch Size: {batch_size})...")
-             
-             for i in range(0, len(tasks), batch_size):
-                 chunk = tasks[i : i + batch_size]
-                 texts = [t['text'] for t in chunk]
-                 instructs = [voice_instruct] * len(chunk)
-                 langs = [language] * len(chunk)
-                 
-                 wavs, sr = model.generate_voice_design(
-                     text=texts,
-                     language=langs,
-                     instruct=instructs
+
+             def synthesize(chunk):
+                 return model.generate_voice_design(
+                     text=[t['text'] for t in chunk],
+                     language=[language] * len(chunk),
+                     instruct=[voice_instruct] * len(chunk)
                  )
-                 
-                 for j, w in enumerate(wavs):
-                     out = chunk[j]['output_path']
-                     sf.write(out, w, sr)
-                     results.append({"success": True, "output": out})
-                     print(f"[PROGRESS] {int((i + j + 1) / len(tasks) * 100)}", flush=True)
 
         elif qwen_mode == 'preset':
              preset_voice = kwargs.get('preset_voice', 'Vivian')
              model = get_model('custom', model_size)
              print(f"[QwenTTS] Batch Preset ({len(tasks)} items, Speaker: {preset_voice}, Batch Size: {batch_size})...")
-             
-             for i in range(0, len(tasks), batch_size):
-                 chunk = tasks[i : i + batch_size]
-                 texts = [t['text'] for t in chunk]
-                 speakers = [preset_voice] * len(chunk)
-                 langs = [language] * len(chunk)
-                 
-                 wavs, sr = model.generate_custom_voice(
-                     text=texts,
-                     language=langs,
-                     speaker=speakers
+
+             def synthesize(chunk):
+                 return model.generate_custom_voice(
+                     text=[t['text'] for t in chunk],
+                     language=[language] * len(chunk),
+                     speaker=[preset_voice] * len(chunk)
                  )
                  
-                 for j, w in enumerate(wavs):
-                     out = chunk[j]['output_path']
-                     sf.write(out, w, sr)
-                     results.append({"success": True, "output": out})
-                     print(f"[PROGRESS] {int((i + j + 1) / len(tasks) * 100)}", flush=True)
-                 
         else:
              # Clone Mode
              model = get_model('base', model_size)
@@ -224,14 +219,9 @@ def run_batch_qwen_tts(tasks, language="English", **kwargs):
              
              qwen_ref_text = kwargs.get('qwen_ref_text', '')
              use_x_vector = not bool(qwen_ref_text)
-             
-             for i in range(0, len(tasks), batch_size):
-                 chunk = tasks[i : i + batch_size]
-                 
+
+             def synthesize(chunk):
                  chunk_prompts = []
-                 chunk_texts = []
-                 chunk_langs = []
-                 
                  for t in chunk:
                      p = model.create_voice_clone_prompt(
                         ref_audio=t['ref_audio_path'],
@@ -239,28 +229,41 @@ def run_batch_qwen_tts(tasks, language="English", **kwargs):
                         x_vector_only_mode=use_x_vector
                      )
                      chunk_prompts.append(p[0])
-                     chunk_texts.append(t['text'])
-                     chunk_langs.append(language)
-                 
-                 wavs, sr = model.generate_voice_clone(
-                     text=chunk_texts,
-                     language=chunk_langs,
+                 return model.generate_voice_clone(
+                     text=[t['text'] for t in chunk],
+                     language=[language] * len(chunk),
                      voice_clone_prompt=chunk_prompts
                  )
-                 
-                 for j, w in enumerate(wavs):
-                     out = chunk[j]['output_path']
-                     sf.write(out, w, sr)
-                     results.append({"success": True, "output": out})
-                     print(f"[PROGRESS] {int((i + j + 1) / len(tasks) * 100)}", flush=True)
+
+        # Every item is padded to the longest one in its batch, so batch similar lengths
+        batches = plan_batches(tasks, batch_size, kwargs.get('token_budget'))
+        done = 0
+        for batch in batches:
+            chunk = [tasks[i] for i in batch]
+            try:
+                wavs, sr = synthesize(chunk)
+                for i, w in zip(batch, wavs):
+                    out = tasks[i]['output_path']
+                    sf.write(out, w, sr)
+                    results[i] = {"success": True, "output": out}
+                    emit_partial(tasks[i], i, output=out)
+            except Exception as e:
+                print(f"[QwenTTS] Batch of {len(batch)} failed: {e}")
+                traceback.print_exc()
+                for i in batch:
+                    if results[i] is None:
+                        results[i] = {"success": False, "error": str(e)}
+                        emit_partial(tasks[i], i, error=str(e))
+            done += len(batch)
+            print(f"[PROGRESS] {int(done / len(tasks) * 100)}", flush=True)
 
     except Exception as e:
         print(f"[QwenTTS] Batch Error: {e}")
         traceback.print_exc()
         # Ensure results list matches tasks length for caller if partially failed
-        if len(results) < len(tasks):
-            for _ in range(len(tasks) - len(results)):
-                results.append({"success": False, "error": str(e)})
+        for i, res in enumerate(results):
+            if res is None:
+                results[i] = {"success": False, "error": str(e)}
 
     finally:
         # Explicit VRAM Cleanup
@@ -0,0 +1,136 @@
+"""
+In-process time stretching (WSOLA) on NumPy arrays.
+
+Replaces the ffmpeg `atempo` chain for fitting TTS clips into their subtitle
+slots: clips are stretched in memory, pitch unchanged, to an exact sample
+count, so alignment needs no subprocess. IndexTTS2 clips are stretched before
+they are first written, a speaker batch at a time through stretch_batch (see
+tts.py); check_time_stretch.py compares the output with the atempo path.
+
+WSOLA (waveform-similarity overlap-add) cuts the input into windowed frames
+at a hop of `synthesis_hop * rate` and overlap-adds them at `synthesis_hop`.
+Each frame may shift by up to `tolerance` samples from its nominal position to
+line up best with the natural continuation of the previous frame, which keeps
+the pitch periods of speech intact. The similarity search runs on the mono
+mixdown; all channels use the same frame positions.
+
+Only the overlap-add is vectorized. The search is a Python loop with one
+np.correlate per output frame (~20 ms of audio), because each frame's template
+depends on where the previous frame landed; it stays well below real time for
+TTS-length clips.
+"""
+import numpy as np
+
+# Frame length; ~40 ms covers a few pitch periods of speech
+FRAME_MS = 40.0
+# Maximum shift of a frame from its nominal position
+TOLERANCE_MS = 10.0
+# Rates this close to 1.0 are left alone (same threshold as the atempo path)
+MIN_RATE_CHANGE = 0.01
+
+_windows = {}
+
+
+def _window(n):
+    win = _windows.get(n)
+    if win is None:
+        win = np.hanning(n + 2)[1:-1].astype(np.float32)
+        _windows[n] = win
+    return win
+
+
+def _frame_positions(mono, rate, frame, hop, tolerance, n_frames):
+    """Input start sample of every output frame (the sequential WSOLA search)."""
+    positions = np.empty(n_frames, dtype=np.int64)
+    padded = np.pad(mono, (tolerance, frame + tolerance + hop))
+    positions[0] = 0
+    prev = 0
+    for m in range(1, n_frames):
+        nominal = int(round(m * hop * rate))
+        # What the previous frame would continue with if no stretching happened
+        template = padded[tolerance + prev + hop: tolerance + prev + hop + frame]
+        region = padded[nominal: nominal + frame + 2 * tolerance]
+        if len(template) < frame or len(region) < frame:
+            prev = nominal
+        else:
+            # Cross-correlation at every candidate shift (-tolerance..+tolerance)
+            corr = np.correlate(region, template, mode='valid')
+            prev = nominal + int(np.argmax(corr)) - tolerance
+        positions[m] = prev
+    return positions
+
+
+def wsola(y, rate, sr, frame_ms=FRAME_MS, tolerance_ms=TOLERANCE_MS):
+    """
+    Time-stretch audio without changing pitch.
+    :param y: Samples, shape (N,) or (N, channels)
+    :param rate: Speed factor; 2.0 plays twice as fast (half the length)
+    :param sr: Sample rate
+    :return: float32 array of round(N / rate) samples, same channel layout as y
+    """
+    if rate <= 0:
+        raise ValueError("rate must be positive")
+    y = np.asarray(y, dtype=np.float32)
+    mono_input = y.ndim == 1
+    x = y[:, None] if mono_input else y
+    n_in = x.shape[0]
+    n_out = max(1, int(round(n_in / rate)))
+
+    frame = max(64, int(sr * frame_ms / 1000) // 2 * 2)
+    hop = frame // 2
+    tolerance = max(1, int(sr * tolerance_ms / 1000))
+    if n_in < frame:
+        # Too short to stretch meaningfully: resample the timeline
+        idx = np.minimum((np.arange(n_out) * rate).astype(np.int64), n_in - 1)
+        out = x[idx]
+        return out[:, 0] if mono_input else out
+
+    n_frames = n_out // hop + 2
+    positions = _frame_positions(x.mean(axis=1), rate, frame, hop, tolerance, n_frames)
+
+    # Overlap-add every frame at once
+    padded = np.pad(x, ((0, frame + 2 * tolerance + hop), (0, 0)))
+    positions = np.clip(positions, 0, padded.shape[0] - frame)
+    win = _window(frame)
+    frames = padded[positions[:, None] + np.arange(frame)] * win[None, :, None]
+    out_len = (n_frames - 1) * hop + frame
+    out = np.zeros((out_len, x.shape[1]), dtype=np.float32)
+    norm = np.zeros(out_len, dtype=np.float32)
+    # frame == 2 * hop: even frames tile the output back to back, and so do odd ones,
+    # so each set is added as one contiguous block
+    for parity in (0, 1):
+        sel = frames[parity::2]
+        start = parity * hop
+        end = start + len(sel) * frame
+        out[start:end] += sel.reshape(-1, x.shape[1])
+        norm[start:end] += np.tile(win, len(sel))
+
+    out = out[:n_out] / np.maximum(norm[:n_out], 1e-3)[:, None]
+    return out[:, 0] if mono_input else out
+
+
+def stretch_to_duration(y, sr, target_sec):
+    """Stretch `y` to exactly `target_sec` seconds (returned unchanged if already within 1%)."""
+    n_in = len(y)
+    n_target = max(1, int(round(target_sec * sr)))
+    rate = n_in / n_target
+    if abs(rate - 1.0) <= MIN_RATE_CHANGE:
+        return y
+    out = wsola(y, rate, sr)
+    if len(out) != n_target:
+        out = out[:n_target] if len(out) > n_target else np.pad(out, [(0, n_target - len(out))] + [(0, 0)] * (out.ndim - 1))
+    return out
+
+
+def stretch_batch(clips, sr, target_durations):
+    """
+    Stretch many clips of one sample rate to their target durations.
+    :param clips: List of arrays, shape (N,) or (N, channels)
+    :param target_durations: Seconds per clip; None leaves a clip unchanged
+    :return: List of arrays in the same order
+    """
+    return [
+        clip if target is None or target <= 0 else stretch_to_duration(clip, sr, target)
+        for clip, target in zip(clips, target_durations)
+    ]
+
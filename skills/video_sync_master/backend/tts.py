@@ -1,6 +1,7 @@
 import sys
 import os
 import torch
+import numpy as np
 import soundfile as sf
 import traceback
 import json
@@ -18,6 +19,10 @@ except ImportError as e:
     print(f"Failed to import IndexTTS2: {e}")
     IndexTTS2 = None
 
+from tts_batching import plan_batches, emit_partial
+from alignment import fit_samples_to_slots
+import media_io
+
 # Default Checkpoint Paths
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 # 1. Dev: ../models/index-tts
@@ -60,6 +65,73 @@ def run_edge_tts_sync(text, output_path, voice="en-US-ChristopherNeural"):
         return False
 # -------------------------
 
+# IndexTTS2 instance kept between run_tts calls (e.g. per-segment dubbing)
+_model = None
+_model_spec = None # tuple (model_dir, config_path)
+
+def get_model(model_dir, config_path):
+    """
+    Return the resident IndexTTS2 instance for this checkpoint, creating it on first use.
+    """
+    global _model, _model_spec
+    if _model is not None and _model_spec == (model_dir, config_path):
+        return _model
+    release_model()
+    # Note: adjust use_fp16/use_cuda_kernel/use_deepspeed based on environment.
+    # Starting with conservative defaults (False) for stability. User can enable later.
+    _model = IndexTTS2(
+        cfg_path=config_path, 
+        model_dir=model_dir, 
+        use_fp16=False, 
+        use_cuda_kernel=False, 
+        use_deepspeed=False
+    )
+    _model_spec = (model_dir, config_path)
+    return _model
+
+def release_model():
+    """
+    Drop the resident IndexTTS2 instance and free its VRAM.
+    """
+    global _model, _model_spec
+    if _model is None:
+        return
+    print("[TTS] Unloading IndexTTS2 to free VRAM...")
+    _model = None
+    _model_spec = None
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def _infer_samples(tts, **infer_kwargs):
+    """
+    Run tts.infer without saving.
+    :return: (float32 samples of shape (N, channels), sample rate)
+    """
+    result = tts.infer(output_path=None, **infer_kwargs)
+    if result is None:
+        raise RuntimeError("IndexTTS2 produced no audio")
+    sr, wav = result  # int16
+    return wav.astype(np.float32) / 32768.0, sr
+
+def _save_fitted(clips, sr, output_paths, target_durations):
+    """
+    Write clips of one sample rate, each once. Speech that still overruns its slot after
+    the model's duration control is first compressed in memory (one WSOLA batch, see
+    alignment.fit_samples_to_slots), so aligning the files afterwards is a no-op.
+    :return: List of (output path, error message or None)
+    """
+    results = []
+    fitted = fit_samples_to_slots(clips, sr, target_durations)
+    for (y, duration, aligned), path, target in zip(fitted, output_paths, target_durations):
+        if aligned:
+            print(f"Fitted {duration:.2f}s -> {target:.2f}s before saving")
+        try:
+            media_io.write_pcm(path, y, sr)
+            results.append((path, None))
+        except Exception as e:
+            results.append((path, str(e)))
+    return results
+
 def run_tts(text, ref_audio_path, output_path, model_dir=None, config_path=None, language="English", **kwargs):
     """
     Run Voice Cloning TTS.
@@ -85,16 +157,8 @@ def run_tts(text, ref_audio_path, output_path, model_dir=None, config_path=None,
     print(f"TTS Text with tag: {text}")
     
     try:
-        # Initialize the model
-        # Note: adjust use_fp16/use_cuda_kernel/use_deepspeed based on environment.
-        # Starting with conservative defaults (False) for stability. User can enable later.
-        tts = IndexTTS2(
-            cfg_path=config_path, 
-            model_dir=model_dir, 
-            use_fp16=False, 
-            use_cuda_kernel=False, 
-            use_deepspeed=False
-        )
+        # Initialize the model (reused across calls until release_model())
+        tts = get_model(model_dir, config_path)
         
         print(f"Synthesizing text: '{text}' using ref: {ref_audio_path}")
         
@@ -103,13 +167,16 @@ def run_tts(text, ref_audio_path, output_path, model_dir=None, config_path=None,
         # It's better to ensure directory exists.
         os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
         
-        tts.infer(
+        y, sr = _infer_samples(
+            tts,
             spk_audio_prompt=ref_audio_path, 
             text=text, 
-            output_path=output_path,
             verbose=True,
             **kwargs
         )
+        (_, error), = _save_fitted([y], sr, [output_path], [kwargs.get('target_duration')])
+        if error:
+            raise RuntimeError(error)
         
         print(f"TTS complete. Saved to {output_path}")
         return True
@@ -141,67 +208,78 @@ def run_batch_tts(tasks, model_dir=None, config_path=None, language="English", *
     batch_size = kwargs.get('batch_size', 1)
     
     try:
-        # Initialize model once
-        tts = IndexTTS2(
-            cfg_path=config_path, 
-            model_dir=model_dir, 
-            use_fp16=False, 
-            use_cuda_kernel=False, 
-            use_deepspeed=False
-        )
+        # Reuse the resident model (e.g. loaded by an earlier run_tts call)
+        tts = get_model(model_dir, config_path)
         
         total = len(tasks)
-        
-        for i, task in enumerate(tasks):
-            text = task['text']
-            ref = task['ref_audio_path']
-            out = task['output_path']
-            
-            # Use task-specific language or fallback to global default
-            task_lang = task.get('language', language)
-            
-
-            print(f"Synthesizing [{i+1}/{total}]: '{text}'")
-            
-            os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
-            
-            try:
-                ignore_keys = {'batch_size', 'qwen_mode', 'voice_instruct', 'preset_voice', 'qwen_model_size', 'qwen_ref_text', 'tts_service', 'action', 'json', 'repetition_penalty', 'cfg_scale'}
-                
-                valid_kwargs = {k: v for k, v in kwargs.items() if k not in ignore_keys}
-                
-                tts.infer(
-                    spk_audio_prompt=ref, 
-                    text=text, 
-                    output_path=out,
-                    verbose=False,
-                    **valid_kwargs
-                )
-                
-                # Emit Partial Result for UI to enable playback immediately
-                partial_data = {
-                    "index": task.get('index', i),
-                    "audio_path": out,
-                    "success": True
-                }
-                print(f"[PARTIAL] {json.dumps(partial_data)}", flush=True)
-                
-                yield {"success": True, "output": out}
 
+        if kwargs.get('use_emo_text'):
+            # Classify every line's emotion in batches up front; infer() then hits the cache
+            emo_text = kwargs.get('emo_text')
+            try:
+                tts.qwen_emo.inference_many([emo_text or task['text'] for task in tasks])
             except Exception as e:
-                print(f"Failed task {i}: {e}")
-                
-                partial_data = {
-                    "index": task.get('index', i),
-                    "success": False,
-                    "error": str(e)
-                }
-                print(f"[PARTIAL] {json.dumps(partial_data)}", flush=True)
-                
-                yield {"success": False, "error": str(e)}
-            
+                print(f"[BatchTTS] Emotion pre-classification failed, classifying per line: {e}")
+
+        # IndexTTS2 synthesizes one line per call and caches the conditioning of the last
+        # speaker, so keep each speaker's lines together (shortest first); results are
+        # still yielded in task order.
+        batches = plan_batches(tasks, batch_size, kwargs.get('token_budget'), group_by_speaker=True)
+        finished = {}
+        next_to_yield = 0
+        done = 0
+
+        ignore_keys = {'batch_size', 'token_budget', 'qwen_mode', 'voice_instruct', 'preset_voice', 'qwen_model_size', 'qwen_ref_text', 'tts_service', 'action', 'json', 'repetition_penalty', 'cfg_scale'}
+        valid_kwargs = {k: v for k, v in kwargs.items() if k not in ignore_keys}
+
+        for batch in batches:
+            # Synthesize the batch in memory, then fit overlong lines into their slots
+            # with one stretch_batch call and write every clip once
+            synthesized = []
+            for i in batch:
+                task = tasks[i]
+                text = task['text']
+                print(f"Synthesizing [{done + len(synthesized) + 1}/{total}] (task {i+1}): '{text}'")
+                try:
+                    y, sr = _infer_samples(
+                        tts,
+                        spk_audio_prompt=task['ref_audio_path'], 
+                        text=text, 
+                        verbose=False,
+                        target_duration=task.get('target_duration'),
+                        **valid_kwargs
+                    )
+                    synthesized.append((i, y, sr))
+                except Exception as e:
+                    print(f"Failed task {i}: {e}")
+                    emit_partial(task, i, error=str(e))
+                    finished[i] = {"success": False, "error": str(e)}
+
+            for sr in {sr for _, _, sr in synthesized}:
+                group = [(i, y) for i, y, clip_sr in synthesized if clip_sr == sr]
+                outputs = [tasks[i]['output_path'] for i, _ in group]
+                for out in outputs:
+                    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+                saved = _save_fitted([y for _, y in group], sr, outputs,
+                                     [tasks[i].get('target_duration') for i, _ in group])
+                for (i, _), (out, error) in zip(group, saved):
+                    if error:
+                        print(f"Failed task {i}: {error}")
+                        emit_partial(tasks[i], i, error=error)
+                        finished[i] = {"success": False, "error": error}
+                    else:
+                        # Emit Partial Result for UI to enable playback immediately
+                        emit_partial(tasks[i], i, output=out)
+                        finished[i] = {"success": True, "output": out}
+
             # Emit progress
-            print(f"[PROGRESS] {int((i + 1) / total * 100)}", flush=True)
+            done += len(batch)
+            print(f"[PROGRESS] {int(done / total * 100)}", flush=True)
+
+            # Restore task order for the caller
+            while next_to_yield in finished:
+                yield finished.pop(next_to_yield)
+                next_to_yield += 1
 
     except Exception as e:
         print(f"Error during Batch TTS: {e}")
@@ -210,20 +288,6 @@ def run_batch_tts(tasks, model_dir=None, config_path=None, language="English", *
         pass
     finally:
         # User Requirement: Unload VRAM after all inference is done
-        if IndexTTS2 is not None:
-            # We don't have a direct 'unload' method on the class instance usually, but we can del it
-            # actually our run_batch_tts creates a local `tts` instance.
-            # wait, `tts = IndexTTS2(...)` is local to this function (line 117).
-            # So when function returns, it goes out of scope?
-            # Yes, unless there are circular refs.
-            # But we should be explicit.
-            pass
-        
-        # We need to access `tts` variable, but it might not be defined if init failed
-        if 'tts' in locals():
-            del tts
-        
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-            print("[BatchTTS] VRAM cleared.")
+        tts = None  # Drop this frame's reference too, or empty_cache() frees nothing
+        release_model()
 
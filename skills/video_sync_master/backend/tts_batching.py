@@ -0,0 +1,77 @@
+"""
+Length-aware scheduling for batch TTS.
+
+Batched synthesis pads every item to the longest one in its batch, so tasks
+are ordered by estimated token length (and speaker) and cut into
+length-homogeneous batches that stay under a padded-token budget. Callers
+run the batches in plan order and put results back in task order.
+"""
+import json
+import os
+import re
+
+# Padded tokens (batch size x longest item) allowed per batch
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("TTS_TOKEN_BUDGET", "2048"))
+
+# CJK / kana / hangul characters are roughly one token each; other scripts
+# are counted per word, with long words split into several pieces
+_CHAR_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]")
+_WORD_PATTERN = re.compile(r"[^\W\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]+")
+
+
+def estimate_tokens(text):
+    """Rough text-token count of a TTS line."""
+    if not text:
+        return 1
+    tokens = len(_CHAR_TOKEN_PATTERN.findall(text))
+    tokens += sum(1 + len(word) // 6 for word in _WORD_PATTERN.findall(text))
+    return max(1, tokens)
+
+
+def plan_batches(tasks, batch_size=1, token_budget=None, group_by_speaker=False):
+    """
+    Split tasks into batches of similar length.
+    :param tasks: List of dicts with 'text' and optionally 'ref_audio_path' (the speaker)
+    :param batch_size: Maximum items per batch
+    :param token_budget: Maximum padded tokens per batch (items x longest item);
+        an item longer than the budget still gets a batch of its own
+    :param group_by_speaker: Never mix speakers in a batch and keep each speaker's
+        tasks together (for models that cache the speaker conditioning)
+    :return: List of batches, each a list of indices into tasks
+    """
+    batch_size = max(1, batch_size or 1)
+    token_budget = token_budget or DEFAULT_TOKEN_BUDGET
+    lengths = [estimate_tokens(task.get('text', '')) for task in tasks]
+    speakers = [task.get('ref_audio_path') or '' for task in tasks]
+
+    if group_by_speaker:
+        order = sorted(range(len(tasks)), key=lambda i: (speakers[i], lengths[i], i))
+    else:
+        order = sorted(range(len(tasks)), key=lambda i: (lengths[i], speakers[i], i))
+
+    batches = []
+    batch = []
+    for i in order:
+        if batch:
+            longest = max(lengths[i], lengths[batch[-1]])
+            if (len(batch) >= batch_size
+                    or (len(batch) + 1) * longest > token_budget
+                    or (group_by_speaker and speakers[i] != speakers[batch[-1]])):
+                batches.append(batch)
+                batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def emit_partial(task, i, output=None, error=None):
+    """Print the [PARTIAL] event the UI uses to enable playback of a finished item."""
+    partial_data = {"index": task.get('index', i)}
+    if error is None:
+        partial_data["audio_path"] = output
+        partial_data["success"] = True
+    else:
+        partial_data["success"] = False
+        partial_data["error"] = error
+    print(f"[PARTIAL] {json.dumps(partial_data)}", flush=True)
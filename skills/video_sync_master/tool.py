@@ -46,6 +46,13 @@ def main():
     p_asr.add_argument("--video", required=True)
     p_asr.add_argument("--service", default="jianying", choices=["whisperx", "jianying", "bcut"])
 
+    # 1b. Batch ASR (Directory of clips, one model load)
+    p_basr = subparsers.add_parser("batch_asr", help="Extract subtitles for every clip in a directory")
+    p_basr.add_argument("--dir", required=True)
+    p_basr.add_argument("--service", default="whisperx", choices=["whisperx", "jianying", "bcut"])
+    p_basr.add_argument("--batch_size", type=int, default=0, help="WhisperX batch size (0 = auto from free memory)")
+    p_basr.add_argument("--language", default="zh", help="Language code or 'auto'")
+
     # 2. Translate (Text to Text)
     p_trans = subparsers.add_parser("translate", help="Translate text/subs")
     p_trans.add_argument("--text", required=True, help="Text string or JSON segments")
@@ -59,6 +66,7 @@ def main():
     p_dub.add_argument("--asr", default="openai_whisper", help="ASR Service: whisperx / openai_whisper")
     p_dub.add_argument("--qwen_mode", default="clone", choices=["clone", "preset", "design"], help="Qwen TTS Mode")
     p_dub.add_argument("--voice_instruct", default="", help="Instruction for Voice Design (e.g. 'Deep Male Voice')")
+    p_dub.add_argument("--resume", action="store_true", help="Resume an interrupted dub, reusing finished segments")
 
     # 4. Sync (Lip Sync Only)
     p_sync = subparsers.add_parser("sync", help="Sync lips to new audio")
@@ -69,6 +77,9 @@ def main():
 
     if args.command == "asr":
         res = run_vsm_cmd(["--action", "asr", "--input", args.video, "--asr", args.service])
+    elif args.command == "batch_asr":
+        res = run_vsm_cmd(["--action", "batch_asr", "--input", args.dir, "--asr", args.service,
+                           "--asr_batch_size", str(args.batch_size), "--asr_language", args.language])
     elif args.command == "translate":
         res = run_vsm_cmd(["--action", "translate_text", "--input", args.text, "--lang", args.lang])
     elif args.command == "dub":
@@ -81,6 +92,8 @@ def main():
             cmd_args.extend(["--qwen_mode", args.qwen_mode])
         if args.voice_instruct:
             cmd_args.extend(["--voice_instruct", args.voice_instruct])
+        if args.resume:
+            cmd_args.append("--resume")
         res = run_vsm_cmd(cmd_args)
         # Note: 'merge_video' in VSM usually implies the full flow if implemented correctly in main.py, 
         # but we might need to chain calls if VSM expects separate steps.
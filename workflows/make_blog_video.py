@@ -15,6 +15,13 @@ LP_TOOL = SKILLS_DIR / "live_portrait" / "tool.py"
 AE_TOOL = SKILLS_DIR / "audio_enhancer" / "tool.py"
 VSM_TOOL = SKILLS_DIR / "video_sync_master" / "tool.py"
 
+# Shared in-process media I/O (PyAV, ffmpeg CLI fallback) from the Video Sync Master backend
+sys.path.append(str(SKILLS_DIR / "video_sync_master" / "backend"))
+try:
+    import media_io
+except ImportError:
+    media_io = None
+
 def run_skill(tool_path, args):
     """Run a G-S Protocol skill and return output path."""
     cmd = [sys.executable, str(tool_path)] + args
@@ -69,6 +76,15 @@ def merge_assets(video_path, audio_path, output_path):
     Command: ffmpeg -stream_loop -1 -i vid -i aud -shortest -map 0:v -map 1:a ...
     """
     print(f"🔨 [Workflow] Merging into final video...")
+
+    if media_io:
+        try:
+            # Always re-encoded: keeps the compatibility encode and frame-accurate loop/-shortest cuts
+            media_io.mux(str(video_path), str(audio_path), str(output_path),
+                         video_codec="libx264", audio_codec="aac", loop_video=True)
+            return True
+        except Exception as e:
+            print(f"⚠️ [Merge] media_io failed ({e}), retrying with ffmpeg...")
     
     cmd = [
         "ffmpeg", "-v", "error", "-y",